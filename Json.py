@@ -1,31 +1,126 @@
-from json import dump, load
-from typing import Dict
+import os
+import sqlite3
+import tempfile
+import threading
+from json import dump, dumps, load, loads
+from pathlib import Path
+from typing import Dict, Optional, Tuple
+
+# -------------------------------------------------------------------
+# PREFERÊNCIAS (Settings.json + perfis por usuário)
+# -------------------------------------------------------------------
+# - Leitura: o conteúdo de cada arquivo fica em memória e só é relido
+#   quando (mtime, tamanho) muda; um rerun custa um os.stat.
+# - Escrita: update() grava todas as chaves alteradas de uma vez num
+#   arquivo temporário no mesmo diretório e troca por os.replace
+#   (atômico). O lock serializa sessões do mesmo processo, e o arquivo
+#   é relido dentro dele para não perder o que outra sessão gravou.
+# - Perfis (opcional): com `perfil`, as chaves alteradas vão para um
+#   SQLite local (PERFIS_DB) e sobrepõem o Settings.json só para aquele
+#   usuário. DASH_PERFIS=1 liga o perfil por ?perfil=<nome> na URL.
+
+PERFIS_DB = Path(os.environ.get("DASH_PERFIS_DB", ".cache/perfis.sqlite"))
+
+_lock = threading.Lock()
+_cache: Dict[str, Tuple[Tuple[int, int], dict]] = {}
+
+
+def _assinatura(path: str) -> Tuple[int, int]:
+    st = os.stat(path)
+    return st.st_mtime_ns, st.st_size
+
+
+def _ler(path: str) -> dict:
+    """Conteúdo do arquivo, do cache enquanto (mtime, tamanho) não mudar."""
+    assinatura = _assinatura(path)
+    item = _cache.get(path)
+    if item is None or item[0] != assinatura:
+        with open(path, 'r') as file:
+            item = _cache[path] = (assinatura, load(file))
+    return item[1]
+
+
+def _gravar(path: str, data: dict) -> None:
+    pasta = os.path.dirname(os.path.abspath(path))
+    fd, tmp = tempfile.mkstemp(prefix='.settings-', suffix='.tmp', dir=pasta)
+    try:
+        with os.fdopen(fd, 'w') as file:
+            dump(data, file, indent=2)
+            file.flush()
+            os.fsync(file.fileno())
+        os.replace(tmp, path)
+    except BaseException:
+        if os.path.exists(tmp):
+            os.remove(tmp)
+        raise
+    _cache[path] = (_assinatura(path), data)
+
+
+def _conectar_perfis() -> sqlite3.Connection:
+    PERFIS_DB.parent.mkdir(parents=True, exist_ok=True)
+    conn = sqlite3.connect(PERFIS_DB, timeout=10)
+    conn.execute("PRAGMA journal_mode=WAL")
+    conn.execute(
+        "CREATE TABLE IF NOT EXISTS perfis ("
+        " usuario TEXT NOT NULL, chave TEXT NOT NULL, valor TEXT,"
+        " PRIMARY KEY (usuario, chave))"
+    )
+    return conn
+
+
+def _ler_perfil(perfil: str) -> dict:
+    if not PERFIS_DB.exists():
+        return {}
+    with _conectar_perfis() as conn:
+        rows = conn.execute("SELECT chave, valor FROM perfis WHERE usuario = ?", (perfil,)).fetchall()
+    return {chave: loads(valor) for chave, valor in rows}
+
+
+def perfil_da_sessao() -> Optional[str]:
+    """Perfil da sessão Streamlit atual (?perfil=<nome>), se DASH_PERFIS=1."""
+    if os.environ.get("DASH_PERFIS", "0") != "1":
+        return None
+    import streamlit as st
+    return st.query_params.get("perfil") or None
 
 
 class Settings:
-    def __init__(self, file_name: str = 'Settings.json') -> None:
+    def __init__(self, file_name: str = 'Settings.json', perfil: Optional[str] = None) -> None:
+        self.file_name = file_name
+        self.perfil = perfil
         self.__file_settings(file_name)
 
     def __file_settings(self, file_name: str) -> Dict:
-        with open(file_name, 'r') as file:
-            self.settings_dict: dict = load(file)
+        self.settings_dict: dict = dict(_ler(file_name))
+        if self.perfil:
+            self.settings_dict.update(_ler_perfil(self.perfil))
         return self.settings_dict
 
     def key(self, key: str) -> str:
-        for i, value in self.settings_dict.items():
-            if i == key:
-                return value
-        return ''
+        return self.settings_dict.get(key, '')
 
-    def update_json(self, key: str, value: str | None) -> None:
-        with open('Settings.json', 'r') as file:
-            data = load(file)
+    def update(self, valores: Dict[str, str | None]) -> None:
+        """Grava de uma vez as chaves que mudaram (no perfil, se houver)."""
+        alteradas = {k: v for k, v in valores.items() if self.settings_dict.get(k) != v}
+        if not alteradas:
+            return
 
-        data[key] = value
+        if self.perfil:
+            with _conectar_perfis() as conn:
+                conn.executemany(
+                    "INSERT INTO perfis (usuario, chave, valor) VALUES (?, ?, ?) "
+                    "ON CONFLICT (usuario, chave) DO UPDATE SET valor = excluded.valor",
+                    [(self.perfil, k, dumps(v)) for k, v in alteradas.items()],
+                )
+        else:
+            with _lock:
+                data = dict(_ler(self.file_name))
+                data.update(alteradas)
+                _gravar(self.file_name, data)
+        self.settings_dict.update(alteradas)
 
-        # Salvando as alterações de volta no arquivo
-        with open('Settings.json', 'w') as file:
-            dump(data, file, indent=2)
+    def update_json(self, key: str, value: str | None) -> None:
+        self.update({key: value})
 
 if __name__ == '__main__':
-    s = Settings('Settings.json')
\ No newline at end of file
+    s = Settings('Settings.json')
@@ -0,0 +1,151 @@
+import heapq
+import itertools
+from typing import Dict, Mapping, Optional, Sequence
+
+import numpy as np
+import pandas as pd
+
+from calendario import DEFAULT_CALENDAR, WorkCalendar
+from generator import Generator
+
+# -------------------------------------------------------------------
+# AGENDADOR DE EVENTOS DISCRETOS (CAPACIDADE POR ESTAÇÃO)
+# -------------------------------------------------------------------
+# create_df_filled trata a fábrica como uma fila única. Aqui cada
+# estação (corte, coladeira, usinagem, ...) tem sua própria fila e
+# `capacidade` postos em paralelo. Um heap de eventos (fim de etapa)
+# avança o relógio; quando um posto libera, a estação puxa da sua fila
+# a ordem de maior prioridade (urgente, previsao, Prazo). O tempo roda
+# em segundos úteis do WorkCalendar, então o expediente é respeitado.
+
+ETAPAS_FLUXO = ["corte", "customizacao", "coladeira", "usinagem", "montagem", "paineis", "embalagem"]
+
+CAPACIDADE_PADRAO: Dict[str, int] = {etapa: 1 for etapa in ETAPAS_FLUXO}
+
+
+def duracoes_padrao() -> Dict[str, float]:
+    """Horas médias por etapa, as mesmas do Generator."""
+    return {
+        etapa: h + m / 60
+        for etapa, (h, m) in ((c[:-3], v) for c, v in Generator().list_columns_final.items())
+    }
+
+
+def prioridade(df: pd.DataFrame) -> np.ndarray:
+    """Posição de cada ordem na fila: urgente primeiro, depois previsao e Prazo."""
+    chave = pd.DataFrame({
+        "urgente": ~df["urgente"].fillna(False).astype(bool),
+        "previsao": pd.to_datetime(df["previsao"], errors="coerce"),
+        "prazo": pd.to_numeric(df["Prazo"], errors="coerce"),
+    }, index=df.index)
+    ordem = chave.reset_index(drop=True).sort_values(
+        ["urgente", "previsao", "prazo"], na_position="last", kind="stable"
+    ).index.to_numpy()
+    rank = np.empty(len(ordem), dtype="int64")
+    rank[ordem] = np.arange(len(ordem))
+    return rank
+
+
+def agendar(
+    df_abertas: pd.DataFrame,
+    capacidade: Optional[Mapping[str, int]] = None,
+    duracoes: Optional[Mapping[str, float]] = None,
+    agora: Optional[pd.Timestamp] = None,
+    cal: WorkCalendar = DEFAULT_CALENDAR,
+    etapas: Sequence[str] = ETAPAS_FLUXO,
+) -> tuple[pd.DataFrame, pd.DataFrame]:
+    """
+    Simula as ordens em aberto e devolve:
+    - agenda: (posicao, etapa, inicio, fim) por ordem e etapa a executar;
+    - utilizacao: por estação, horas ocupadas e % de uso até a última saída.
+
+    Etapas já finalizadas são puladas; etapa iniciada ocupa um posto
+    desde agora pelo tempo que falta (duração - tempo útil decorrido).
+    """
+    capacidade = {**CAPACIDADE_PADRAO, **(capacidade or {})}
+    duracoes = {**duracoes_padrao(), **(duracoes or {})}
+    t0 = cal.to_business_seconds([pd.Timestamp(agora or pd.Timestamp.now())])[0]
+    n = len(df_abertas)
+    rank = prioridade(df_abertas)
+
+    ini = {e: cal.to_business_seconds(df_abertas[f"{e}inicio"]) for e in etapas}
+    fim = {e: cal.to_business_seconds(df_abertas[f"{e}fim"]) for e in etapas}
+
+    # roteiro de cada ordem: etapas ainda não finalizadas, em ordem
+    roteiro = [[e for e in etapas if np.isnan(fim[e][i])] for i in range(n)]
+    passo = [0] * n
+
+    livres = dict(capacidade)
+    filas: Dict[str, list] = {e: [] for e in etapas}
+    ocupado = {e: 0.0 for e in etapas}
+    eventos: list = []
+    seq = itertools.count()
+    agenda = []
+
+    def duracao(i: int, etapa: str, t: float) -> float:
+        total = duracoes[etapa] * 3600
+        if not np.isnan(ini[etapa][i]):
+            total -= max(t - ini[etapa][i], 0.0)
+        return max(total, 60.0)
+
+    def chegar(i: int, t: float, despacha: bool = True) -> None:
+        if passo[i] >= len(roteiro[i]):
+            return
+        etapa = roteiro[i][passo[i]]
+        # etapa em andamento tem preferência absoluta (já está no posto)
+        pri = -1 if not np.isnan(ini[etapa][i]) and passo[i] == 0 else rank[i]
+        heapq.heappush(filas[etapa], (pri, next(seq), i))
+        if despacha:
+            despachar(etapa, t)
+
+    def despachar(etapa: str, t: float) -> None:
+        while livres[etapa] > 0 and filas[etapa]:
+            _, _, i = heapq.heappop(filas[etapa])
+            livres[etapa] -= 1
+            d = duracao(i, etapa, t)
+            ocupado[etapa] += d
+            agenda.append((i, etapa, t, t + d))
+            heapq.heappush(eventos, (t + d, next(seq), etapa, i))
+
+    # todas as ordens entram nas filas antes do primeiro despacho, para a
+    # prioridade valer também no instante inicial
+    for i in range(n):
+        chegar(i, t0, despacha=False)
+    for etapa in etapas:
+        despachar(etapa, t0)
+
+    t_final = t0
+    while eventos:
+        t, _, etapa, i = heapq.heappop(eventos)
+        t_final = t
+        livres[etapa] += 1
+        passo[i] += 1
+        chegar(i, t)
+        despachar(etapa, t)
+
+    if agenda:
+        idx, etp, t_ini, t_fim = map(np.asarray, zip(*agenda))
+    else:
+        idx, etp, t_ini, t_fim = (np.array([], dtype="int64"), np.array([], dtype=object),
+                                  np.array([]), np.array([]))
+    df_agenda = pd.DataFrame({
+        "posicao": idx.astype("int64"),
+        "etapa": etp,
+        "inicio": cal.from_business_seconds(t_ini.astype("float64")),
+        "fim": cal.from_business_seconds(t_fim.astype("float64")),
+    })
+
+    horizonte = max(t_final - t0, 1.0)
+    utilizacao = pd.DataFrame({
+        "etapa": list(etapas),
+        "capacidade": [capacidade[e] for e in etapas],
+        "horas_ocupadas": [ocupado[e] / 3600 for e in etapas],
+        "utilizacao": [ocupado[e] / (capacidade[e] * horizonte) for e in etapas],
+    })
+    return df_agenda, utilizacao
+
+
+def conclusao_por_ordem(df_abertas: pd.DataFrame, agenda: pd.DataFrame) -> pd.Series:
+    """Fim da última etapa agendada de cada ordem (NaT se nada a fazer)."""
+    fim = agenda.groupby("posicao")["fim"].max()
+    return pd.Series(fim.reindex(range(len(df_abertas))).to_numpy(), index=df_abertas.index)
@@ -0,0 +1,171 @@
+import importlib
+import logging
+import os
+import sys
+import threading
+import time
+from pathlib import Path
+from typing import Callable, Dict, List, Tuple
+
+logger = logging.getLogger(__name__)
+
+# -------------------------------------------------------------------
+# AQUECIMENTO NA SUBIDA DO SERVIDOR
+# -------------------------------------------------------------------
+# Nenhum dashboard busca dados no import; o primeiro rerun de cada
+# página é que pagaria a carga. iniciar() dispara, uma vez por processo
+# e numa thread em segundo plano, as etapas abaixo, para que o primeiro
+# usuário encontre tudo pronto:
+#   calendario -> vetores do WorkCalendar exercitados (primeira chamada
+#                 do NumPy/pandas nesses caminhos)
+#   pool       -> workers do pool de processos lançados (pool.aquecer())
+#                 com os módulos das tarefas já importados
+#   projetos / financeiro -> snapshot Arrow de tblProjetos publicado
+#                 (e o cubo de KPIs mensais do Financeiro)
+#   producao   -> pipeline do ProducaoService para o período salvo
+#
+# `python servidor.py` sobe o Streamlit já com o aquecimento rodando;
+# com `streamlit run novo.py` ele começa na primeira sessão. Falha numa
+# etapa só vai para o log: a página carrega sob demanda como antes.
+# Tempo de import de cada módulo, de cada etapa e até o primeiro render
+# ficam em metricas(). DASH_AQUECIMENTO=0 desliga.
+#
+# O ScriptRunner do Streamlit põe o diretório do script em sys.path
+# durante cada rerun e o tira no fim; a thread importaria os dashboards
+# só enquanto alguma sessão estivesse rodando. fixar_caminho() deixa o
+# diretório do app em sys.path de forma permanente antes da thread subir.
+
+INICIO = time.time()
+ATIVO = os.environ.get("DASH_AQUECIMENTO", "1") != "0"
+APP_DIR = str(Path(__file__).resolve().parent)
+
+_lock = threading.Lock()
+_thread: threading.Thread | None = None
+_imports: Dict[str, float] = {}
+_etapas: Dict[str, Dict[str, object]] = {}
+_render: Dict[str, float] = {}
+_caminho_fixo = False
+
+
+def fixar_caminho() -> None:
+    """Acrescenta APP_DIR ao fim de sys.path (uma vez por processo)."""
+    global _caminho_fixo
+    with _lock:
+        if not _caminho_fixo:
+            # entrada própria, no fim: o remove() do ScriptRunner tira a
+            # primeira ocorrência (a dele, no início) e esta fica
+            sys.path.append(APP_DIR)
+            _caminho_fixo = True
+
+
+def importar(nome: str):
+    """importlib.import_module com o tempo do primeiro import registrado."""
+    t0 = time.perf_counter()
+    modulo = importlib.import_module(nome)
+    dt = time.perf_counter() - t0
+    with _lock:
+        # só o primeiro import custa; os seguintes saem do sys.modules
+        _imports.setdefault(nome, dt)
+    return modulo
+
+
+def _calendario() -> None:
+    import numpy as np
+    from calendario import DEFAULT_CALENDAR
+    amostra = np.array(["2025-01-06T08:00", "2025-01-10T17:00", "NaT"], dtype="datetime64[ns]")
+    DEFAULT_CALENDAR.from_business_seconds(DEFAULT_CALENDAR.to_business_seconds(amostra))
+    DEFAULT_CALENDAR.add_business_hours(amostra, np.array([1.0, 9.0, 2.0]))
+
+
+def _pool() -> None:
+    pool = importar("pool")
+    pool.aquecer()
+
+
+def _projetos() -> None:
+    importar("dash_projetos").base()
+
+
+def _financeiro() -> None:
+    dash_financeiro = importar("dash_financeiro")
+    dash_financeiro.kpis_mensais(str(dash_financeiro.base().path))
+
+
+def _producao() -> None:
+    from Json import Settings
+    dash_producao = importar("dash_producao")
+    # sem sessão (e sem perfil) aqui: aquece o período global do Settings.json
+    s = Settings()
+    ini, fim = s.key('data_inicial'), s.key('data_final')
+    dash_producao.get_producao_service().run_pipeline_incremental(ini, fim)
+
+
+ETAPAS: List[Tuple[str, Callable[[], None]]] = [
+    ("calendario", _calendario),
+    ("pool", _pool),
+    ("projetos", _projetos),
+    ("financeiro", _financeiro),
+    ("producao", _producao),
+]
+
+
+def _rodar() -> None:
+    for nome, fn in ETAPAS:
+        t0 = time.perf_counter()
+        r: Dict[str, object] = {"ok": True}
+        try:
+            fn()
+        except Exception as e:
+            r = {"ok": False, "erro": str(e)}
+            logger.warning(f"Aquecimento '{nome}' falhou: {e}")
+        with _lock:
+            _etapas[nome] = {"s": round(time.perf_counter() - t0, 3), **r}
+    logger.info(f"Aquecimento concluído em {time.time() - INICIO:.1f}s desde o início")
+
+
+class _SemAvisoDeContexto(logging.Filter):
+    """A thread de aquecimento não tem ScriptRunContext (e não precisa)."""
+
+    def filter(self, record: logging.LogRecord) -> bool:
+        return record.threadName != "aquecimento"
+
+
+def iniciar() -> None:
+    """Dispara o aquecimento (uma vez por processo)."""
+    global _thread
+    if not ATIVO:
+        return
+    fixar_caminho()
+    with _lock:
+        if _thread is not None:
+            return
+        logging.getLogger("streamlit.runtime.scriptrunner_utils.script_run_context").addFilter(_SemAvisoDeContexto())
+        _thread = threading.Thread(target=_rodar, name="aquecimento", daemon=True)
+        _thread.start()
+
+
+def aguardar(timeout: float | None = None) -> bool:
+    """Espera o aquecimento terminar; True se terminou (ou não foi iniciado)."""
+    t = _thread
+    if t is not None:
+        t.join(timeout)
+        return not t.is_alive()
+    return True
+
+
+def marcar_render(rerun_s: float) -> None:
+    """Chamado no fim de cada rerun: guarda o primeiro render do processo."""
+    with _lock:
+        if "primeiro_render_s" not in _render:
+            _render["primeiro_render_s"] = round(time.time() - INICIO, 3)
+            _render["primeiro_rerun_s"] = round(rerun_s, 3)
+
+
+def metricas() -> Dict[str, object]:
+    with _lock:
+        return {
+            "imports_s": {k: round(v, 3) for k, v in _imports.items()},
+            "etapas": {k: dict(v) for k, v in _etapas.items()},
+            "em_andamento": _thread is not None and _thread.is_alive(),
+            **_render,
+        }
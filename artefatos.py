@@ -0,0 +1,103 @@
+import json
+import logging
+import os
+from datetime import datetime, timedelta
+from pathlib import Path
+from typing import Dict, Optional
+
+import pandas as pd
+
+logger = logging.getLogger(__name__)
+
+# -------------------------------------------------------------------
+# ARTEFATOS PRÉ-CALCULADOS (PARQUET VERSIONADO)
+# -------------------------------------------------------------------
+# O batch (batch.py) grava cada agregação em
+#   artefatos/<versao>/<nome>__<inicio>__<fim>.parquet
+# e atualiza artefatos/manifest.json. A <versao> é o token do probe de
+# data_version. Como o token muda a cada escrita nas tabelas (contador
+# da migração 0004), um artefato do cron quase nunca é da versão atual:
+# carregar() aceita também o artefato mais recente do mesmo período,
+# de outra versão, se foi gerado há menos de FRESCOR (segundos;
+# DASH_ARTEFATOS_TTL, padrão 1h). Fora disso o dashboard calcula como antes.
+
+ARTEFATOS_DIR = Path("artefatos")
+FRESCOR = int(os.environ.get("DASH_ARTEFATOS_TTL", "3600"))
+
+
+def _arquivo(base: Path, versao: str, nome: str, inicio: str, fim: str) -> Path:
+    return base / versao / f"{nome}__{inicio}__{fim}.parquet"
+
+
+def salvar(df: pd.DataFrame, nome: str, inicio: str, fim: str, versao: str,
+           base: Path | str = ARTEFATOS_DIR) -> Path:
+    base = Path(base)
+    destino = _arquivo(base, versao, nome, inicio, fim)
+    destino.parent.mkdir(parents=True, exist_ok=True)
+    tmp = destino.with_suffix(".tmp")
+    df.to_parquet(tmp, index=False)
+    tmp.replace(destino)
+
+    manifest = ler_manifest(base)
+    manifest.setdefault(versao, {})[f"{nome}__{inicio}__{fim}"] = {
+        "arquivo": str(destino.relative_to(base)),
+        "linhas": len(df),
+        "gerado_em": datetime.now().isoformat(timespec="seconds"),
+    }
+    manifest["_ultima_versao"] = versao
+    tmp = base / "manifest.tmp"
+    tmp.write_text(json.dumps(manifest, indent=2), encoding="utf-8")
+    tmp.replace(base / "manifest.json")
+    logger.info(f"Artefato salvo: {destino} ({len(df)} linhas)")
+    return destino
+
+
+def ler_manifest(base: Path | str = ARTEFATOS_DIR) -> Dict:
+    path = Path(base) / "manifest.json"
+    if not path.exists():
+        return {}
+    try:
+        return json.loads(path.read_text(encoding="utf-8"))
+    except Exception as e:
+        logger.warning(f"manifest.json ilegível: {e}")
+        return {}
+
+
+def _ler(path: Path) -> Optional[pd.DataFrame]:
+    try:
+        return pd.read_parquet(path)
+    except Exception as e:
+        logger.warning(f"Falha ao ler artefato {path}: {e}")
+        return None
+
+
+def _mais_recente(base: Path, chave: str, frescor: int) -> Optional[Path]:
+    """Artefato de `chave` gerado há menos de `frescor` segundos, em qualquer versão."""
+    limite = datetime.now() - timedelta(seconds=frescor)
+    melhor = None
+    for versao, itens in ler_manifest(base).items():
+        item = itens.get(chave) if isinstance(itens, dict) else None
+        if not item:
+            continue
+        gerado = datetime.fromisoformat(item["gerado_em"])
+        # empate no segundo: o manifest guarda as versões em ordem de gravação
+        if gerado >= limite and (melhor is None or gerado >= melhor[0]):
+            melhor = (gerado, base / item["arquivo"])
+    return melhor[1] if melhor else None
+
+
+def carregar(nome: str, inicio: str, fim: str, versao: str,
+             base: Path | str = ARTEFATOS_DIR, frescor: int | None = None) -> Optional[pd.DataFrame]:
+    """
+    DataFrame do artefato para (nome, período, versão); sem ele, o mais
+    recente do período dentro de `frescor` (padrão FRESCOR); senão None.
+    """
+    base = Path(base)
+    path = _arquivo(base, versao, nome, inicio, fim)
+    if path.exists():
+        return _ler(path)
+    recente = _mais_recente(base, f"{nome}__{inicio}__{fim}", FRESCOR if frescor is None else frescor)
+    if recente is None or not recente.exists():
+        return None
+    logger.info(f"Artefato de outra versão dentro do frescor: {recente}")
+    return _ler(recente)
@@ -0,0 +1,82 @@
+"""
+Pré-cálculo headless das agregações da Produção (sem Streamlit).
+
+Projetos e Financeiro não têm artefato: filtram o snapshot Arrow de
+tblProjetos (snapshots.py) por vendedor/liberador/ambiente/loja a cada
+rerun, o que um agregado por período não cobre, e esse filtro já é barato.
+
+Exemplos:
+    python batch.py                                  # período do Settings.json
+    python batch.py --periodo 2025-01-01:2025-06-30 --periodo 2025-07-01:2025-12-31
+    python batch.py --jobs producao --saida /srv/artefatos
+
+Credenciais: SUPABASE_URL e SUPABASE_KEY/SUPABASE_ANON_KEY (ambiente ou .env).
+"""
+import argparse
+import logging
+import sys
+import time
+from typing import List, Tuple
+
+import artefatos
+from config import create_supabase_client
+from data_version import fetch_data_version
+from Json import Settings
+
+logger = logging.getLogger("batch")
+
+JOBS = ("producao",)
+
+
+def _periodos(args) -> List[Tuple[str, str]]:
+    if args.periodo:
+        out = []
+        for p in args.periodo:
+            inicio, _, fim = p.partition(":")
+            if not inicio or not fim:
+                raise SystemExit(f"Período inválido: {p!r} (use INICIO:FIM)")
+            out.append((inicio, fim))
+        return out
+    s = Settings()
+    return [(s.key('data_inicial'), s.key('data_final'))]
+
+
+def main(argv: List[str] | None = None) -> int:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--periodo", action="append", help="INICIO:FIM (AAAA-MM-DD), pode repetir")
+    parser.add_argument("--jobs", nargs="+", choices=JOBS, default=list(JOBS))
+    parser.add_argument("--saida", default=str(artefatos.ARTEFATOS_DIR), help="diretório dos artefatos")
+    parser.add_argument("-v", "--verbose", action="store_true")
+    args = parser.parse_args(argv)
+
+    logging.basicConfig(level=logging.DEBUG if args.verbose else logging.INFO,
+                        format="[%(asctime)s] %(levelname)s - %(message)s")
+
+    cli = create_supabase_client()
+    versao = fetch_data_version(cli)
+    periodos = _periodos(args)
+
+    service = None
+    if "producao" in args.jobs:
+        import pool
+        from database_media import ProducaoService
+        pool.iniciar()
+        service = ProducaoService()
+
+    for inicio, fim in periodos:
+        t0 = time.perf_counter()
+        if service is not None:
+            _, df_medias, _, _ = service.run_pipeline_incremental(inicio, fim)
+            artefatos.salvar(df_medias, "producao_medias", inicio, fim, versao, args.saida)
+            artefatos.salvar(service.distribuicao_etapas(inicio, fim), "producao_distribuicao",
+                             inicio, fim, versao, args.saida)
+            artefatos.salvar(service.lead_times(inicio, fim), "producao_lead_times",
+                             inicio, fim, versao, args.saida)
+        logger.info(f"Período {inicio}..{fim} concluído em {time.perf_counter() - t0:.2f}s")
+
+    logger.info(f"Artefatos gravados em {args.saida} (versão {versao})")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
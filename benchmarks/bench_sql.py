@@ -0,0 +1,216 @@
+"""
+Benchmark das consultas de Produção num Postgres local, antes e depois
+das migrações (índices + producao_snapshot).
+
+Carrega a base sintética de dados_locais.py, mede cada consulta do
+dashboard (mediana de N execuções), aplica migrations/ com migrar.py,
+mede de novo (SQL original com índices e SQL sobre o snapshot), confere
+que as duas fontes devolvem as mesmas linhas, compara payload e
+decodificação do exec_sql por linhas x exec_sql_colunar e mede o custo
+das escritas com os triggers de manutenção do snapshot.
+
+    python benchmarks/bench_sql.py --dsn postgresql://postgres@localhost/bench
+    python benchmarks/bench_sql.py --ordens 100000 --repeticoes 7
+
+Sem --dsn/BENCH_PG_DSN sobe um Postgres temporário via pgserver
+(pip install pgserver). O banco indicado é APAGADO e recriado
+(tblProjetos/tblProducao/tblAcessorios/snapshot): não aponte para produção.
+"""
+import argparse
+import io
+import logging
+import os
+import statistics
+import sys
+import tempfile
+import time
+from pathlib import Path
+from typing import Dict, List
+
+RAIZ = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(RAIZ))
+sys.path.insert(0, str(Path(__file__).resolve().parent))
+
+import pandas as pd
+
+import dados_locais
+import migrar
+import sql_producao
+import transporte
+from data_version import VERSION_SQL
+
+BASE_SQL = Path(__file__).with_name("sql") / "base.sql"
+
+logger = logging.getLogger("bench_sql")
+
+
+def _bind(sql: str, proj: str) -> str:
+    return sql.replace(":proj", f"'{proj}'").rstrip().rstrip(";")
+
+
+def _carregar(conn, tabelas: Dict[str, pd.DataFrame]) -> None:
+    conn.execute(BASE_SQL.read_text(encoding="utf-8"))
+    for nome, df in tabelas.items():
+        buf = io.StringIO()
+        df.to_csv(buf, index=False, header=False, date_format="%Y-%m-%d %H:%M:%S")
+        cols = ", ".join(f'"{c}"' for c in df.columns)
+        with conn.cursor().copy(f'COPY "{nome}" ({cols}) FROM STDIN WITH (FORMAT csv)') as cp:
+            cp.write(buf.getvalue())
+    conn.commit()
+    conn.execute("ANALYZE")
+    conn.commit()
+
+
+def _medir(conn, sql: str, repeticoes: int) -> Dict[str, float]:
+    tempos, linhas = [], 0
+    for _ in range(repeticoes):
+        t0 = time.perf_counter()
+        linhas = len(conn.execute(sql).fetchall())
+        tempos.append(time.perf_counter() - t0)
+    return {"ms": statistics.median(tempos) * 1000, "linhas": linhas}
+
+
+def _consultas(proj: str, snapshot: bool) -> Dict[str, str]:
+    out = {
+        "painel": _bind(sql_producao.PAINEL_BASE_SQL, proj),
+        "previsao": _bind(sql_producao.PREVISAO_BASE_SQL, proj),
+        "etapas": _bind(sql_producao.ETAPAS_BASE_SQL, proj),
+        "versao": VERSION_SQL,
+    }
+    if snapshot:
+        out["painel (snapshot)"] = _bind(sql_producao.PAINEL_SNAPSHOT_SQL, proj)
+        out["previsao (snapshot)"] = _bind(sql_producao.PREVISAO_SNAPSHOT_SQL, proj)
+    return out
+
+
+def _mesmas_linhas(conn, a: str, b: str) -> bool:
+    ra = sorted(map(repr, conn.execute(a).fetchall()))
+    rb = sorted(map(repr, conn.execute(b).fetchall()))
+    return ra == rb
+
+
+def _snapshot_consistente(conn) -> bool:
+    n = conn.execute(
+        'SELECT count(*) FROM ((SELECT * FROM "vw_producao" EXCEPT ALL SELECT * FROM "producao_snapshot") '
+        'UNION ALL (SELECT * FROM "producao_snapshot" EXCEPT ALL SELECT * FROM "vw_producao")) d'
+    ).fetchone()[0]
+    return n == 0
+
+
+def _escritas(conn, n_ordens: int) -> List[dict]:
+    out = []
+    for n in (1, 100, 1000):
+        n = min(n, n_ordens)
+        t0 = time.perf_counter()
+        conn.execute(
+            'UPDATE "tblProducao" SET "observacoes" = %s WHERE "ordemdecompra" <= %s',
+            (f"bench {n}", n),
+        )
+        conn.commit()
+        out.append({"operacao": f"UPDATE tblProducao ({n} ordens)", "ms": (time.perf_counter() - t0) * 1000})
+    t0 = time.perf_counter()
+    conn.execute('INSERT INTO "tblAcessorios" ("ordemdecompra") VALUES (1), (2), (3)')
+    conn.commit()
+    out.append({"operacao": "INSERT tblAcessorios (3 linhas)", "ms": (time.perf_counter() - t0) * 1000})
+    t0 = time.perf_counter()
+    n = conn.execute('SELECT "rebuild_producao_snapshot"()').fetchone()[0]
+    conn.commit()
+    out.append({"operacao": f"rebuild_producao_snapshot ({n} linhas)", "ms": (time.perf_counter() - t0) * 1000})
+    return out
+
+
+def _transporte(conn, consultas: Dict[str, str], repeticoes: int) -> List[dict]:
+    """
+    Payload e decodificação dos dois caminhos do RPC para cada consulta. O
+    corpo por linhas é montado como o PostgREST devolve SETOF json
+    ([{"exec_sql": {...}}, ...]); o colunar é o retorno de exec_sql_colunar.
+    """
+    out = []
+    for nome, sql in consultas.items():
+        q = sql.replace("'", "''")
+        linhas = conn.execute(
+            f"SELECT coalesce(json_agg(json_build_object('exec_sql', x)), '[]')::text FROM exec_sql('{q}') x"
+        ).fetchone()[0].encode()
+        colunar = conn.execute(f"SELECT exec_sql_colunar('{q}')::text").fetchone()[0].encode()
+        tempos = {}
+        for caminho, payload, decoder in (("linhas", linhas, transporte.decodificar_linhas),
+                                          ("colunar", colunar, transporte.decodificar_colunar)):
+            amostras = []
+            for _ in range(repeticoes):
+                t0 = time.perf_counter()
+                df = decoder(payload)
+                amostras.append(time.perf_counter() - t0)
+            tempos[caminho] = (statistics.median(amostras) * 1000, df)
+        iguais = tempos["linhas"][1].equals(tempos["colunar"][1])
+        out.append({"consulta": nome, "kb_linhas": len(linhas) / 1024, "kb_colunar": len(colunar) / 1024,
+                    "ms_linhas": tempos["linhas"][0], "ms_colunar": tempos["colunar"][0], "iguais": iguais})
+    return out
+
+
+def _servidor_temporario():
+    try:
+        import pgserver
+    except ImportError:
+        raise SystemExit("Informe --dsn/BENCH_PG_DSN ou instale pgserver para um Postgres temporário.")
+    srv = pgserver.get_server(tempfile.mkdtemp(prefix="bench_pg_"), cleanup_mode="stop")
+    return srv, srv.get_uri()
+
+
+def main(argv: List[str] | None = None) -> int:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--dsn", default=os.environ.get("BENCH_PG_DSN"))
+    parser.add_argument("--ordens", type=int, default=50000, help="tamanho da base sintética")
+    parser.add_argument("--repeticoes", type=int, default=5)
+    parser.add_argument("--proj", default=pd.Timestamp.today().date().isoformat(), help="data de projeção")
+    args = parser.parse_args(argv)
+
+    logging.basicConfig(level=logging.INFO, format="[%(asctime)s] %(levelname)s - %(message)s")
+    srv = None
+    dsn = args.dsn
+    if not dsn:
+        srv, dsn = _servidor_temporario()
+
+    with migrar.conectar(dsn) as conn:
+        logger.info(f"Carregando base sintética ({args.ordens} ordens)...")
+        _carregar(conn, dados_locais.gerar_tabelas(args.ordens))
+
+        antes = {k: _medir(conn, q, args.repeticoes) for k, q in _consultas(args.proj, False).items()}
+
+        migrar.aplicar(conn)
+        conn.execute("ANALYZE")
+        conn.commit()
+        consultas = _consultas(args.proj, True)
+        depois = {k: _medir(conn, q, args.repeticoes) for k, q in consultas.items()}
+
+        iguais = {
+            "painel": _mesmas_linhas(conn, consultas["painel"], consultas["painel (snapshot)"]),
+            "previsao": _mesmas_linhas(conn, consultas["previsao"], consultas["previsao (snapshot)"]),
+        }
+        transp = _transporte(conn, {k: consultas[k] for k in ("painel", "previsao", "etapas")}, args.repeticoes)
+        escritas = _escritas(conn, args.ordens)
+        consistente = _snapshot_consistente(conn)
+
+    print(f"\nConsultas ({args.ordens} ordens, mediana de {args.repeticoes}, projeção {args.proj}):")
+    print(f"   {'consulta':<22}{'linhas':>8}{'antes':>11}{'depois':>11}")
+    for nome, d in depois.items():
+        a = antes.get(nome)
+        col_antes = f"{a['ms']:>9.1f}ms" if a else f"{'-':>11}"
+        print(f"   {nome:<22}{d['linhas']:>8}{col_antes}{d['ms']:>9.1f}ms")
+    print("\nTransporte exec_sql (payload / decodificação no cliente):")
+    print(f"   {'consulta':<12}{'linhas KB':>11}{'colunar KB':>12}{'linhas':>11}{'colunar':>11}  mesmo df")
+    for t in transp:
+        print(f"   {t['consulta']:<12}{t['kb_linhas']:>11.0f}{t['kb_colunar']:>12.0f}"
+              f"{t['ms_linhas']:>9.1f}ms{t['ms_colunar']:>9.1f}ms  {t['iguais']}")
+    print("\nEscritas com triggers do snapshot:")
+    for e in escritas:
+        print(f"   {e['operacao']:<42}{e['ms']:>9.1f}ms")
+    print(f"\nSnapshot == base: painel {iguais['painel']}, previsao {iguais['previsao']}; "
+          f"snapshot == vw_producao após escritas: {consistente}")
+
+    if srv is not None:
+        srv.cleanup()
+    return 0 if all(iguais.values()) and consistente and all(t["iguais"] for t in transp) else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,174 @@
+"""
+Stand-in local do Supabase para benchmarks e testes de carga.
+
+Gera tblProjetos / tblProducao / tblAcessorios sintéticas e expõe um
+cliente com a mesma superfície usada pelo app:
+    cli.table(nome).select(cols).gte(...).lte(...).in_(...).eq(...).execute().data
+    cli.rpc("exec_sql" | "exec_sql_colunar", {"q": sql}).execute().data
+O exec_sql roda o SQL no DuckDB (aceita ::date, INTERVAL, GREATEST, EXISTS).
+
+    import dados_locais
+    dados_locais.instalar(n_ordens=2000)   # antes de importar os módulos do app
+"""
+import json
+import threading
+from types import SimpleNamespace
+from typing import Dict, Optional
+
+import duckdb
+import numpy as np
+import pandas as pd
+
+ETAPAS = ["corte", "customizacao", "coladeira", "usinagem", "montagem", "paineis", "embalagem"]
+
+
+def gerar_tabelas(n_ordens: int = 2000, seed: int = 42, hoje: Optional[pd.Timestamp] = None) -> Dict[str, pd.DataFrame]:
+    rng = np.random.default_rng(seed)
+    hoje = pd.Timestamp(hoje or pd.Timestamp.today().normalize())
+    oc = np.arange(1, n_ordens + 1)
+
+    contrato = hoje - pd.to_timedelta(rng.integers(20, 540, n_ordens), unit="D")
+    assinatura = contrato + pd.to_timedelta(rng.integers(1, 15, n_ordens), unit="D")
+    chegou = assinatura + pd.to_timedelta(rng.integers(1, 20, n_ordens), unit="D")
+    entrega_prev = chegou + pd.to_timedelta(rng.integers(15, 60, n_ordens), unit="D")
+
+    # etapas em sequência; ordens recentes ficam no meio do fluxo
+    prod = {"ordemdecompra": oc}
+    cursor = pd.Series(chegou + pd.to_timedelta(rng.integers(0, 5, n_ordens), unit="D") + pd.Timedelta(hours=8))
+    vivo = np.ones(n_ordens, dtype=bool)
+    for etapa in ETAPAS:
+        dur = pd.to_timedelta(rng.gamma(2.0, 3.0, n_ordens) * 60, unit="min").round("min")
+        ini = cursor.where(vivo & (cursor < hoje))
+        fim = (ini + dur).where(ini + dur < hoje)
+        prod[f"{etapa}inicio"] = ini
+        prod[f"{etapa}fim"] = fim
+        vivo = fim.notna().to_numpy()
+        cursor = fim + pd.to_timedelta(rng.integers(0, 48, n_ordens), unit="h")
+    prod["separacao"] = pd.Series(prod["embalagemfim"]).where(rng.random(n_ordens) < 0.8)
+    prod["observacoes"] = np.where(rng.random(n_ordens) < 0.1, "ver acessórios", None)
+    df_prod = pd.DataFrame(prod)
+
+    iniciado = df_prod["corteinicio"]
+    pronto = df_prod["embalagemfim"]
+    entregue = pronto + pd.to_timedelta(rng.integers(1, 10, n_ordens), unit="D")
+    entregue = entregue.where(entregue < hoje)
+
+    bruto = np.round(rng.lognormal(9.5, 0.6, n_ordens), 2)
+    df_proj = pd.DataFrame({
+        "ordemdecompra": oc,
+        "pedido": rng.integers(1000, 9999, n_ordens),
+        "etapa": rng.choice(["PRODUCAO", "PROJETO"], n_ordens),
+        "codcc": rng.integers(100, 999, n_ordens).astype(float),
+        "cliente": rng.choice([f"CLIENTE {i:03d}" for i in range(max(n_ordens // 4, 1))], n_ordens),
+        "contrato": rng.integers(10000, 99999, n_ordens).astype(float),
+        "ambiente": rng.choice(["COZINHA", "DORMITORIO", "BANHEIRO", "SALA", "ESCRITORIO"], n_ordens),
+        "tipoambiente": rng.choice(["COZINHA", "DORMITORIO", "BANHEIRO", "SALA", "ESCRITORIO"], n_ordens),
+        "vendedor": rng.choice(["ANA", "BRUNO", "CARLA", "DIEGO", "ELISA"], n_ordens),
+        "liberador": rng.choice(["FABIO", "GISELE", "HUGO"], n_ordens),
+        "loja": rng.choice(["CENTRO", "SHOPPING", "ONLINE"], n_ordens),
+        "tipocontrato": rng.choice(["NORMAL", "REPOSICAO"], n_ordens, p=[0.9, 0.1]),
+        "valorbruto": bruto,
+        "valornegociado": np.round(bruto * rng.uniform(0.8, 1.0, n_ordens), 2),
+        "datacontrato": contrato,
+        "dataassinatura": assinatura,
+        "chegoufabrica": chegou,
+        "dataentrega": entrega_prev,
+        "previsao": entrega_prev - pd.to_timedelta(rng.integers(0, 5, n_ordens), unit="D"),
+        "iniciado": iniciado,
+        "pronto": pronto,
+        "entrega": entregue,
+        "urgente": rng.random(n_ordens) < 0.05,
+        "pendencia": rng.random(n_ordens) < 0.03,
+    })
+    df_acess = pd.DataFrame({"ordemdecompra": oc[rng.random(n_ordens) < 0.3]})
+    return {"tblProjetos": df_proj, "tblProducao": df_prod, "tblAcessorios": df_acess}
+
+
+def _records(df: pd.DataFrame) -> list:
+    # mesmo formato do PostgREST: datas como string ISO, nulos como None
+    return json.loads(df.to_json(orient="records", date_format="iso", date_unit="s"))
+
+
+class _Query:
+    def __init__(self, df: pd.DataFrame) -> None:
+        self._df = df
+        self._cols: Optional[list] = None
+
+    def select(self, cols: str = "*") -> "_Query":
+        self._cols = None if cols.strip() == "*" else [c.strip() for c in cols.split(",")]
+        return self
+
+    def _filtro(self, col, op, valor) -> "_Query":
+        serie = self._df[col]
+        if pd.api.types.is_datetime64_any_dtype(serie):
+            valor = pd.Timestamp(valor)
+        self._df = self._df[op(serie, valor)]
+        return self
+
+    def gte(self, col, valor):
+        return self._filtro(col, lambda s, v: s >= v, valor)
+
+    def lte(self, col, valor):
+        return self._filtro(col, lambda s, v: s <= v, valor)
+
+    def eq(self, col, valor):
+        return self._filtro(col, lambda s, v: s == v, valor)
+
+    def in_(self, col, valores):
+        self._df = self._df[self._df[col].isin(list(valores))]
+        return self
+
+    def execute(self):
+        df = self._df if self._cols is None else self._df[self._cols]
+        return SimpleNamespace(data=_records(df))
+
+
+class LocalClient:
+    def __init__(self, tabelas: Dict[str, pd.DataFrame]) -> None:
+        self.tabelas = tabelas
+        self._con = duckdb.connect()
+        for nome, df in tabelas.items():
+            # tabela de verdade (não register): cursores enxergam o catálogo
+            self._con.register("_tmp", df)
+            self._con.execute(f'CREATE TABLE "{nome}" AS SELECT * FROM _tmp')
+            self._con.unregister("_tmp")
+        self._lock = threading.Lock()
+        self.chamadas = {"table": 0, "rpc": 0}
+
+    def table(self, nome: str) -> _Query:
+        self.chamadas["table"] += 1
+        return _Query(self.tabelas[nome])
+
+    def rpc(self, fn: str, params: dict):
+        if fn not in ("exec_sql", "exec_sql_colunar"):
+            raise NotImplementedError(fn)
+        self.chamadas["rpc"] += 1
+        cli = self
+
+        class _Rpc:
+            def execute(self_inner):
+                with cli._lock:
+                    df = cli._con.cursor().execute(params["q"]).df()
+                if fn == "exec_sql":
+                    return SimpleNamespace(data=[{"exec_sql": r} for r in _records(df)])
+                # mesmo formato de migrations/0003_exec_sql_colunar.sql
+                dados = json.loads(df.to_json(orient="split", index=False, date_format="iso", date_unit="s"))
+                return SimpleNamespace(data={"colunas": dados["columns"], "linhas": len(df),
+                                             "dados": [list(c) for c in zip(*dados["data"])] or
+                                                      [[] for _ in dados["columns"]]})
+        return _Rpc()
+
+
+_cliente: Optional[LocalClient] = None
+
+
+def instalar(n_ordens: int = 2000, seed: int = 42) -> LocalClient:
+    """
+    Substitui supabase.create_client pelo cliente local (chame antes de
+    importar os módulos do app) e devolve o cliente.
+    """
+    global _cliente
+    import supabase
+    _cliente = LocalClient(gerar_tabelas(n_ordens, seed))
+    supabase.create_client = lambda *a, **k: _cliente
+    return _cliente
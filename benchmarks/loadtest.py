@@ -0,0 +1,258 @@
+"""
+Teste de carga do dashboard com sessões simultâneas (streamlit AppTest).
+
+Cada sessão é um AppTest próprio sobre novo.py rodando numa thread; todas
+compartilham o processo (e portanto os caches st.cache_*, snapshots e o
+pool), como no servidor real. O Supabase é trocado pelo stand-in local
+de dados_locais.py, então o número mede o app, não a rede.
+
+Roteiro por sessão: abre Projetos, Produção e Financeiro e, em cada
+página, troca filtros da sidebar e reenvia o formulário. Mede a latência
+de cada rerun por página, a vazão total e a memória residente, subindo o
+número de sessões (ex.: 1, 2, 4, 8).
+
+    python benchmarks/loadtest.py
+    python benchmarks/loadtest.py --sessoes 1 4 16 --iteracoes 5 --ordens 20000
+    python benchmarks/loadtest.py --orcamento-p95 3.0 --orcamento-rss 1500
+
+Sai com código 1 se algum orçamento (p95 por página, RSS) for estourado.
+"""
+import argparse
+import logging
+import os
+import random
+import sys
+import threading
+import time
+from collections import defaultdict
+from pathlib import Path
+from typing import Dict, List
+
+import numpy as np
+
+RAIZ = Path(__file__).resolve().parent.parent
+APP = RAIZ / "novo.py"
+PAGINAS = ("Projetos", "Produção", "Financeiro")
+
+logger = logging.getLogger("loadtest")
+
+
+def _preparar(n_ordens: int) -> None:
+    """Cliente local no lugar do Supabase e menu lateral controlado pelo session_state."""
+    sys.path.insert(0, str(RAIZ))
+    sys.path.insert(0, str(Path(__file__).resolve().parent))
+    os.chdir(RAIZ)  # Settings.json, GD.png e .cache/ são relativos à raiz
+    # bytes por consulta (relatório de I/O) e painéis de diagnóstico no rerun
+    os.environ.setdefault("DASH_DEBUG", "1")
+
+    import dados_locais
+    dados_locais.instalar(n_ordens=n_ordens)
+
+    import streamlit as st
+    import streamlit_option_menu
+
+    def option_menu(menu_title, options, *args, **kwargs):
+        return st.session_state.get("_pagina", options[0])
+
+    streamlit_option_menu.option_menu = option_menu
+
+    # O AppTest troca st.secrets e Runtime._instance globalmente a cada run
+    # (e zera no fim), o que quebra sessões em paralelo. Fixo um runtime
+    # simulado e os secrets uma vez para o processo inteiro.
+    from unittest.mock import MagicMock
+    from streamlit.runtime import Runtime
+    from streamlit.runtime.caching.storage.dummy_cache_storage import MemoryCacheStorageManager
+    from streamlit.runtime.media_file_manager import MediaFileManager
+    from streamlit.runtime.memory_media_file_storage import MemoryMediaFileStorage
+    from streamlit.runtime.secrets import Secrets
+
+    runtime = MagicMock(spec=Runtime)
+    runtime.media_file_mgr = MediaFileManager(MemoryMediaFileStorage("/mock/media"))
+    runtime.cache_storage_manager = MemoryCacheStorageManager()
+    Runtime.instance = classmethod(lambda cls: runtime)
+    Runtime.exists = classmethod(lambda cls: True)
+
+    secrets = Secrets()
+    secrets._secrets = {"supabase": {"url": "http://local", "key": "local", "anon_key": "local"}}
+    st.secrets = secrets
+
+
+def _nova_sessao(timeout: float):
+    from streamlit.testing.v1 import AppTest
+    return AppTest.from_file(str(APP), default_timeout=timeout)
+
+
+def _mexer_filtros(at, rng: random.Random) -> None:
+    """
+    Troca aba/modo (radios da página, se houver) ou escolhe um valor
+    aleatório (ou nenhum) num selectbox da sidebar e reenvia o formulário.
+    """
+    radios = [r for r in at.main.radio if len(r.options) > 1]
+    if radios and rng.random() < 0.5:
+        radio = rng.choice(radios)
+        radio.set_value(rng.choice(radio.options))
+        return
+    caixas = [s for s in at.sidebar.selectbox if s.options]
+    if caixas:
+        caixa = rng.choice(caixas)
+        caixa.select(rng.choice([None] + list(caixa.options)))
+    botoes = [b for b in at.sidebar.button if b.label == "Filtrar"]
+    if botoes:
+        botoes[0].click()
+
+
+def _sessao(idx: int, iteracoes: int, timeout: float, latencias: Dict[str, List[float]],
+            erros: List[str], lock: threading.Lock) -> None:
+    rng = random.Random(idx)
+    at = _nova_sessao(timeout)
+    # cada sessão começa numa página diferente, como usuários reais
+    paginas = PAGINAS[idx % len(PAGINAS):] + PAGINAS[:idx % len(PAGINAS)]
+    for it in range(iteracoes):
+        for pagina in paginas:
+            for passo in range(2):  # 0: abre a página, 1: troca filtro
+                if passo == 0:
+                    at.session_state["_pagina"] = pagina
+                else:
+                    _mexer_filtros(at, rng)
+                t0 = time.perf_counter()
+                try:
+                    at.run()
+                except Exception as e:  # timeout do AppTest, etc.
+                    with lock:
+                        erros.append(f"sessão {idx} {pagina}: {e!r}")
+                    continue
+                dt = time.perf_counter() - t0
+                if at.exception:
+                    with lock:
+                        erros.append(f"sessão {idx} {pagina}: {at.exception[0].value}")
+                with lock:
+                    latencias[pagina].append(dt)
+
+
+def rodada(n_sessoes: int, iteracoes: int, timeout: float) -> dict:
+    from snapshots import rss_mb
+
+    latencias: Dict[str, List[float]] = defaultdict(list)
+    erros: List[str] = []
+    lock = threading.Lock()
+    threads = [
+        threading.Thread(target=_sessao, args=(i, iteracoes, timeout, latencias, erros, lock), daemon=True)
+        for i in range(n_sessoes)
+    ]
+    t0 = time.perf_counter()
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    total = time.perf_counter() - t0
+
+    paginas = {}
+    for pagina, valores in latencias.items():
+        p50, p95, p99 = np.percentile(valores, [50, 95, 99])
+        paginas[pagina] = {"n": len(valores), "p50": p50, "p95": p95, "p99": p99}
+    n_reruns = sum(len(v) for v in latencias.values())
+    return {
+        "sessoes": n_sessoes,
+        "reruns": n_reruns,
+        "duracao_s": total,
+        "vazao_rps": n_reruns / total if total else 0.0,
+        "rss_mb": rss_mb(),
+        "paginas": paginas,
+        "erros": erros,
+    }
+
+
+def _imprimir(r: dict) -> None:
+    print(f"\n== {r['sessoes']} sessão(ões): {r['reruns']} reruns em {r['duracao_s']:.1f}s "
+          f"({r['vazao_rps']:.2f} reruns/s), RSS {r['rss_mb']:.0f} MB")
+    print(f"   {'página':<12}{'n':>5}{'p50':>9}{'p95':>9}{'p99':>9}")
+    for pagina in PAGINAS:
+        p = r["paginas"].get(pagina)
+        if p:
+            print(f"   {pagina:<12}{p['n']:>5}{p['p50']:>8.2f}s{p['p95']:>8.2f}s{p['p99']:>8.2f}s")
+    for e in r["erros"][:5]:
+        print(f"   ERRO {e}")
+    if len(r["erros"]) > 5:
+        print(f"   ... +{len(r['erros']) - 5} erros")
+
+
+def _violacoes(r: dict, orcamento_p95: float, orcamento_rss: float) -> List[str]:
+    out = []
+    for pagina, p in r["paginas"].items():
+        if p["p95"] > orcamento_p95:
+            out.append(f"{r['sessoes']} sessões: p95 de {pagina} {p['p95']:.2f}s > {orcamento_p95:.2f}s")
+    if r["rss_mb"] > orcamento_rss:
+        out.append(f"{r['sessoes']} sessões: RSS {r['rss_mb']:.0f} MB > {orcamento_rss:.0f} MB")
+    if r["erros"]:
+        out.append(f"{r['sessoes']} sessões: {len(r['erros'])} reruns com erro")
+    return out
+
+
+def main(argv: List[str] | None = None) -> int:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--sessoes", nargs="+", type=int, default=[1, 2, 4, 8])
+    parser.add_argument("--iteracoes", type=int, default=3, help="voltas pelas 3 páginas por sessão")
+    parser.add_argument("--ordens", type=int, default=2000, help="tamanho da base sintética")
+    parser.add_argument("--timeout", type=float, default=120.0, help="timeout de cada rerun (s)")
+    parser.add_argument("--orcamento-p95", type=float, default=5.0, help="p95 máximo por página (s)")
+    parser.add_argument("--orcamento-rss", type=float, default=2048.0, help="RSS máximo do processo (MB)")
+    parser.add_argument("--frio", action="store_true",
+                        help="sem aquecimento: a primeira rodada pega caches vazios (efeito manada)")
+    parser.add_argument("-v", "--verbose", action="store_true")
+    args = parser.parse_args(argv)
+
+    logging.basicConfig(level=logging.INFO if args.verbose else logging.WARNING,
+                        format="[%(asctime)s] %(levelname)s - %(message)s")
+    if not args.verbose:
+        # AppTest roda o script fora do servidor: avisos de "bare mode" são ruído
+        import streamlit.logger
+        streamlit.logger.set_log_level("error")
+        logging.getLogger("streamlit.runtime.scriptrunner_utils.script_run_context").disabled = True
+    _preparar(args.ordens)
+    import pool
+    pool.iniciar()
+
+    # aquecimento: primeira carga (snapshots, caches) fora da medição
+    if not args.frio:
+        _sessao(-1, 1, args.timeout, defaultdict(list), [], threading.Lock())
+
+    violacoes = []
+    try:
+        for n in args.sessoes:
+            r = rodada(n, args.iteracoes, args.timeout)
+            _imprimir(r)
+            violacoes += _violacoes(r, args.orcamento_p95, args.orcamento_rss)
+    finally:
+        import pool
+        pool.shutdown()
+
+    import singleflight
+    print("\nSingle-flight (execuções / coalescidas):")
+    for op, m in singleflight.metricas().items():
+        print(f"   {op:<14}{m['execucoes']:>6.0f}{m['coalescidas']:>6.0f}")
+
+    import aquecimento
+    m = aquecimento.metricas()
+    print(f"\nInicialização: primeiro render {m.get('primeiro_render_s', '-')}s desde o início "
+          f"(rerun {m.get('primeiro_rerun_s', '-')}s)")
+    print("   imports: " + ", ".join(f"{k} {v:.2f}s" for k, v in m["imports_s"].items()))
+    print("   aquecimento: " + ", ".join(f"{k} {e['s']:.2f}s{'' if e['ok'] else ' (falhou)'}"
+                                       for k, e in m["etapas"].items()))
+
+    import registro_io
+    print("\nI/O por consulta (chamadas / rede / MB / ms na rede):")
+    for ident, m in sorted(registro_io.totais().items()):
+        print(f"   {ident:<22}{m['chamadas']:>6.0f}{m['misses']:>6.0f}"
+              f"{m['bytes'] / 1e6:>9.1f}{m['latencia_ms']:>10.0f}")
+
+    if violacoes:
+        print("\nORÇAMENTO ESTOURADO:")
+        for v in violacoes:
+            print(f"  - {v}")
+        return 1
+    print("\nDentro do orçamento.")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,61 @@
+-- Esquema mínimo das tabelas base (as colunas que o dashboard usa),
+-- para o benchmark de SQL num Postgres local. Em produção as tabelas já
+-- existem no Supabase; migrations/ só cria índices, view e snapshot.
+
+DROP TABLE IF EXISTS "tblAcessorios", "tblProducao", "tblProjetos" CASCADE;
+
+CREATE TABLE "tblProjetos" (
+  "ordemdecompra"  bigint PRIMARY KEY,
+  "pedido"         bigint,
+  "etapa"          text,
+  "codcc"          numeric,
+  "cliente"        text,
+  "contrato"       numeric,
+  "ambiente"       text,
+  "tipoambiente"   text,
+  "vendedor"       text,
+  "liberador"      text,
+  "loja"           text,
+  "tipocontrato"   text,
+  "valorbruto"     numeric,
+  "valornegociado" numeric,
+  "datacontrato"   timestamp,
+  "dataassinatura" timestamp,
+  "chegoufabrica"  timestamp,
+  "dataentrega"    timestamp,
+  "previsao"       timestamp,
+  "iniciado"       timestamp,
+  "pronto"         timestamp,
+  "entrega"        timestamp,
+  "urgente"        boolean,
+  "pendencia"      boolean
+);
+
+CREATE TABLE "tblProducao" (
+  "id"                 bigserial PRIMARY KEY,
+  "ordemdecompra"      bigint,
+  "corteinicio"        timestamp, "cortefim"        timestamp,
+  "customizacaoinicio" timestamp, "customizacaofim" timestamp,
+  "coladeirainicio"    timestamp, "coladeirafim"    timestamp,
+  "usinageminicio"     timestamp, "usinagemfim"     timestamp,
+  "montageminicio"     timestamp, "montagemfim"     timestamp,
+  "paineisinicio"      timestamp, "paineisfim"      timestamp,
+  "embalageminicio"    timestamp, "embalagemfim"    timestamp,
+  "separacao"          timestamp,
+  "observacoes"        text
+);
+
+CREATE TABLE "tblAcessorios" (
+  "id"            bigserial PRIMARY KEY,
+  "ordemdecompra" bigint
+);
+
+-- stand-in do exec_sql do Supabase (uma linha JSON por registro)
+CREATE OR REPLACE FUNCTION "exec_sql"(q text)
+RETURNS SETOF json
+LANGUAGE plpgsql
+STABLE AS $$
+BEGIN
+  RETURN QUERY EXECUTE format('SELECT row_to_json(t) FROM (%s) t', q);
+END;
+$$;
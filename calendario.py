@@ -0,0 +1,100 @@
+from typing import Iterable
+
+import numpy as np
+import pandas as pd
+
+# -------------------------------------------------------------------
+# CALENDÁRIO DE TRABALHO VETORIZADO
+# -------------------------------------------------------------------
+# Mesmo expediente do Generator (07:30-16:30, seg-sex), mas em NumPy:
+# cada instante vira "segundos úteis desde uma segunda-feira de
+# referência". Somar horas úteis ou medir duração trabalhada passa a
+# ser aritmética simples sobre vetores, sem loops dia a dia.
+
+_EPOCA = np.datetime64("1970-01-05", "D")  # segunda-feira
+
+
+class WorkCalendar:
+    def __init__(
+        self,
+        work_start_h: int = 7, work_start_m: int = 30,
+        work_end_h: int = 16, work_end_m: int = 30,
+        workdays: Iterable[int] = (0, 1, 2, 3, 4),  # 0=Mon ... 6=Sun
+    ) -> None:
+        self.inicio_s = work_start_h * 3600 + work_start_m * 60
+        self.fim_s = work_end_h * 3600 + work_end_m * 60
+        self.dia_s = self.fim_s - self.inicio_s
+        self.workdays = sorted(set(workdays))
+        mask = np.zeros(7, dtype=bool)
+        mask[self.workdays] = True
+        self._util = mask
+        # dias úteis ANTES de cada dia da semana (dentro da semana)
+        self._antes = np.concatenate([[0], np.cumsum(mask)[:-1]])
+        self._por_semana = int(mask.sum())
+        # k-ésimo dia útil da semana -> dia da semana
+        self._dia_k = np.flatnonzero(mask)
+
+    # --- datetime64 <-> segundos úteis ---
+    def to_business_seconds(self, valores) -> np.ndarray:
+        """
+        Segundos úteis desde a época. NaT vira NaN. Instantes fora do
+        expediente colam no limite mais próximo (antes do início -> início,
+        depois do fim / fim de semana -> fim do último dia útil).
+        """
+        ts = pd.DatetimeIndex(pd.to_datetime(np.asarray(valores).ravel(), errors="coerce"))
+        nat = ts.isna()
+        ns = ts.to_numpy(dtype="datetime64[ns]")
+        dias = (ns.astype("datetime64[D]") - _EPOCA).astype("int64")
+        dias[nat] = 0
+        semanas, dow = np.divmod(dias, 7)
+        seg_dia = (ns - ns.astype("datetime64[D]")).astype("timedelta64[s]").astype("int64")
+        seg_dia[nat] = 0
+        no_dia = np.clip(seg_dia - self.inicio_s, 0, self.dia_s)
+        no_dia = np.where(self._util[dow], no_dia, 0)
+        uteis = semanas * self._por_semana + self._antes[dow]
+        out = (uteis * self.dia_s + no_dia).astype("float64")
+        out[nat] = np.nan
+        return out.reshape(np.shape(valores)) if np.ndim(valores) > 1 else out
+
+    def from_business_seconds(self, segundos) -> np.ndarray:
+        """
+        Inverso de to_business_seconds. Como no Generator, terminar
+        exatamente no fim do expediente fica às 16:30 do mesmo dia
+        (e não às 07:30 do próximo).
+        """
+        s = np.asarray(segundos, dtype="float64")
+        nan = np.isnan(s)
+        s0 = np.where(nan, 0.0, s)
+        k = np.ceil(s0 / self.dia_s).astype("int64") - 1
+        k = np.maximum(k, 0)
+        resto = s0 - k * self.dia_s
+        semanas, j = np.divmod(k, self._por_semana)
+        dias = semanas * 7 + self._dia_k[j]
+        base = _EPOCA + dias.astype("timedelta64[D]")
+        out = base.astype("datetime64[s]") + (self.inicio_s + np.rint(resto).astype("int64")).astype("timedelta64[s]")
+        out = out.astype("datetime64[ns]")
+        out[nan] = np.datetime64("NaT")
+        return out
+
+    # --- operações de alto nível ---
+    def add_business_hours(self, inicio, horas) -> np.ndarray:
+        return self.from_business_seconds(self.to_business_seconds(inicio) + np.asarray(horas, dtype="float64") * 3600)
+
+    def worked_hours(self, inicio, fim) -> np.ndarray:
+        """
+        Horas trabalhadas entre inicio e fim, equivalente vetorizado de
+        ProducaoService.calcular_duracao_trabalhada: início ou fim em
+        fim de semana (ou ausente) dá 0, e nunca negativo.
+        """
+        ini = pd.DatetimeIndex(pd.to_datetime(np.asarray(inicio), errors="coerce"))
+        fi = pd.DatetimeIndex(pd.to_datetime(np.asarray(fim), errors="coerce"))
+        horas = (self.to_business_seconds(fi) - self.to_business_seconds(ini)) / 3600
+        valido = (
+            ini.notna() & fi.notna()
+            & self._util[np.asarray(ini.dayofweek.fillna(0), dtype="int64")]
+            & self._util[np.asarray(fi.dayofweek.fillna(0), dtype="int64")]
+        )
+        return np.where(valido, np.maximum(np.nan_to_num(horas), 0.0), 0.0)
+
+
+DEFAULT_CALENDAR = WorkCalendar()
@@ -0,0 +1,65 @@
+import os
+from pathlib import Path
+from typing import Tuple
+
+from supabase import Client, create_client
+
+# -------------------------------------------------------------------
+# CONFIGURAÇÃO (st.secrets OU variáveis de ambiente / .env)
+# -------------------------------------------------------------------
+# Dentro do Streamlit vale st.secrets['supabase'] (url + key/anon_key/
+# service_role_key). Fora dele (cron, CLI) lê SUPABASE_URL e
+# SUPABASE_KEY / SUPABASE_ANON_KEY / SUPABASE_SERVICE_ROLE_KEY do
+# ambiente, carregando antes o .env do projeto se existir.
+
+ENV_FILE = Path(__file__).with_name(".env")
+
+
+def load_env_file(path: Path | str = ENV_FILE) -> None:
+    """Carrega KEY=VALUE do .env sem sobrescrever o que já está no ambiente."""
+    path = Path(path)
+    if not path.exists():
+        return
+    for linha in path.read_text(encoding="utf-8").splitlines():
+        linha = linha.strip()
+        if not linha or linha.startswith("#") or "=" not in linha:
+            continue
+        chave, valor = linha.split("=", 1)
+        os.environ.setdefault(chave.strip(), valor.strip().strip('"').strip("'"))
+
+
+def _from_secrets() -> Tuple[str | None, str | None]:
+    try:
+        import streamlit as st
+        sb = st.secrets.get("supabase", {})
+    except Exception:
+        return None, None
+    key = sb.get("service_role_key") or sb.get("anon_key") or sb.get("key")
+    return sb.get("url"), key
+
+
+def _from_env() -> Tuple[str | None, str | None]:
+    load_env_file()
+    key = (
+        os.environ.get("SUPABASE_SERVICE_ROLE_KEY")
+        or os.environ.get("SUPABASE_KEY")
+        or os.environ.get("SUPABASE_ANON_KEY")
+    )
+    return os.environ.get("SUPABASE_URL"), key
+
+
+def supabase_credentials() -> Tuple[str, str]:
+    url, key = _from_secrets()
+    if not url or not key:
+        url, key = _from_env()
+    if not url or not key:
+        raise RuntimeError(
+            "Configure st.secrets['supabase'] (url/key) ou SUPABASE_URL e "
+            "SUPABASE_KEY/SUPABASE_ANON_KEY no ambiente (.env)."
+        )
+    return url, key
+
+
+def create_supabase_client() -> Client:
+    url, key = supabase_credentials()
+    return create_client(url, key)
@@ -1,9 +1,14 @@
+import threading
 import pandas as pd
 import streamlit as st
 from graphics import Graph, detect_theme_mode
-from Json import Settings
-from babel.numbers import format_currency
+from Json import Settings, perfil_da_sessao
 from supabase import create_client, Client
+from snapshots import Snapshot, publicar
+import formatacao
+import registro_io
+import singleflight
+from kpis_financeiros import CuboFinanceiro, KPIsFinanceiros, DIMENSOES, variacao
 
 def database(db_file=None, password=None) -> pd.DataFrame:
     """
@@ -21,7 +26,8 @@ def database(db_file=None, password=None) -> pd.DataFrame:
     cli: Client = create_client(url, key)
 
     # Ajuste as colunas se quiser otimizar tráfego (aqui traz todas para manter compatibilidade)
-    res = cli.table("tblProjetos").select("*").execute()
+    # Projetos e Financeiro abrindo juntos: uma leitura só da tabela inteira
+    res = singleflight.executar("tblProjetos", url, lambda: registro_io.select(cli.table("tblProjetos").select("*"), "tblProjetos"))
     df = pd.DataFrame(res.data or [])
 
     # Normalizações mínimas para compatibilidade com o restante do código
@@ -36,34 +42,57 @@ def database(db_file=None, password=None) -> pd.DataFrame:
 
     return df
 
-df = database()
+def carregar_base() -> Snapshot:
+    """
+    Deriva as colunas usadas pelos filtros UMA vez, na carga, e publica a
+    base como snapshot imutável. Antes, filtrar_por_data convertia
+    'pronto' e criava 'MesAno' no df global a cada chamada, de todas as
+    sessões ao mesmo tempo.
+    """
+    df = database()
+    df['valornegociado'] = pd.to_numeric(df['valornegociado'], errors='coerce')
+    df['pronto'] = pd.to_datetime(df['pronto'], errors='coerce')
+    df['MesAno'] = df['pronto'].dt.strftime('%Y-%m')
+    return publicar('tblProjetos_financeiro', df)
 
-df['valornegociado'] = pd.to_numeric(df['valornegociado'], errors='coerce')
+_base: Snapshot | None = None
+_base_lock = threading.Lock()
 
-def filtrar_por_data(df: pd.DataFrame, data_inicio, data_fim, vendedor = None, liberador = None, ambiente = None, loja = None) -> pd.DataFrame:
+
+def base() -> Snapshot:
+    """
+    Snapshot da base, carregado na primeira chamada (no aquecimento do
+    servidor ou no primeiro rerun), não no import do módulo.
     """
-    Filtra o DataFrame com base no intervalo de datas fornecido.
+    global _base
+    with _base_lock:
+        if _base is None:
+            _base = carregar_base()
+        return _base
+
+@st.cache_resource(show_spinner=False)
+def kpis_mensais(snapshot_path: str) -> KPIsFinanceiros:
+    """
+    Cubo mensal sincronizado com o snapshot atual (o caminho leva o hash do
+    conteúdo, então muda quando a base muda); só meses alterados são
+    reagregados.
+    """
+    cubo = CuboFinanceiro()
+    cubo.atualizar(base().filtrar(colunas=['pronto', 'valornegociado', 'valorbruto', *DIMENSOES]))
+    return KPIsFinanceiros(cubo.cubo)
+
+def filtrar_por_data(df: Snapshot, data_inicio, data_fim, vendedor = None, liberador = None, ambiente = None, loja = None) -> pd.DataFrame:
+    """
+    Filtra o snapshot com base no intervalo de datas fornecido.
     """
     criterio = 'pronto'
     # criterio = 'DataEntrega'
 
-    df[criterio] = pd.to_datetime(df[criterio], errors='coerce')
-    df['MesAno'] = df[criterio].dt.strftime('%Y-%m')
-
-    df_filtrado = df[(df[criterio] >= data_inicio) & (df[criterio] <= data_fim)]
-
-    if vendedor is not None:
-        df_filtrado = df_filtrado[df_filtrado['vendedor'] == vendedor]
-    if liberador is not None:
-        df_filtrado = df_filtrado[df_filtrado['liberador'] == liberador]
-    if ambiente is not None:
-        df_filtrado = df_filtrado[df_filtrado['tipoambiente'] == ambiente]
-    if loja is not None:
-        df_filtrado = df_filtrado[df_filtrado['loja'] == loja]
-    return df_filtrado
+    return df.filtrar(criterio, data_inicio, data_fim,
+                      vendedor=vendedor, liberador=liberador, tipoambiente=ambiente, loja=loja)
 
 def loading_json():
-    s = Settings()
+    s = Settings(perfil=perfil_da_sessao())
     data_inicial = s.key('data_inicial')
     data_final = s.key('data_final')
     cor_ambiente = s.key('cor_ambiente')
@@ -73,13 +102,15 @@ def loading_json():
     return data_inicial, data_final, cor_ambiente, cor_vendedor, cor_liberador, cor_periodo
 
 def update_json(data_inicio, data_fim, color1, color2, color3, color4):
-    s = Settings()
-    s.update_json('data_inicial', data_inicio)
-    s.update_json('data_final', data_fim)
-    s.update_json('cor_ambiente', color1)
-    s.update_json('cor_vendedor', color2)
-    s.update_json('cor_liberador', color3)
-    s.update_json('cor_periodo', color4)
+    s = Settings(perfil=perfil_da_sessao())
+    s.update({
+        'data_inicial': data_inicio,
+        'data_final': data_fim,
+        'cor_ambiente': color1,
+        'cor_vendedor': color2,
+        'cor_liberador': color3,
+        'cor_periodo': color4,
+    })
 
 
 def metrica(message, list_itens):
@@ -91,6 +122,32 @@ def metrica(message, list_itens):
             st.write(f"{i+1} - {ambiente}")
     st.write('')
 
+def metricas_mensais(data_inicio, data_fim, vendedor, liberador, ambiente, loja):
+    kpis = kpis_mensais(str(base().path))
+    r = kpis.comparar(data_inicio, data_fim, vendedor=vendedor, liberador=liberador,
+                      tipoambiente=ambiente, loja=loja)
+    atual, anterior, ano = r['atual'], r['anterior'], r['ano_anterior']
+
+    st.write(f"**Indicadores mensais** ({atual['meses'][0]} a {atual['meses'][1]} vs "
+             f"{anterior['meses'][0]} a {anterior['meses'][1]})")
+    itens = [
+        ('Faturamento', 'valornegociado', True, 'normal'),
+        ('Valor Bruto', 'valorbruto', True, 'normal'),
+        ('Desconto', 'desconto', True, 'inverse'),
+        ('Pedidos', 'pedidos', False, 'normal'),
+        ('Ticket Médio', 'ticket_medio', True, 'normal'),
+    ]
+    # valores em moeda formatados de uma vez
+    em_moeda = [chave for _, chave, moeda, _ in itens if moeda]
+    textos = dict(zip(em_moeda, formatacao.moeda([atual[c] for c in em_moeda])))
+    for coluna, (rotulo, chave, moeda, cor) in zip(st.columns(len(itens)), itens):
+        with coluna:
+            valor = textos[chave] if moeda else f"{atual[chave]:.0f}"
+            delta = variacao(atual[chave], anterior[chave])
+            st.metric(rotulo, valor, None if delta is None else f"{delta:+.1f}%", delta_color=cor)
+            aa = variacao(atual[chave], ano[chave])
+            st.caption("Ano anterior: " + ("sem base" if aa is None else f"{aa:+.1f}%"))
+
 def create_sidebar(data_inicial, data_final, cor_ambiente, cor_vendedor, cor_liberador, cor_periodo):
 
     with st.sidebar:
@@ -116,7 +173,7 @@ def create_sidebar(data_inicial, data_final, cor_ambiente, cor_vendedor, cor_lib
             with c2:
                 data_fim = str(st.date_input('Data de Fim', value=pd.to_datetime(data_final), format='DD/MM/YYYY'))
 
-            data_set = filtrar_por_data(df, data_inicio, data_fim)
+            data_set = filtrar_por_data(base(), data_inicio, data_fim)
 
             # Crie as listas de opções
             vendedores = sorted(data_set['vendedor'].unique())
@@ -144,7 +201,7 @@ def create_sidebar(data_inicial, data_final, cor_ambiente, cor_vendedor, cor_lib
 def create_grafs(data_inicio, data_fim, fVendedor, fLiberador, fambiente, floja, color1, color2, color3, color4):
     try:
         
-        data_set = filtrar_por_data(df, data_inicio, data_fim, fVendedor, fLiberador, fambiente, floja)
+        data_set = filtrar_por_data(base(), data_inicio, data_fim, fVendedor, fLiberador, fambiente, floja)
         if data_set.empty:
             raise IndexError
         
@@ -193,9 +250,12 @@ def create_grafs(data_inicio, data_fim, fVendedor, fLiberador, fambiente, floja,
             metrica('Vendedor com Mais Pedido', max_vendas[0:3])
 
         with col4:
-            max_project = data_set.groupby('tipocontrato')[linha_y].sum().iloc[0]
-            numero_formatado = format_currency(max_project, "BRL", locale="pt_BR")
+            # soma de todos os tipos de contrato (antes: só o primeiro grupo)
+            max_project = data_set[linha_y].sum()
+            numero_formatado = formatacao.moeda_valor(max_project)
             st.metric('Total de Faturamento no Período', numero_formatado)
 
+        metricas_mensais(data_inicio, data_fim, fVendedor, fLiberador, fambiente, floja)
+
     except IndexError as e:
         st.error("Não existem dados com base nos filtros selecionados")
@@ -1,12 +1,24 @@
 # app.py
+import os
+import numpy as np
 import pandas as pd
 import altair as alt
 import streamlit as st
-from datetime import datetime, date, timedelta
-from typing import Literal
 from supabase import Client, create_client
-from generator import Generator
-from Json import Settings
+from Json import Settings, perfil_da_sessao
+import artefatos
+import formatacao
+import pool
+import registro_io
+import tarefas
+import transporte
+from data_version import fetch_data_version
+from fragments import fragment
+from eventos import EventLog
+from montecarlo import duracoes_empiricas, simular_conclusao, PERCENTIS
+from agendador import agendar, conclusao_por_ordem, CAPACIDADE_PADRAO
+from sql_producao import PAINEL_SQL, PREVISAO_SQL, ETAPAS_SQL
+from status_producao import ResumoStatus, agregar_status
 
 # ✅ NOVO: service que calcula df_medias
 from database_media import ProducaoService  # ajuste o nome do arquivo se for diferente
@@ -16,12 +28,12 @@ from database_media import ProducaoService  # ajuste o nome do arquivo se for di
 # =============================================================================
 
 def loading_json() -> tuple[str, str]:
-    s = Settings()
+    # mesmo perfil de Projetos/Financeiro: o período salvo pelo usuário vale aqui também
+    s = Settings(perfil=perfil_da_sessao())
     data_inicial = s.key('data_inicial')
     data_final = s.key('data_final')
     return data_inicial, data_final
 
-default_ini, default_fim = loading_json()
 
 @st.cache_resource(show_spinner=False)
 def get_client() -> Client:
@@ -62,14 +74,38 @@ def _force_select_prefix(sql: str) -> str:
 
 def database(query: str, params: dict | None = None) -> pd.DataFrame:
     client = get_client()
-    query = _bind_params(query, params)
-    query = _trim_trailing_semicolons(query)
-    query = _force_select_prefix(query)
+    ident = registro_io.identidade(query)
+    bound = _bind_params(query, params)
+    bound = _trim_trailing_semicolons(bound)
+    bound = _force_select_prefix(bound)
 
-    resp = client.rpc("exec_sql", {"q": query}).execute()
-    rows = resp.data or []
-    norm = [r.get("exec_sql", r) for r in rows]
-    return pd.DataFrame(norm)
+    # exec_sql_colunar quando existir no banco, senão exec_sql (ver transporte.py)
+    return transporte.executar(client, bound, ident, params)
+
+# =============================================================================
+# Versão dos dados: probe barato que chaveia todos os caches
+# =============================================================================
+
+VERSION_TTL = 30  # segundos entre probes
+# teto de idade das consultas em cache: sem a migração 0004 o token não
+# vê edições fora das colunas de data (urgente, pendencia, cliente...)
+DADOS_TTL = int(os.environ.get("DASH_DADOS_TTL", "600"))
+
+@st.cache_data(ttl=VERSION_TTL, show_spinner=False)
+def data_version() -> str:
+    return fetch_data_version(get_client())
+
+@st.cache_data(ttl=DADOS_TTL, show_spinner=False, max_entries=64)
+def _cached_database(query: str, params: dict | None, versao: str) -> pd.DataFrame:
+    """database() memorizado por (query, params, versao); versao muda => refaz."""
+    return database(query, params)
+
+def cached_database(query: str, params: dict | None, versao: str) -> pd.DataFrame:
+    """_cached_database() com o hit de cache anotado no registro de I/O do rerun."""
+    with registro_io.cache("exec_sql", registro_io.identidade(query), params) as out:
+        df = _cached_database(query, params, versao)
+        out["linhas"] = len(df)
+    return df
 
 # =============================================================================
 # ✅ NOVO: cache do service
@@ -84,61 +120,67 @@ def get_producao_service() -> ProducaoService:
 # =============================================================================
 
 def convert_to_str(df: pd.DataFrame, coluna: str) -> None:
-    df[coluna] = df[coluna].astype(str).str.rstrip('0').str.rstrip('.')
+    df[coluna] = formatacao.numero_texto(df[coluna])
 
 def convert_to_date(df: pd.DataFrame, column: str) -> None:
     df[column] = pd.to_datetime(df[column], errors='coerce')
 
-def format_date(df: pd.DataFrame, column: str) -> None:
-    df[column] = df[column].dt.strftime("%d/%m/%Y %H:%M:%S")
-
-def cell_color(val, lista: list) -> Literal['color: yellow', 'color: red', '']:
-    if val in lista and check_date(val):
-        return 'color: red'
-    elif val in lista:
-        return 'color: yellow'
-    else:
-        return ''
-
-def check_date(date_str) -> bool:
-    date_parsed = datetime.strptime(date_str, "%d/%m/%Y %H:%M:%S")
-    hoje = datetime.today().replace(microsecond=0)
-    return date_parsed < hoje
+def estilo_previstas(page: pd.DataFrame, previstas: pd.DataFrame, agora: pd.Timestamp) -> pd.DataFrame:
+    """CSS das células de data da página: previstas em amarelo, vencidas (antes de `agora`) em vermelho."""
+    hoje = agora.to_datetime64()
+    datas = page[previstas.columns].to_numpy(dtype='datetime64[ns]')
+    prev = previstas.loc[page.index].to_numpy(dtype=bool)
+    css = np.where(prev, np.where(datas < hoje, 'color: red', 'color: yellow'), '')
+    return pd.DataFrame(css, index=page.index, columns=previstas.columns)
+
+def buscar(df: pd.DataFrame, busca: str = "") -> pd.DataFrame:
+    """Linhas com `busca` em alguma coluna de texto (sem busca, o próprio df)."""
+    if not busca:
+        return df
+    texto = df.select_dtypes(include=['object', 'string']).columns
+    mask = np.zeros(len(df), dtype=bool)
+    for c in texto:
+        mask |= df[c].astype(str).str.contains(busca, case=False, regex=False).to_numpy()
+    return df[mask]
+
+
+def paginar(df: pd.DataFrame, ordenar_por: str | None = None,
+            ascendente: bool = True, pagina: int = 1, tamanho: int = 50) -> pd.DataFrame:
+    """
+    Ordenação + fatiamento no servidor de um df já filtrado por buscar().
+    Datas continuam datetime64 (ordenam por valor); viram texto só na página.
+    """
+    if ordenar_por:
+        df = df.sort_values(ordenar_por, ascending=ascendente, kind='stable', na_position='last')
+    ini = (max(pagina, 1) - 1) * tamanho
+    return df.iloc[ini:ini + tamanho]
 
 # =============================================================================
-# SQL helpers
+# Constantes da UI (SQL em sql_producao.py)
 # =============================================================================
 
-STATUS_CASE = """
-CASE 
-  WHEN p."pendencia" = TRUE THEN 'PENDENCIA'
-  WHEN p."entrega" IS NOT NULL THEN 'ENTREGUE'
-  WHEN p."iniciado" IS NOT NULL AND p."urgente" = TRUE AND p."pronto" IS NOT NULL THEN 'PRONTO'
-  WHEN p."iniciado" IS NOT NULL AND p."urgente" = TRUE THEN 'URGENTE'
-  WHEN p."dataentrega"::date < :proj::date AND p."pronto" IS NOT NULL THEN 'PRONTO'
-  WHEN p."dataentrega"::date < :proj::date THEN 'ATRASADO'
-  WHEN (p."dataentrega"::date - INTERVAL '9 day') < :proj::date AND p."pronto" IS NOT NULL THEN 'PRONTO'
-  WHEN (p."dataentrega"::date - INTERVAL '9 day') < :proj::date THEN 'A VENCER'
-  WHEN p."pronto" IS NOT NULL THEN 'PRONTO'
-  WHEN p."iniciado" IS NOT NULL THEN 'INICIADO'
-  ELSE 'AGUARDANDO'
-END
-"""
-
-def etapa_case(prefixo: str) -> str:
-    return f"""
-    CASE 
-      WHEN pr."{prefixo}fim" IS NOT NULL THEN 'FINALIZADO'
-      WHEN pr."{prefixo}inicio" IS NOT NULL THEN 'INICIADO'
-      ELSE 'AGUARDE'
-    END
-    """
+ABAS = ['Produção', 'Estatistica', 'Previsoes']
+
+RANGE_COLORS = {
+    'AGUARDE': "#F90303",
+    'INICIADO': '#B1AE03',
+    'FINALIZADO': '#2ca02c',
+}
+
+COLOR_MAP = {
+    'A VENCER': '#DA8B05',
+    'ATRASADO': '#FB040C',
+    'INICIADO': '#F9F303',
+    'PENDENCIA': '#AB13F3',
+    'URGENTE': '#0276D2',
+}
 
 # =============================================================================
 # UI
 # =============================================================================
 
 def create_sidebar():
+    default_ini, default_fim = loading_json()
     with st.sidebar:
         with st.form("my_form1"):
             fProjecao = st.date_input('Projeção', format='DD/MM/YYYY')
@@ -149,51 +191,8 @@ def create_sidebar():
             fIni = st.date_input("Início", value=pd.to_datetime(default_ini), format='DD/MM/YYYY')
             fFim = st.date_input("Fim", value=pd.to_datetime(default_fim), format='DD/MM/YYYY')
 
-            query = f"""
-            WITH dados AS (
-              SELECT
-                CASE WHEN EXISTS (
-                  SELECT 1 FROM "tblAcessorios" a 
-                  WHERE a."ordemdecompra" = p."ordemdecompra"
-                ) THEN '*' ELSE '' END AS "A",
-                p."ordemdecompra",
-                p."pedido",
-                p."etapa",
-                p."codcc",
-                p."cliente",
-                p."contrato",
-                p."ambiente",
-                {STATUS_CASE} AS "Status",
-                (p."dataentrega"::date - :proj::date) AS "Prazo",
-                {etapa_case("corte")}           AS "SCorte",
-                {etapa_case("customizacao")}    AS "SCustom",
-                {etapa_case("coladeira")}       AS "SColadeira",
-                {etapa_case("usinagem")}        AS "SUsinagem",
-                {etapa_case("paineis")}         AS "SPaineis",
-                {etapa_case("montagem")}        AS "SMontagem",
-                {etapa_case("embalagem")}       AS "SEmbalagem",
-                CASE 
-                  WHEN pr."separacao" IS NOT NULL THEN 'FINALIZADO'
-                  WHEN pr."embalagemfim" IS NOT NULL THEN 'INICIADO'
-                  ELSE 'AGUARDE'
-                END AS "SSeparacao",
-                p."dataentrega",
-                p."previsao",
-                p."urgente",
-                CASE WHEN p."pronto" IS NOT NULL THEN 'Certo' END AS "Teste",
-                pr."observacoes"
-              FROM "tblProjetos" p
-              INNER JOIN "tblProducao" pr
-                ON p."ordemdecompra" = pr."ordemdecompra"
-              WHERE p."ordemdecompra" > 0
-            )
-            SELECT * FROM dados
-            WHERE "Status" IN ('INICIADO','ATRASADO','A VENCER','URGENTE','PENDENCIA')
-            ORDER BY "previsao", "urgente", "Prazo", "cliente", "codcc";
-            """
-
             proj_iso = getattr(fProjecao, "isoformat", lambda: str(fProjecao))()
-            df = database(query, params={"proj": proj_iso})
+            df = cached_database(PAINEL_SQL, {"proj": proj_iso}, data_version())
 
             options = sorted(df['Status'].unique()) if not df.empty else []
             fOption = st.selectbox(
@@ -210,250 +209,414 @@ def create_sidebar():
             with t3:
                 pass
 
-def create_grafs(filter, df, _db_path_nao_usado, fProjecao, fIni, fFim):
-    if df is None or df.empty:
-        st.warning("Sem dados para exibir.")
-        return
+# =============================================================================
+# Cálculos memorizados (chave = entradas explícitas + versão dos dados)
+# =============================================================================
 
-    if filter:
-        df = df[df['Status'] == filter]
+@st.cache_data(show_spinner=False, max_entries=32)
+def medias_por_etapa(inicio_iso: str, fim_iso: str, versao: str) -> pd.DataFrame:
+    pronto = artefatos.carregar("producao_medias", inicio_iso, fim_iso, versao)
+    if pronto is not None:
+        return pronto
+    service = get_producao_service()
+    _, df_medias, _, _ = service.run_pipeline_incremental(inicio_iso, fim_iso)
+    return df_medias
+
+@st.cache_data(show_spinner=False, max_entries=32)
+def distribuicao_por_etapa(inicio_iso: str, fim_iso: str, versao: str) -> pd.DataFrame:
+    pronto = artefatos.carregar("producao_distribuicao", inicio_iso, fim_iso, versao)
+    if pronto is not None:
+        return pronto
+    return get_producao_service().distribuicao_etapas(inicio_iso, fim_iso)
+
+@st.cache_data(show_spinner=False, max_entries=32)
+def lead_times_periodo(inicio_iso: str, fim_iso: str, versao: str) -> pd.DataFrame:
+    pronto = artefatos.carregar("producao_lead_times", inicio_iso, fim_iso, versao)
+    if pronto is not None:
+        return pronto
+    return get_producao_service().lead_times(inicio_iso, fim_iso)
+
+@st.cache_resource(show_spinner=False, max_entries=2)
+def event_log(versao: str) -> EventLog:
+    """Log de eventos de etapa, montado uma vez por versão e compartilhado (somente leitura)."""
+    return EventLog.from_wide(cached_database(ETAPAS_SQL, None, versao))
+
+@st.cache_data(show_spinner=False, max_entries=8)
+def previsao_montecarlo(proj_iso: str, versao: str, agora: pd.Timestamp,
+                        n_cenarios: int = 2000) -> pd.DataFrame:
+    abertas = cached_database(PREVISAO_SQL, {"proj": proj_iso}, versao)
+    if abertas.empty:
+        return abertas
+    empiricas = duracoes_empiricas(cached_database(ETAPAS_SQL, None, versao))
+    sim = simular_conclusao(abertas, empiricas, agora=agora, n_cenarios=n_cenarios)
+    convert_to_str(abertas, 'codcc')
+    convert_to_str(abertas, 'contrato')
+    out = pd.concat([abertas[['codcc', 'cliente', 'ambiente', 'contrato', 'Status']], sim], axis=1)
+    out['dataentrega'] = pd.to_datetime(abertas['dataentrega'])
+    out['NoPrazo'] = (out['NoPrazo'] * 100).round(1)
+    return out
 
-    status_columns = ['SCorte', 'SCustom', 'SColadeira', 'SPaineis', 'SUsinagem', 'SMontagem', 'SEmbalagem']
-    title_mapping = {col: col[1:] for col in status_columns}
-    melted_df = df.melt(
-        id_vars=['ordemdecompra'],
-        value_vars=title_mapping,
-        var_name='Etapa',
-        value_name='Status_Producao'
-    )
-
-    melted_df['Etapa_Titulo'] = melted_df['Etapa'].map(title_mapping)
-
-    order_map = {col: i for i, col in enumerate(status_columns)}
-    melted_df["Etapa_Ordem"] = melted_df["Etapa"].map(order_map)
-
-
-    range_colors = {
-            'AGUARDE': "#F90303",
-            'INICIADO': '#B1AE03',
-            'FINALIZADO': '#2ca02c',
-        }
-
-    tab1, tab2, tab3 = st.tabs(['Produção', 'Estatistica', 'Previsoes'])
-
-    with tab1:
-        bars = alt.Chart(melted_df).mark_bar(cornerRadiusTopLeft=5, cornerRadiusTopRight=5).encode(
-            x=alt.X('Etapa_Titulo:N', sort=alt.SortField(field='Etapa_Ordem', order='ascending'),),
-            y=alt.Y('count()', type='quantitative'),
-            color=alt.Color(field='Status_Producao', type='nominal', scale=alt.Scale(domain=list(range_colors.keys()), range=list(range_colors.values())))
-        ).properties(title='Status de Produção por Etapa', width=600, height=400)
-
-        col1, col2, col3 = st.columns(3)
-        with col2:
-            st.altair_chart(bars, use_container_width=True)
-
-        color_map = {
-            'A VENCER': '#DA8B05',
-            'ATRASADO': '#FB040C',
-            'INICIADO': '#F9F303',
-            'PENDENCIA': '#AB13F3',
-            'URGENTE': '#0276D2',
-        }
-
-        status_count = df['Status'].value_counts().reset_index()
-        status_count.columns = ['Status', 'Contagem']
-        status_count['Porcentagem'] = (status_count['Contagem'] / status_count['Contagem'].sum()) * 100
-        status_count['%'] = status_count['Porcentagem'].apply(lambda x: f'{x:.0f}%')
-
-        chart = alt.Chart(status_count).mark_arc(innerRadius=70, outerRadius=120, cornerRadius=10,
-                                                 stroke="rgba(255, 255, 255, 0.2)", strokeWidth=5).encode(
-            theta=alt.Theta(field='Contagem', type='quantitative', stack=True),
-            color=alt.Color(field='Status', type='nominal',
-                            scale=alt.Scale(domain=list(color_map.keys()), range=list(color_map.values()))),
-            tooltip=[alt.Tooltip(field='Status', type='nominal'),
-                     alt.Tooltip(field='Contagem', type='quantitative', title='Total')]
-        ).properties(title='Distribuição por Status', height=350)
-
-        label = chart.mark_text(radius=140, size=13).encode(text=alt.Text(field='%', type='nominal'))
-        with col1:
-            st.altair_chart(chart + label, use_container_width=True)  # type: ignore
-
-        chart2 = alt.Chart(df).mark_point(filled=True, fillOpacity=0.2, size=70).encode(
-            x=alt.X(field='dataentrega', type='temporal', timeUnit='utcdate'),
-            y='Prazo:Q',
-            color=alt.Color(field='Status', type='nominal',
-                            scale=alt.Scale(domain=list(color_map.keys()), range=list(color_map.values()))),
-            tooltip=['ordemdecompra:N', 'dataentrega:T', 'Prazo:Q', 'Status:N', 'cliente:N']
-        ).properties(title='Prazos de Entrega vs. Dias Restantes')
-
-        with col3:
-            st.altair_chart(chart2, use_container_width=True)
-
-            cliente_contrato = (
-                df.groupby("cliente", dropna=False)["contrato"]
-                .size()
-                .reset_index(name="ambientes")
-            )
+@st.cache_data(show_spinner=False, max_entries=8)
+def previsao_capacidade(proj_iso: str, versao: str, agora: pd.Timestamp,
+                        capacidade: tuple) -> tuple[pd.DataFrame, pd.DataFrame]:
+    abertas = cached_database(PREVISAO_SQL, {"proj": proj_iso}, versao)
+    if abertas.empty:
+        return abertas, pd.DataFrame()
+    # duração típica = mediana histórica (cai na média do Generator se não houver)
+    empiricas = duracoes_empiricas(cached_database(ETAPAS_SQL, None, versao))
+    duracoes = {e: float(np.median(v)) for e, v in empiricas.items() if len(v)}
+    agenda, utilizacao = agendar(abertas, dict(capacidade), duracoes, agora=agora)
+    convert_to_str(abertas, 'codcc')
+    convert_to_str(abertas, 'contrato')
+    out = abertas[['codcc', 'cliente', 'ambiente', 'contrato', 'Status', 'urgente']].copy()
+    conclusao = conclusao_por_ordem(abertas, agenda)
+    entrega = pd.to_datetime(abertas['dataentrega'], errors='coerce')
+    out['Conclusao'] = conclusao
+    out['dataentrega'] = entrega
+    out['Atraso'] = conclusao.dt.normalize() > entrega.dt.normalize()
+    return out, utilizacao
+
+def fill_forecast(df_in: pd.DataFrame, agora: pd.Timestamp) -> tuple[pd.DataFrame, pd.DataFrame]:
+    """Preenche as datas faltantes com as médias do Generator; devolve (df, máscara das previstas)."""
+    cols = list(df_in.columns[6:20])
+    valores, previstas = pool.run(tarefas.preencher_previsao, df_in[cols].to_numpy(dtype='datetime64[ns]'),
+                                  cols, agora, linhas=len(df_in))
+    df_estilo = df_in.copy()
+    df_estilo[cols] = valores
+    return df_estilo, pd.DataFrame(previstas, index=df_in.index, columns=cols)
+
+@st.cache_data(show_spinner=False, max_entries=16)
+def previsao_preenchida(proj_iso: str, versao: str, agora: pd.Timestamp) -> tuple[pd.DataFrame, pd.DataFrame]:
+    dfp = cached_database(PREVISAO_SQL, {"proj": proj_iso}, versao)
+    if dfp.empty:
+        return dfp, pd.DataFrame()
+
+    convert_to_str(dfp, 'codcc')
+    convert_to_str(dfp, 'contrato')
+
+    columns = ['corteinicio', 'cortefim', 'customizacaoinicio', 'customizacaofim',
+               'coladeirainicio', 'coladeirafim', 'usinageminicio', 'usinagemfim',
+               'montageminicio', 'montagemfim', 'paineisinicio', 'paineisfim',
+               'embalageminicio', 'embalagemfim']
+
+    dfp['dataentrega'] = pd.to_datetime(dfp['dataentrega'])
+    dfp['previsao'] = pd.to_datetime(dfp['previsao'])
+    dfp['Prazo'] = dfp['Prazo'].astype(int)
+
+    for col in columns:
+        convert_to_date(dfp, col)
+
+    col_order = ['codcc', 'cliente', 'ambiente', 'contrato', 'Status', 'Prazo',
+                 'corteinicio', 'cortefim', 'customizacaoinicio', 'customizacaofim',
+                 'coladeirainicio', 'coladeirafim', 'usinageminicio', 'usinagemfim',
+                 'montageminicio', 'montagemfim', 'paineisinicio', 'paineisfim',
+                 'embalageminicio', 'embalagemfim', 'urgente', 'dataentrega', 'previsao']
+    return fill_forecast(dfp[col_order], agora)
 
-            # ✅ Sanitiza tipos (isso evita crash do Altair no Cloud)
-            cliente_contrato["cliente"] = cliente_contrato["cliente"].fillna("SEM CLIENTE").astype(str)
-            cliente_contrato["ambientes"] = pd.to_numeric(cliente_contrato["ambientes"], errors="coerce").fillna(0).astype(int)
-
-            # Se ficar vazio, não tenta plotar
-            if cliente_contrato.empty:
-                st.warning("Sem dados para o gráfico de clientes.")
-            else:
-                chart_clientes = alt.Chart(cliente_contrato).mark_bar().encode(
-                    x=alt.X(
-                        "cliente:N",
-                        sort=alt.SortField(field="ambientes", order="descending"),
-                        title="Cliente",
-                    ),
-                    y=alt.Y("ambientes:Q", title="Ambientes"),
-                    tooltip=[alt.Tooltip("cliente:N"), alt.Tooltip("ambientes:Q")],
-                ).properties(title="Número de ambientes por cliente")
+# =============================================================================
+# Fragmentos
+# =============================================================================
 
+@fragment("producao.graficos")
+def graficos_producao(df: pd.DataFrame, resumo: ResumoStatus):
+    bars = alt.Chart(resumo.etapas).mark_bar(cornerRadiusTopLeft=5, cornerRadiusTopRight=5).encode(
+        x=alt.X('Etapa_Titulo:N', sort=alt.SortField(field='Etapa_Ordem', order='ascending'),),
+        y=alt.Y('sum(Contagem):Q', title='Count of Records'),
+        color=alt.Color(field='Status_Producao', type='nominal', scale=alt.Scale(domain=list(RANGE_COLORS.keys()), range=list(RANGE_COLORS.values())))
+    ).properties(title='Status de Produção por Etapa', width=600, height=400)
+
+    col1, col2, col3 = st.columns(3)
+    with col2:
+        st.altair_chart(bars, use_container_width=True)
+
+    chart = alt.Chart(resumo.status).mark_arc(innerRadius=70, outerRadius=120, cornerRadius=10,
+                                             stroke="rgba(255, 255, 255, 0.2)", strokeWidth=5).encode(
+        theta=alt.Theta(field='Contagem', type='quantitative', stack=True),
+        color=alt.Color(field='Status', type='nominal',
+                        scale=alt.Scale(domain=list(COLOR_MAP.keys()), range=list(COLOR_MAP.values()))),
+        tooltip=[alt.Tooltip(field='Status', type='nominal'),
+                 alt.Tooltip(field='Contagem', type='quantitative', title='Total')]
+    ).properties(title='Distribuição por Status', height=350)
+
+    label = chart.mark_text(radius=140, size=13).encode(text=alt.Text(field='%', type='nominal'))
+    with col1:
+        st.altair_chart(chart + label, use_container_width=True)  # type: ignore
+
+    chart2 = alt.Chart(df).mark_point(filled=True, fillOpacity=0.2, size=70).encode(
+        x=alt.X(field='dataentrega', type='temporal', timeUnit='utcdate'),
+        y='Prazo:Q',
+        color=alt.Color(field='Status', type='nominal',
+                        scale=alt.Scale(domain=list(COLOR_MAP.keys()), range=list(COLOR_MAP.values()))),
+        tooltip=['ordemdecompra:N', 'dataentrega:T', 'Prazo:Q', 'Status:N', 'cliente:N']
+    ).properties(title='Prazos de Entrega vs. Dias Restantes')
+
+    with col3:
+        st.altair_chart(chart2, use_container_width=True)
+
+        # cliente já vem como texto ("SEM CLIENTE" nos nulos) e ambientes como int
+        cliente_contrato = resumo.clientes[["cliente", "ambientes"]]
+
+    # Se ficar vazio, não tenta plotar
+    if cliente_contrato.empty:
+        st.warning("Sem dados para o gráfico de clientes.")
+    else:
+        chart_clientes = alt.Chart(cliente_contrato).mark_bar().encode(
+            x=alt.X(
+                "cliente:N",
+                sort=alt.SortField(field="ambientes", order="descending"),
+                title="Cliente",
+            ),
+            y=alt.Y("ambientes:Q", title="Ambientes"),
+            tooltip=[alt.Tooltip("cliente:N"), alt.Tooltip("ambientes:Q")],
+        ).properties(title="Número de ambientes por cliente")
         st.altair_chart(chart_clientes, use_container_width=True)
 
+@fragment("producao.wip")
+def wip_producao(inicio_iso: str, fim_iso: str, versao: str):
+    log = event_log(versao)
+    if log.eventos.empty:
+        st.warning("Sem eventos de produção para o WIP.")
+        return
+    wip = log.wip_range(f"{inicio_iso} 12:00", f"{fim_iso} 12:00")
+    chart_wip = alt.Chart(wip).mark_line(interpolate='step-after').encode(
+        x=alt.X('data:T', title=None),
+        y=alt.Y('wip:Q', title='Ordens em andamento'),
+        color=alt.Color('etapa:N', title='Etapa'),
+        tooltip=[alt.Tooltip('data:T', format='%d/%m/%Y'), 'etapa:N', 'wip:Q']
+    ).properties(title='WIP por etapa (ao meio-dia)', height=300)
+    st.altair_chart(chart_wip, use_container_width=True)
+
+@fragment("estatistica.medias")
+def medias_estatistica(inicio_iso: str, fim_iso: str, versao: str):
+    tamanho = 130
+    try:
+        df_medias = medias_por_etapa(inicio_iso, fim_iso, versao)
+    except pool.PoolTimeout:
+        st.warning("O cálculo das médias excedeu o tempo limite. Tente novamente em instantes.")
+        return
 
-    # ✅ TAB2 MODIFICADA: usa ProducaoService -> df_medias
-    with tab2:
-        tamanho = 130
-
-        service = get_producao_service()
-        inicio_iso = getattr(fIni, "isoformat", lambda: str(fIni))()
-        fim_iso = getattr(fFim, "isoformat", lambda: str(fFim))()
-
-        df_filtrado, df_medias, medias_dec, medias_hhmm = service.run_pipeline(inicio_iso, fim_iso)
+    if not df_medias.empty and "Etapa" in df_medias.columns:
+        circle = alt.Chart(df_medias).mark_arc(
+            cornerRadius=10, innerRadius=tamanho*0.53, outerRadius=tamanho,
+            stroke="rgba(255, 255, 255, 0.2)", strokeWidth=5
+        ).encode(
+            theta=alt.Theta(field='Percentual', type='quantitative', stack=True),
+            color=alt.Color(field='Etapa', type='nominal'),
+            tooltip=[alt.Tooltip(field="Etapa", type="nominal"),
+                     alt.Tooltip(field="Media", type="nominal")]
+        )
+        label = circle.mark_text(radius=tamanho+20, size=13).encode(text='%').properties()
+        st.altair_chart(circle + label, use_container_width=True)  # type: ignore
+    else:
+        st.warning("Sem dados para médias por etapa no período selecionado.")
+
+    dist = distribuicao_por_etapa(inicio_iso, fim_iso, versao)
+    dist = dist[dist['n'] > 0]
+    if not dist.empty:
+        base = alt.Chart(dist).encode(y=alt.Y('Etapa:N', sort=list(dist['Etapa']), title=None))
+        faixa = base.mark_rule().encode(x=alt.X('min:Q', title='Horas trabalhadas'), x2='p99:Q')
+        caixa = base.mark_bar(size=14, cornerRadius=3).encode(x='p50:Q', x2='p90:Q')
+        mediana = base.mark_tick(color='white', thickness=2, size=14).encode(
+            x='p50:Q',
+            tooltip=[alt.Tooltip('Etapa:N'), alt.Tooltip('p50:Q', format='.1f'),
+                     alt.Tooltip('p90:Q', format='.1f'), alt.Tooltip('p99:Q', format='.1f'),
+                     alt.Tooltip('min:Q', format='.1f'), alt.Tooltip('max:Q', format='.1f'),
+                     alt.Tooltip('n:Q', title='Ordens')]
+        )
+        st.altair_chart((faixa + caixa + mediana).properties(title='Distribuição por etapa (p50–p90, min–p99)'),
+                        use_container_width=True)
+
+@fragment("estatistica.lead_times")
+def lead_times_estatistica(inicio_iso: str, fim_iso: str, versao: str):
+    try:
+        leads = lead_times_periodo(inicio_iso, fim_iso, versao)
+    except pool.PoolTimeout:
+        st.warning("O cálculo dos lead times excedeu o tempo limite. Tente novamente em instantes.")
+        return
+    if leads.empty:
+        return
 
-        if not df_medias.empty and "Etapa" in df_medias.columns:
-            circle = alt.Chart(df_medias).mark_arc(
-                cornerRadius=10, innerRadius=tamanho*0.53, outerRadius=tamanho,
-                stroke="rgba(255, 255, 255, 0.2)", strokeWidth=5
-            ).encode(
-                theta=alt.Theta(field='Percentual', type='quantitative', stack=True),
-                color=alt.Color(field='Etapa', type='nominal'),
-                tooltip=[alt.Tooltip(field="Etapa", type="nominal"),
-                         alt.Tooltip(field="Media", type="nominal")]
+    # uma linha por (mês, trecho): o total do período ou um grupo escolhido
+    c1, c2, c3 = st.columns([1, 2, 1])
+    dimensao = c1.selectbox('Lead time por', ['loja', 'cliente'], key='lead_dimensao',
+                            format_func=str.capitalize)
+    grupos = sorted(leads.loc[leads['Dimensao'] == dimensao, 'Grupo'].unique())
+    grupo = c2.selectbox(dimensao.capitalize(), [None] + grupos, key=f'lead_{dimensao}',
+                         format_func=lambda g: 'Todos' if g is None else g)
+    sel = leads[leads['Dimensao'] == 'total'] if grupo is None else \
+        leads[(leads['Dimensao'] == dimensao) & (leads['Grupo'] == grupo)]
+    horas = c3.toggle('Horas úteis', value=False, key='lead_horas')
+    media, p50, titulo = (('HorasUteisMedia', 'HorasUteisP50', 'Horas úteis') if horas
+                          else ('DiasMedia', 'DiasP50', 'Dias corridos'))
+
+    ordem = list(dict.fromkeys(leads['Trecho']))
+    chart = alt.Chart(sel).mark_bar().encode(
+        x=alt.X('Periodo:O', title=None),
+        y=alt.Y(f'{media}:Q', stack=True, title=titulo),
+        color=alt.Color('Trecho:N', sort=ordem),
+        order=alt.Order('ordem:Q'),
+        tooltip=['Periodo:N', 'Trecho:N', alt.Tooltip(f'{media}:Q', format='.1f', title='Média'),
+                 alt.Tooltip(f'{p50}:Q', format='.1f', title='Mediana'), alt.Tooltip('n:Q', title='Ordens')]
+    ).transform_calculate(ordem=f"indexof({ordem}, datum.Trecho)").properties(
+        title=f'Lead time por trecho ({titulo.lower()})')
+    st.altair_chart(chart, use_container_width=True)
+
+@fragment("estatistica.kpis")
+def kpis_estatistica(resumo: ResumoStatus):
+    col1, col2, col3, col4 = st.columns(4)
+    with col1:
+        st.metric("Total de Ordens de Compra", resumo.total_ordens)
+
+        st.metric("Prazo Médio de Entrega (dias)", f"{resumo.prazo_medio:.2f}")
+
+        top = resumo.cliente_mais_contratos
+        if top is not None:
+            st.metric(f"cliente com Mais contratos ({top[0]})", top[1])
+
+        st.metric("Número de Projetos Atrasados", resumo.atrasados)
+
+    with col2:
+        for status, count in zip(resumo.status['Status'], resumo.status['Contagem']):
+            st.metric(f"Projetos com Status {status}", int(count))
+
+    with col3:
+        for etapa, count in resumo.status_por_etapa_total.items():
+            st.metric(f"Etapas em {etapa}", int(count))
+
+    with col4:
+        for status, percent in resumo.distribuicao_etapas.items():
+            st.metric(f"Percentual de Status {status}", f"{percent:.2f}%")
+
+@fragment("previsoes.tabela")
+def tabela_previsoes(proj_iso: str, versao: str):
+    modo = st.radio('Modo de previsão', ['Média fixa', 'Monte Carlo', 'Capacidade'], horizontal=True,
+                    key='previsao_modo')
+    if modo == 'Capacidade':
+        with st.expander('Postos em paralelo por estação'):
+            cols = st.columns(len(CAPACIDADE_PADRAO))
+            capacidade = tuple(
+                (etapa, int(col.number_input(etapa, min_value=1, max_value=20, value=padrao,
+                                             key=f'cap_{etapa}')))
+                for col, (etapa, padrao) in zip(cols, CAPACIDADE_PADRAO.items())
             )
-            label = circle.mark_text(radius=tamanho+20, size=13).encode(text='%').properties()
-            st.altair_chart(circle + label, use_container_width=True)  # type: ignore
-        else:
-            st.warning("Sem dados para médias por etapa no período selecionado.")
-
-        col1, col2, col3, col4 = st.columns(4)
-        with col1:
-            total_ordens = df['ordemdecompra'].nunique()
-            st.metric("Total de Ordens de Compra", total_ordens)
-
-            prazo_medio = df['Prazo'].mean()
-            st.metric("Prazo Médio de Entrega (dias)", f"{prazo_medio:.2f}")
-
-            contratos_por_cliente = df.groupby('cliente')['contrato'].count().reset_index()
-            cliente_mais_contratos = contratos_por_cliente.sort_values(by='contrato', ascending=False).iloc[0]
-            st.metric(f"cliente com Mais contratos ({cliente_mais_contratos['cliente']})",
-                      int(cliente_mais_contratos['contrato']))
-
-            projetos_atrasados = df[df['Prazo'] < 0].shape[0]
-            st.metric("Número de Projetos Atrasados", projetos_atrasados)
-
-        with col2:
-            for status, count in df['Status'].value_counts().items():
-                st.metric(f"Projetos com Status {status}", count)
-
-        with col3:
-            etapa_counts = df[status_columns].apply(pd.Series.value_counts).fillna(0).sum(axis=1)
-            for etapa, count in etapa_counts.items():
-                st.metric(f"Etapas em {etapa}", int(count))
-
-        with col4:
-            status_distribution = (melted_df['Status_Producao'].value_counts(normalize=True) * 100).round(2)
-            for status, percent in status_distribution.items():
-                st.metric(f"Percentual de Status {status}", f"{percent:.2f}%")
-
-    with tab3:
-        sql = f"""
-        WITH dados AS (
-          SELECT 
-            p."codcc",
-            p."cliente",
-            p."contrato",
-            p."ambiente",
-            {STATUS_CASE} AS "Status",
-            (p."dataentrega"::date - :proj::date) AS "Prazo",
-
-            pr."corteinicio", pr."cortefim",
-            pr."customizacaoinicio", pr."customizacaofim",
-            pr."coladeirainicio", pr."coladeirafim",
-            pr."usinageminicio", pr."usinagemfim",
-            pr."paineisinicio", pr."paineisfim",
-            pr."montageminicio", pr."montagemfim",
-            pr."embalageminicio", pr."embalagemfim",
-
-            p."dataentrega",
-            p."previsao",
-            p."urgente"
-          FROM "tblProjetos" p
-          INNER JOIN "tblProducao" pr
-            ON p."ordemdecompra" = pr."ordemdecompra"
-          WHERE p."ordemdecompra" > 0
+        agora = pd.Timestamp.now().floor('h')
+        df_cap, utilizacao = previsao_capacidade(proj_iso, versao, agora, capacidade)
+        if df_cap.empty:
+            st.warning("Sem dados para previsões.")
+            return
+        chart_uso = alt.Chart(utilizacao).mark_bar(cornerRadiusTopLeft=5, cornerRadiusTopRight=5).encode(
+            x=alt.X('etapa:N', sort=list(utilizacao['etapa']), title=None),
+            y=alt.Y('utilizacao:Q', axis=alt.Axis(format='%'), title='Utilização'),
+            tooltip=['etapa:N', 'capacidade:Q', alt.Tooltip('horas_ocupadas:Q', format='.1f'),
+                     alt.Tooltip('utilizacao:Q', format='.0%')]
+        ).properties(title='Utilização por estação', height=250)
+        st.altair_chart(chart_uso, use_container_width=True)
+        st.dataframe(
+            df_cap, hide_index=True,
+            column_config={
+                'Conclusao': st.column_config.DatetimeColumn(format='DD/MM/YYYY HH:mm'),
+                'dataentrega': st.column_config.DatetimeColumn(format='DD/MM/YYYY'),
+            },
         )
-        SELECT * FROM dados
-        WHERE "Status" IN ('INICIADO','ATRASADO','A VENCER','URGENTE','PENDENCIA')
-        ORDER BY "previsao", "urgente", "Prazo", "cliente", "codcc";
-        """
-        proj_iso = getattr(fProjecao, "isoformat", lambda: str(fProjecao))()
-        dfp = database(sql, params={"proj": proj_iso})
-
-        if dfp.empty:
+        return
+    if modo == 'Monte Carlo':
+        # hora cheia na chave: o cache vale por até 1h para a mesma versão
+        agora = pd.Timestamp.now().floor('h')
+        df_mc = previsao_montecarlo(proj_iso, versao, agora)
+        if df_mc.empty:
             st.warning("Sem dados para previsões.")
             return
+        st.dataframe(
+            df_mc, hide_index=True,
+            column_config={
+                'NoPrazo': st.column_config.ProgressColumn(
+                    'Chance no prazo', format='%.0f%%', min_value=0, max_value=100),
+                'dataentrega': st.column_config.DatetimeColumn(format='DD/MM/YYYY'),
+                **{f'P{p}': st.column_config.DatetimeColumn(format='DD/MM/YYYY HH:mm') for p in PERCENTIS},
+            },
+        )
+        return
+
+    # como no Monte Carlo: o preenchimento parte de "agora" e vale por até 1h
+    agora = pd.Timestamp.now().floor('h')
+    try:
+        df_estilo, previstas = previsao_preenchida(proj_iso, versao, agora)
+    except pool.PoolTimeout:
+        st.warning("O cálculo da previsão excedeu o tempo limite. Tente novamente em instantes.")
+        return
+
+    if df_estilo.empty:
+        st.warning("Sem dados para previsões.")
+        return
+
+    # Styler gera CSS por célula: estiliza e serializa só a página visível
+    date_cols = list(df_estilo.columns[6:20])
+    c1, c2, c3, c4 = st.columns([3, 2, 1, 1])
+    busca = c1.text_input('Buscar', key='prev_busca', placeholder='cliente, contrato, ambiente...')
+    ordenar_por = c2.selectbox('Ordenar por', [None] + list(df_estilo.columns), key='prev_ordem',
+                               format_func=lambda c: 'Ordem padrão' if c is None else c)
+    ascendente = c3.toggle('Crescente', value=True, key='prev_asc')
+    tamanho = c4.selectbox('Linhas', [25, 50, 100], index=1, key='prev_tamanho')
+
+    # filtra uma vez: o total define o nº de páginas e a página sai do mesmo frame
+    filtrado = buscar(df_estilo, busca)
+    total = len(filtrado)
+    n_paginas = max((total + tamanho - 1) // tamanho, 1)
+    pagina = st.number_input('Página', min_value=1, max_value=n_paginas, value=1, key='prev_pagina')
+    page = paginar(filtrado, ordenar_por, ascendente, int(pagina), tamanho)
+
+    # cor decidida sobre as datas; texto dd/mm/aaaa só das linhas da página
+    css = estilo_previstas(page, previstas, agora)
+    texto = formatacao.formatar_datas(page, {**{c: formatacao.DATA_HORA_SEG for c in date_cols},
+                                             'dataentrega': formatacao.DATA, 'previsao': formatacao.DATA})
+    df2_styled = texto.style.apply(lambda _: css, axis=None, subset=date_cols)
+    st.dataframe(df2_styled)
+    ini = (int(pagina) - 1) * tamanho
+    st.caption(f"Mostrando {min(ini + 1, total)}–{min(ini + tamanho, total)} de {total} "
+               f"(total em aberto: {len(df_estilo)})")
+
+# =============================================================================
+# Dashboard
+# =============================================================================
+
+def create_grafs(filter, df, _db_path_nao_usado, fProjecao, fIni, fFim):
+    if df is None or df.empty:
+        st.warning("Sem dados para exibir.")
+        return
+
+    if filter:
+        df = df[df['Status'] == filter]
 
-        convert_to_str(dfp, 'codcc')
-        convert_to_str(dfp, 'contrato')
-
-        columns = ['corteinicio', 'cortefim', 'customizacaoinicio', 'customizacaofim',
-                   'coladeirainicio', 'coladeirafim', 'usinageminicio', 'usinagemfim',
-                   'montageminicio', 'montagemfim', 'paineisinicio', 'paineisfim',
-                   'embalageminicio', 'embalagemfim']
-
-        dfp['dataentrega'] = pd.to_datetime(dfp['dataentrega']).dt.strftime('%d/%m/%Y')
-        dfp['previsao'] = pd.to_datetime(dfp['previsao']).dt.strftime('%d/%m/%Y')
-        dfp['Prazo'] = dfp['Prazo'].astype(int)
-
-        for col in columns:
-            convert_to_date(dfp, col)
-            format_date(dfp, col)
-
-        def create_df_filled(df_in: pd.DataFrame):
-            df_estilo = df_in.copy()
-            estilo: list = []
-            list_columns = ['corteinicio', 'customizacaoinicio', 'coladeirainicio', 'usinageminicio',
-                            'paineisinicio', 'montageminicio', 'embalageminicio']
-            gerador = Generator(list_columns)
-
-            for index, row in df_in.iterrows():
-                for col in df_in.columns[6:20]:
-                    if pd.isnull(row[col]):
-                        data_hora = gerador.fill_mean_time(col)
-                        df_estilo.at[index, col] = data_hora
-                        estilo.append(data_hora)
-                        gerador.last_date(data_hora)
-                    else:
-                        gerador.last_date(str(row[col]))
-
-            styled_df = df_estilo.style.map(lambda x: cell_color(x, estilo),
-                                            subset=pd.IndexSlice[:, df_in.columns[6:20]])
-            return styled_df
-
-        col_order = ['codcc', 'cliente', 'ambiente', 'contrato', 'Status', 'Prazo',
-                     'corteinicio', 'cortefim', 'customizacaoinicio', 'customizacaofim',
-                     'coladeirainicio', 'coladeirafim', 'usinageminicio', 'usinagemfim',
-                     'montageminicio', 'montagemfim', 'paineisinicio', 'paineisfim',
-                     'embalageminicio', 'embalagemfim', 'urgente', 'dataentrega', 'previsao']
-        dfp = dfp[col_order]
-        df2_styled = create_df_filled(dfp)
-        st.dataframe(df2_styled)
+    # Entradas explícitas de cada fragmento: o filtro de Status só chega
+    # aos fragmentos que usam `df`; Estatística e Previsões dependem só
+    # do período / projeção e da versão dos dados.
+    versao = data_version()
+    proj_iso = getattr(fProjecao, "isoformat", lambda: str(fProjecao))()
+    inicio_iso = getattr(fIni, "isoformat", lambda: str(fIni))()
+    fim_iso = getattr(fFim, "isoformat", lambda: str(fFim))()
+
+    # st.tabs executa o corpo de TODAS as abas a cada rerun; com o seletor
+    # só a aba visível é calculada. Voltar para uma aba já vista é
+    # instantâneo porque os cálculos estão em cache por (entradas, versao).
+    aba = st.radio('Aba', ABAS, horizontal=True, key='producao_aba',
+                   label_visibility='collapsed')
+
+    # contagens de status de todas as abas numa passada só (status_producao.py)
+    resumo = agregar_status(df)
+    # df e resumo saem só destas entradas: é a chave dos fragmentos que os recebem
+    chave = (versao, filter, proj_iso, inicio_iso, fim_iso)
+
+    if aba == 'Produção':
+        graficos_producao(df, resumo, chave=chave)
+        wip_producao(inicio_iso, fim_iso, versao)
+
+    elif aba == 'Estatistica':
+        medias_estatistica(inicio_iso, fim_iso, versao)
+        lead_times_estatistica(inicio_iso, fim_iso, versao)
+        kpis_estatistica(resumo, chave=chave)
+
+    elif aba == 'Previsoes':
+        tabela_previsoes(proj_iso, versao)
 
 # =============================================================================
 # main
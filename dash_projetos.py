@@ -1,8 +1,12 @@
+import threading
 import pandas as pd
 import streamlit as st
 from graphics import Graph, detect_theme_mode
-from Json import Settings
+from Json import Settings, perfil_da_sessao
 from supabase import create_client, Client
+from snapshots import Snapshot, publicar
+import registro_io
+import singleflight
 
 
 # ==========================
@@ -16,7 +20,8 @@ def database() -> pd.DataFrame:
         raise RuntimeError("Defina 'supabase.url' e 'supabase.key' em st.secrets.")
 
     cli: Client = create_client(url, key)
-    res = cli.table("tblProjetos").select("*").execute()
+    # Projetos e Financeiro abrindo juntos: uma leitura só da tabela inteira
+    res = singleflight.executar("tblProjetos", url, lambda: registro_io.select(cli.table("tblProjetos").select("*"), "tblProjetos"))
     df = pd.DataFrame(res.data or [])
 
     expected_cols = [
@@ -30,32 +35,42 @@ def database() -> pd.DataFrame:
     return df
 
 
-df = database()
+def carregar_base() -> Snapshot:
+    """
+    Busca tblProjetos, deriva 'pronto' (datetime) e 'MesAno' uma única vez
+    e publica como snapshot Arrow mapeado em memória, compartilhado por
+    todas as sessões.
+    """
+    df = database()
+    df['pronto'] = pd.to_datetime(df['pronto'], errors='coerce')
+    df['MesAno'] = df['pronto'].dt.strftime('%Y-%m')
+    return publicar('tblProjetos', df)
+
+
+_base: Snapshot | None = None
+_base_lock = threading.Lock()
+
+
+def base() -> Snapshot:
+    """
+    Snapshot da base, carregado na primeira chamada (no aquecimento do
+    servidor ou no primeiro rerun), não no import do módulo.
+    """
+    global _base
+    with _base_lock:
+        if _base is None:
+            _base = carregar_base()
+        return _base
 
 
 # ==========================
 # Filtros / Transformações
 # ==========================
-def filtrar_por_data(df: pd.DataFrame, data_inicio, data_fim,
+def filtrar_por_data(df: Snapshot, data_inicio, data_fim,
                      vendedor=None, liberador=None, ambiente=None, loja=None) -> pd.DataFrame:
-    criterio = 'pronto'
-    df = df.copy()
-    df[criterio] = pd.to_datetime(df[criterio], errors='coerce')
-    di = pd.to_datetime(data_inicio)
-    df_ = pd.to_datetime(data_fim)
-
-    df['MesAno'] = df[criterio].dt.strftime('%Y-%m')
-    df_filtrado = df[(df[criterio] >= di) & (df[criterio] <= df_)]
-
-    if vendedor is not None:
-        df_filtrado = df_filtrado[df_filtrado['vendedor'] == vendedor]
-    if liberador is not None:
-        df_filtrado = df_filtrado[df_filtrado['liberador'] == liberador]
-    if ambiente is not None:
-        df_filtrado = df_filtrado[df_filtrado['tipoambiente'] == ambiente]
-    if loja is not None:
-        df_filtrado = df_filtrado[df_filtrado['loja'] == loja]
-    return df_filtrado
+    # filtro feito no Arrow: só as linhas do período viram DataFrame
+    return df.filtrar('pronto', data_inicio, data_fim,
+                      vendedor=vendedor, liberador=liberador, tipoambiente=ambiente, loja=loja)
 
 
 def dados(dataframe: pd.DataFrame, column: str) -> pd.DataFrame:
@@ -69,7 +84,7 @@ def dados(dataframe: pd.DataFrame, column: str) -> pd.DataFrame:
 # JSON (preferências)
 # ==========================
 def loading_json():
-    s = Settings()
+    s = Settings(perfil=perfil_da_sessao())
     data_inicial = s.key('data_inicial')
     data_final = s.key('data_final')
     cor_ambiente = s.key('cor_ambiente')
@@ -80,13 +95,15 @@ def loading_json():
 
 
 def update_json(data_inicio, data_fim, color1, color2, color3, color4):
-    s = Settings()
-    s.update_json('data_inicial', data_inicio)
-    s.update_json('data_final', data_fim)
-    s.update_json('cor_ambiente', color1)
-    s.update_json('cor_vendedor', color2)
-    s.update_json('cor_liberador', color3)
-    s.update_json('cor_periodo', color4)
+    s = Settings(perfil=perfil_da_sessao())
+    s.update({
+        'data_inicial': data_inicio,
+        'data_final': data_fim,
+        'cor_ambiente': color1,
+        'cor_vendedor': color2,
+        'cor_liberador': color3,
+        'cor_periodo': color4,
+    })
 
 
 # ==========================
@@ -111,7 +128,7 @@ def create_sidebar(data_inicial, data_final, cor_ambiente, cor_vendedor, cor_lib
             with c2:
                 data_fim = str(st.date_input('Data de Fim', value=pd.to_datetime(data_final), format='DD/MM/YYYY'))
 
-            data_set = filtrar_por_data(df, data_inicio, data_fim)
+            data_set = filtrar_por_data(base(), data_inicio, data_fim)
 
             vendedores = sorted(pd.Series(data_set['vendedor']).dropna().unique())
             liberadores = sorted(pd.Series(data_set['liberador']).dropna().unique())
@@ -141,7 +158,7 @@ def create_sidebar(data_inicial, data_final, cor_ambiente, cor_vendedor, cor_lib
 def create_grafs(data_inicio, data_fim, fVendedor, fLiberador, fambiente, floja,
                  color1, color2, color3, color4):
     try:
-        data_set = filtrar_por_data(df, data_inicio, data_fim, fVendedor, fLiberador, fambiente, floja)
+        data_set = filtrar_por_data(base(), data_inicio, data_fim, fVendedor, fLiberador, fambiente, floja)
         if data_set.empty:
             raise IndexError
 
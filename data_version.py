@@ -0,0 +1,116 @@
+import hashlib
+import logging
+import threading
+from typing import Dict, Tuple
+
+from supabase import Client
+
+import registro_io
+import singleflight
+
+logger = logging.getLogger(__name__)
+
+# -------------------------------------------------------------------
+# PROBE DE VERSÃO DOS DADOS
+# -------------------------------------------------------------------
+# Uma única consulta pequena via RPC exec_sql que devolve, por tabela,
+# (linhas, max ordemdecompra, max timestamp) e a soma dos contadores de
+# escrita de "dash_versao" (migrations/0004). Se nada mudou, o token
+# continua igual e os caches não precisam buscar as tabelas inteiras.
+#
+# O contador é o que pega edições que não mexem em data (pendencia,
+# urgente, observacoes, cliente...) e datas movidas para trás. Em banco
+# sem a migração 0004 o probe cai para a consulta sem contador, que só
+# vê linhas novas/removidas e datas novas; para esse caso os caches de
+# consulta do dashboard também têm TTL (dash_producao.DADOS_TTL).
+
+STAGE_COLUMNS = [
+    "corteinicio", "cortefim",
+    "customizacaoinicio", "customizacaofim",
+    "coladeirainicio", "coladeirafim",
+    "usinageminicio", "usinagemfim",
+    "montageminicio", "montagemfim",
+    "paineisinicio", "paineisfim",
+    "embalageminicio", "embalagemfim",
+    "separacao",  # SSeparacao do painel
+]
+
+# colunas de data de tblProjetos que mudam quando o projeto anda
+PROJECT_COLUMNS = ["iniciado", "pronto", "entrega", "dataentrega", "previsao"]
+
+
+def _greatest(alias: str, columns: list[str]) -> str:
+    cols = ", ".join(f'{alias}."{c}"::timestamp' for c in columns)
+    return f"GREATEST({cols})"
+
+
+_PROBE_COLS = f"""
+  (SELECT count(*) FROM "tblProjetos") AS "proj_linhas",
+  (SELECT max(p."ordemdecompra") FROM "tblProjetos" p) AS "proj_max_oc",
+  (SELECT max({_greatest("p", PROJECT_COLUMNS)}) FROM "tblProjetos" p) AS "proj_max_ts",
+  (SELECT count(*) FROM "tblProducao") AS "prod_linhas",
+  (SELECT max(pr."ordemdecompra") FROM "tblProducao" pr) AS "prod_max_oc",
+  (SELECT max({_greatest("pr", STAGE_COLUMNS)}) FROM "tblProducao" pr) AS "prod_max_ts"
+""".rstrip()
+
+VERSION_SQL = f"""
+SELECT{_PROBE_COLS},
+  (SELECT sum(v."versao") FROM "dash_versao" v) AS "contador"
+"""
+
+VERSION_SQL_SEM_CONTADOR = f"""
+SELECT{_PROBE_COLS}
+"""
+
+PROBE_KEYS: Tuple[str, ...] = (
+    "proj_linhas", "proj_max_oc", "proj_max_ts",
+    "prod_linhas", "prod_max_oc", "prod_max_ts",
+    "contador",
+)
+
+_lock = threading.Lock()
+_com_contador = True
+
+
+def _sem_tabela_de_versao(e: Exception) -> bool:
+    """Relação inexistente: a migração 0004 não foi aplicada neste banco."""
+    return getattr(e, "code", None) == "42P01" or "dash_versao" in str(e)
+
+
+def probe(cli: Client) -> Dict[str, object]:
+    """Executa o probe e devolve o dicionário cru (uma linha)."""
+    global _com_contador
+    resp = None
+    if _com_contador:
+        try:
+            resp = registro_io.select(cli.rpc("exec_sql", {"q": VERSION_SQL}), "versao", tipo="exec_sql")
+        except Exception as e:
+            if not _sem_tabela_de_versao(e):
+                raise
+            with _lock:
+                _com_contador = False
+            logger.warning("Tabela dash_versao ausente (migração 0004); probe sem contador de escritas.")
+    if resp is None:
+        resp = registro_io.select(cli.rpc("exec_sql", {"q": VERSION_SQL_SEM_CONTADOR}), "versao",
+                                  tipo="exec_sql")
+    rows = resp.data or []
+    norm = [r.get("exec_sql", r) for r in rows]
+    if not norm:
+        logger.warning("Probe de versão voltou vazio.")
+        return {k: None for k in PROBE_KEYS}
+    return {k: norm[0].get(k) for k in PROBE_KEYS}
+
+
+def version_token(info: Dict[str, object]) -> str:
+    """Token curto e estável a partir do resultado do probe."""
+    raw = "|".join(str(info.get(k)) for k in PROBE_KEYS)
+    return hashlib.sha1(raw.encode("utf-8")).hexdigest()[:16]
+
+
+def fetch_data_version(cli: Client) -> str:
+    """Probe + token: é a chave que todas as camadas de cache usam."""
+    # probes simultâneos contra o mesmo banco viram um só
+    destino = getattr(cli, "supabase_url", None) or id(cli)
+    token = version_token(singleflight.executar("data_version", destino, probe, cli))
+    logger.info(f"Versão dos dados: {token}")
+    return token
@@ -1,8 +1,22 @@
 from typing import Literal, Tuple, Dict
+from collections import OrderedDict
+from pathlib import Path
+import pickle
+import threading
+import numpy as np
 import pandas as pd
 import streamlit as st
-from supabase import create_client, Client
-from dash_projetos import data_inicial, data_final
+from supabase import Client
+from config import create_supabase_client
+from Json import Settings
+from data_version import fetch_data_version
+from sketches import KLLSketch, merge_all
+import formatacao
+import lead_times
+import pool
+import registro_io
+import singleflight
+import tarefas
 import logging
 
 # -------------------------------------------------------------------
@@ -16,33 +30,57 @@ if not logger.handlers:
     handler.setFormatter(formatter)
     logger.addHandler(handler)
 
+ETAPAS = ["corte", "customizacao", "coladeira", "usinagem", "montagem", "paineis", "embalagem"]
+STAGE_COLUMNS = [f"{e}{sufixo}" for e in ETAPAS for sufixo in ("inicio", "fim")]
+DURATION_COLUMNS = [f"Duração{e}Horas" for e in ETAPAS]
+# mês em que cada etapa terminou (meses desde 1970, NaN sem fim): chave dos sketches
+MES_COLUMNS = [f"Mes{e}Fim" for e in ETAPAS]
+
+CACHE_DIR = Path(".cache")
+MEMO_MAX = 32
+IN_CHUNK = 200  # ids por requisição no filtro in_() (limite de URL)
+
 
 # -------------------------------------------------------------------
 # SERVIÇO PRINCIPAL
 # -------------------------------------------------------------------
 class ProducaoService:
-    def __init__(self):
+    def __init__(self, cache_dir: Path | str = CACHE_DIR):
         # Aqui você pode injetar configs depois, se quiser
         self.cli = self._create_supabase_client()
+        # modo incremental: durações por linha (chave = assinatura das datas)
+        # e memo de estatísticas por (inicio, fim, versao)
+        self._lock = threading.Lock()
+        self._duracoes_path = Path(cache_dir) / "duracoes.parquet"
+        self._duracoes = self._load_duracoes()
+        self._memo: "OrderedDict[tuple, tuple]" = OrderedDict()
+        # distribuição de durações: um KLLSketch por (etapa, mês do fim),
+        # alimentado pelas mesmas linhas novas/alteradas do store acima
+        self._sketches_path = Path(cache_dir) / "sketches.pkl"
+        self._sketches = self._load_sketches()
 
     # -------- SUPABASE --------
     def _create_supabase_client(self) -> Client:
-        sb = st.secrets.get("supabase", {})
-        url = sb.get("url")
-        key = sb.get("key")
-
-        if not url or not key:
-            raise RuntimeError("Configure SUPABASE_URL e SUPABASE_KEY em st.secrets['supabase'].")
-
+        # st.secrets dentro do Streamlit; SUPABASE_* do ambiente/.env fora dele
         logger.info("Conectando ao Supabase...")
-        return create_client(url, key)
+        return create_supabase_client()
+
+    def data_version(self) -> str:
+        """Token de versão (probe de uma consulta) para chavear caches."""
+        return fetch_data_version(self.cli)
 
-    def load_raw_data(self) -> pd.DataFrame:
-        """Lê dados crus do Supabase e faz o JOIN."""
+    def load_raw_data(self, inicio: str | None = None, fim: str | None = None) -> pd.DataFrame:
+        """
+        Lê dados crus do Supabase e faz o JOIN.
+        Com inicio/fim o filtro de período vai para o PostgREST
+        (corteinicio >= inicio, cortefim <= fim) e tblProjetos é buscada
+        só para as ordens retornadas: o payload cresce com o período,
+        não com o histórico.
+        """
         cols_proj = [
             "ordemdecompra","cliente","contrato","datacontrato","dataassinatura",
             "chegoufabrica","dataentrega","iniciado","pronto","entrega",
-            "valorbruto","valornegociado"
+            "valorbruto","valornegociado","loja"
         ]
         cols_prod = [
             "ordemdecompra",
@@ -55,14 +93,29 @@ class ProducaoService:
             "embalageminicio","embalagemfim"
         ]
 
-        logger.info("Buscando dados de tblProjetos e tblProducao...")
-        df_proj = pd.DataFrame(
-            self.cli.table("tblProjetos").select(",".join(cols_proj)).execute().data or []
-        )
+        logger.info("Buscando dados de tblProducao...")
+        q_prod = self.cli.table("tblProducao").select(",".join(cols_prod))
+        if inicio is not None:
+            q_prod = q_prod.gte("corteinicio", inicio)
+        if fim is not None:
+            q_prod = q_prod.lte("cortefim", fim)
         df_prod = pd.DataFrame(
-            self.cli.table("tblProducao").select(",".join(cols_prod)).execute().data or []
+            registro_io.select(q_prod, "tblProducao", {"inicio": inicio, "fim": fim}).data or []
         )
 
+        logger.info("Buscando dados de tblProjetos...")
+        if inicio is None and fim is None:
+            df_proj = pd.DataFrame(
+                registro_io.select(self.cli.table("tblProjetos").select(",".join(cols_proj)), "tblProjetos").data or []
+            )
+        else:
+            ids = df_prod["ordemdecompra"].dropna().unique().tolist() if not df_prod.empty else []
+            rows: list = []
+            for i in range(0, len(ids), IN_CHUNK):
+                q = self.cli.table("tblProjetos").select(",".join(cols_proj)).in_("ordemdecompra", ids[i:i + IN_CHUNK])
+                rows += registro_io.select(q, "tblProjetos", {"in_ordemdecompra": len(ids[i:i + IN_CHUNK])}).data or []
+            df_proj = pd.DataFrame(rows)
+
         if df_proj.empty or df_prod.empty:
             logger.warning("Alguma das tabelas voltou vazia.")
             return pd.DataFrame(columns=cols_proj + cols_prod[1:])
@@ -86,19 +139,18 @@ class ProducaoService:
             'montageminicio','montagemfim',
             'paineisinicio','paineisfim',
             'embalageminicio','embalagemfim',
-        ]
+        ] + lead_times.MARCOS
         for col in cols_data:
             if col in df.columns:
                 df[col] = pd.to_datetime(df[col], errors="coerce")
         return df
 
     def filtrar_periodo(self, df: pd.DataFrame, inicio: str, fim: str) -> pd.DataFrame:
+        # colunas já convertidas em convert_datetime_columns; com o filtro
+        # empurrado para o Supabase isto é só uma conferência barata
         di = pd.to_datetime(inicio)
         df_ = pd.to_datetime(fim)
-        mask = (
-            (pd.to_datetime(df["corteinicio"]) >= di) &
-            (pd.to_datetime(df["cortefim"])   <= df_)
-        )
+        mask = (df["corteinicio"] >= di) & (df["cortefim"] <= df_)
         df_filtrado = df[mask].copy()
         logger.info(f"Registros após filtro de período: {len(df_filtrado)}")
         return df_filtrado
@@ -140,35 +192,21 @@ class ProducaoService:
 
     @staticmethod
     def decimal_to_hours(decimal_hours):
-        if pd.isna(decimal_hours):
-            return None
-        hours = int(decimal_hours)
-        minutes = int((decimal_hours - hours) * 60)
-        return f"{hours:02d}:{minutes:02d}"
+        return formatacao.horas_hhmm([decimal_hours])[0]
 
     def calcular_duracoes(self, df: pd.DataFrame) -> pd.DataFrame:
         logger.info("Calculando duração trabalhada por etapa...")
-        df["DuraçãocorteHoras"] = df.apply(
-            lambda r: self.calcular_duracao_trabalhada(r.corteinicio, r.cortefim), axis=1
-        )
-        df["DuraçãocustomizacaoHoras"] = df.apply(
-            lambda r: self.calcular_duracao_trabalhada(r.customizacaoinicio, r.customizacaofim), axis=1
-        )
-        df["DuraçãocoladeiraHoras"] = df.apply(
-            lambda r: self.calcular_duracao_trabalhada(r.coladeirainicio, r.coladeirafim), axis=1
-        )
-        df["DuraçãousinagemHoras"] = df.apply(
-            lambda r: self.calcular_duracao_trabalhada(r.usinageminicio, r.usinagemfim), axis=1
-        )
-        df["DuraçãomontagemHoras"] = df.apply(
-            lambda r: self.calcular_duracao_trabalhada(r.montageminicio, r.montagemfim), axis=1
-        )
-        df["DuraçãopaineisHoras"] = df.apply(
-            lambda r: self.calcular_duracao_trabalhada(r.paineisinicio, r.paineisfim), axis=1
-        )
-        df["DuraçãoembalagemHoras"] = df.apply(
-            lambda r: self.calcular_duracao_trabalhada(r.embalageminicio, r.embalagemfim), axis=1
-        )
+        # laço em Python puro: roda no pool de processos (fora do GIL do servidor)
+        pares = {
+            etapa: (
+                df[f"{etapa}inicio"].to_numpy(dtype="datetime64[ns]"),
+                df[f"{etapa}fim"].to_numpy(dtype="datetime64[ns]"),
+            )
+            for etapa in ETAPAS
+        }
+        horas = pool.run(tarefas.duracoes_trabalhadas, pares, linhas=len(df))
+        for etapa, col in zip(ETAPAS, DURATION_COLUMNS):
+            df[col] = horas[etapa]
         return df
 
     # -------- ESTATÍSTICAS --------
@@ -188,7 +226,7 @@ class ProducaoService:
             "embalagem":    _safe_mean(df["DuraçãoembalagemHoras"]),
         }
 
-        medias_hhmm = {k: self.decimal_to_hours(v) for k, v in medias_dec.items()}
+        medias_hhmm = dict(zip(medias_dec, formatacao.horas_hhmm(list(medias_dec.values()))))
 
         df_medias = pd.DataFrame(
             {"Etapa": list(medias_dec.keys()),
@@ -198,7 +236,7 @@ class ProducaoService:
             df_medias["HorasDecimal"] / df_medias["HorasDecimal"].sum() * 100
         ).round(1)
         df_medias["%"] = df_medias["Percentual"].astype(str) + "%"
-        df_medias["Media"] = df_medias["HorasDecimal"].apply(self.decimal_to_hours)
+        df_medias["Media"] = formatacao.horas_hhmm(df_medias["HorasDecimal"].to_numpy())
 
         logger.info("Estatísticas calculadas com sucesso.")
         return df_medias, medias_dec, medias_hhmm
@@ -214,23 +252,255 @@ class ProducaoService:
         - lê Supabase
         - converte datas
         - filtra período
-        - calcula durações
+        - calcula durações e lead times
         - calcula estatísticas
         """
-        df_raw = self.load_raw_data()
+        df_raw = self.load_raw_data(inicio, fim)
         df_raw = self.convert_datetime_columns(df_raw)
         df_filtrado = self.filtrar_periodo(df_raw, inicio, fim)
         df_filtrado = self.calcular_duracoes(df_filtrado)
+        df_filtrado = lead_times.calcular_lead_times(df_filtrado)
         df_medias, medias_dec, medias_hhmm = self.calcular_estatisticas(df_filtrado)
         return df_filtrado, df_medias, medias_dec, medias_hhmm
 
+    # -------- MODO INCREMENTAL --------
+    @staticmethod
+    def assinatura(df: pd.DataFrame) -> pd.Series:
+        """Hash de (ordemdecompra + datas das etapas): muda se qualquer data mudar."""
+        cols = ["ordemdecompra"] + [c for c in STAGE_COLUMNS if c in df.columns]
+        return pd.util.hash_pandas_object(df[cols], index=False)
+
+    def _load_duracoes(self) -> pd.DataFrame:
+        if self._duracoes_path.exists():
+            try:
+                store = pd.read_parquet(self._duracoes_path)
+                if "ordemdecompra" not in store.columns or not set(MES_COLUMNS) <= set(store.columns):
+                    raise ValueError("formato antigo, sem ordemdecompra / mês de fim das etapas")
+                logger.info(f"Durações persistidas carregadas: {len(store)} linhas")
+                return store
+            except Exception as e:
+                logger.warning(f"Falha ao ler {self._duracoes_path}: {e}")
+        return pd.DataFrame(columns=["ordemdecompra"] + DURATION_COLUMNS + MES_COLUMNS, dtype="float64")
+
+    def _save_duracoes(self) -> None:
+        try:
+            self._duracoes_path.parent.mkdir(parents=True, exist_ok=True)
+            tmp = self._duracoes_path.with_suffix(".tmp")
+            self._duracoes.to_parquet(tmp)
+            tmp.replace(self._duracoes_path)
+        except Exception as e:
+            logger.warning(f"Não foi possível persistir durações: {e}")
+
+    def duracoes_incrementais(self, df: pd.DataFrame) -> pd.DataFrame:
+        """
+        Anexa as colunas de duração usando o store persistido; só linhas
+        novas ou com datas alteradas passam por calcular_duracoes. O lock
+        só cobre ler as assinaturas conhecidas e mesclar/persistir: o
+        cálculo no pool roda fora dele, sem travar os cache hits das
+        outras sessões (memo do pipeline, sketches). As mesmas linhas
+        alimentam os sketches (_atualizar_sketches).
+        """
+        df = df.copy()
+        sig = self.assinatura(df)
+        with self._lock:
+            conhecidas = self._duracoes.index
+        faltando = ~sig.isin(conhecidas)
+        if faltando.any():
+            novos = self.calcular_duracoes(df.loc[faltando.values].copy())
+            for etapa, col in zip(ETAPAS, MES_COLUMNS):
+                mes = novos[f"{etapa}fim"].to_numpy(dtype="datetime64[ns]").astype("datetime64[M]")
+                novos[col] = np.where(np.isnat(mes), np.nan, mes.astype("int64"))
+            novos = novos[["ordemdecompra"] + DURATION_COLUMNS + MES_COLUMNS].set_axis(sig[faltando].values)
+            novos = novos[~novos.index.duplicated()]
+            with self._lock:
+                # outra sessão pode ter gravado as mesmas linhas enquanto isso
+                novos = novos[~novos.index.isin(self._duracoes.index)]
+                # df pode ser só um período: descarta apenas as assinaturas
+                # antigas das ordens presentes aqui (linhas alteradas)
+                antigas = (
+                    self._duracoes["ordemdecompra"].isin(df["ordemdecompra"])
+                    & ~self._duracoes.index.isin(sig.values)
+                )
+                vivos = self._duracoes[~antigas]
+                retiradas = self._duracoes[antigas]
+                self._duracoes = pd.concat([vivos, novos]) if len(vivos) else novos
+                self._atualizar_sketches(novos, retiradas)
+                self._save_duracoes()
+                self._save_sketches()
+            logger.info(f"Durações recalculadas: {int(faltando.sum())} de {len(df)} linhas")
+        with self._lock:
+            duracoes = self._duracoes.reindex(sig.values)
+        for col in DURATION_COLUMNS:
+            df[col] = duracoes[col].to_numpy()
+        return df
+
+    # -------- DISTRIBUIÇÃO (SKETCHES) --------
+    # Um KLLSketch por (etapa, mês do fim), persistido em sketches.pkl.
+    # Linhas novas (assinatura inédita no store de durações) entram com
+    # update; KLL não remove itens, então o par (etapa, mês) de uma linha
+    # alterada/retirada é remontado a partir do store local (só as linhas
+    # daquele mês). Custo por escrita ~ linhas alteradas, nunca uma nova
+    # leitura de tblProducao. Cobre toda ordem que já passou pelo serviço
+    # (períodos consultados no dashboard e no batch).
+    def _load_sketches(self) -> Dict[Tuple[str, str], KLLSketch]:
+        if self._sketches_path.exists():
+            try:
+                with open(self._sketches_path, "rb") as f:
+                    sketches = pickle.load(f)
+                if not isinstance(sketches, dict):
+                    raise ValueError("formato antigo")
+                # sketches e store gravados juntos; se divergirem (queda no
+                # meio da gravação), remonta do store
+                if sum(sk.n for sk in sketches.values()) == self._itens_do_store(self._duracoes):
+                    return sketches
+                logger.warning("Sketches fora de sincronia com o store de durações; remontando.")
+            except Exception as e:
+                logger.warning(f"Falha ao ler {self._sketches_path}: {e}")
+        return self._sketches_do_store(self._duracoes)
+
+    def _save_sketches(self) -> None:
+        try:
+            self._sketches_path.parent.mkdir(parents=True, exist_ok=True)
+            tmp = self._sketches_path.with_suffix(".tmp")
+            with open(tmp, "wb") as f:
+                pickle.dump(self._sketches, f)
+            tmp.replace(self._sketches_path)
+        except Exception as e:
+            logger.warning(f"Não foi possível persistir sketches: {e}")
+
+    @staticmethod
+    def _pares_sketch(store: pd.DataFrame):
+        """(etapa, 'AAAA-MM') -> horas do store. Duração 0 (etapa pulada) fica fora."""
+        for etapa, c_horas, c_mes in zip(ETAPAS, DURATION_COLUMNS, MES_COLUMNS):
+            horas = store[c_horas].to_numpy(dtype="float64")
+            meses = store[c_mes].to_numpy(dtype="float64")
+            ok = ~np.isnan(meses) & (horas > 0)
+            if not ok.any():
+                continue
+            meses = meses[ok].astype("int64")
+            horas = horas[ok]
+            ordem = np.argsort(meses, kind="stable")
+            unicos, inicios = np.unique(meses[ordem], return_index=True)
+            for mes, bloco in zip(unicos, np.split(horas[ordem], inicios[1:])):
+                yield (etapa, str(np.datetime64(int(mes), "M"))), bloco
+
+    @classmethod
+    def _itens_do_store(cls, store: pd.DataFrame) -> int:
+        return sum(len(bloco) for _, bloco in cls._pares_sketch(store))
+
+    @classmethod
+    def _sketches_do_store(cls, store: pd.DataFrame) -> Dict[Tuple[str, str], KLLSketch]:
+        sketches: Dict[Tuple[str, str], KLLSketch] = {}
+        for chave, bloco in cls._pares_sketch(store):
+            sk = sketches[chave] = KLLSketch()
+            sk.update_many(bloco)
+        return sketches
+
+    def _atualizar_sketches(self, novos: pd.DataFrame, retiradas: pd.DataFrame) -> None:
+        """Chamado com o lock, depois de mesclar `novos` e tirar `retiradas` do store."""
+        tocados = {chave for chave, _ in self._pares_sketch(retiradas)}
+        for chave, bloco in self._pares_sketch(novos):
+            if chave not in tocados:
+                self._sketches.setdefault(chave, KLLSketch()).update_many(bloco)
+        if tocados:
+            etapas = {e for e, _ in tocados}
+            meses = {m for _, m in tocados}
+            # só as linhas do store com fim nesses meses
+            mascara = np.zeros(len(self._duracoes), dtype=bool)
+            for etapa, c_mes in zip(ETAPAS, MES_COLUMNS):
+                if etapa in etapas:
+                    col = self._duracoes[c_mes].to_numpy(dtype="float64")
+                    mascara |= np.isin(col, [np.datetime64(m, "M").astype("int64") for m in meses])
+            refeitos = {c: sk for c, sk in self._sketches_do_store(self._duracoes[mascara]).items() if c in tocados}
+            for chave in tocados:
+                if chave in refeitos:
+                    self._sketches[chave] = refeitos[chave]
+                else:
+                    self._sketches.pop(chave, None)
+            logger.info(f"Sketches remontados: {len(tocados)} (etapa, mês) tocados por linhas alteradas")
+
+    def distribuicao_etapas(self, inicio: str, fim: str) -> pd.DataFrame:
+        """
+        p50/p90/p99/min/max/n (horas) por etapa, mesclando os sketches dos
+        meses do período (granularidade mensal). O pipeline do período
+        (memorizado por versão) passa antes, para que as linhas novas ou
+        alteradas dele já estejam nos sketches.
+        """
+        self._pipeline(inicio, fim)
+        meses = {p.strftime("%Y-%m") for p in pd.period_range(inicio, fim, freq="M")}
+        with self._lock:
+            por_etapa = {
+                etapa: merge_all(s for (e, mes), s in self._sketches.items() if e == etapa and mes in meses)
+                for etapa in ETAPAS
+            }
+        linhas = []
+        for etapa, sk in por_etapa.items():
+            p50, p90, p99 = sk.quantiles([0.5, 0.9, 0.99])
+            linhas.append({
+                "Etapa": etapa, "p50": p50, "p90": p90, "p99": p99,
+                "min": sk.min if sk.n else float("nan"),
+                "max": sk.max if sk.n else float("nan"),
+                "n": sk.n,
+            })
+        return pd.DataFrame(linhas)
+
+    def run_pipeline_incremental(
+        self,
+        inicio: str,
+        fim: str,
+    ) -> Tuple[pd.DataFrame, pd.DataFrame, Dict, Dict]:
+        """
+        Igual ao run_pipeline, mas:
+        - memoriza o resultado por (inicio, fim, versao dos dados)
+        - reaproveita as durações persistidas, recalculando só o que mudou
+        """
+        return self._pipeline(inicio, fim)[:4]
+
+    def lead_times(self, inicio: str, fim: str) -> pd.DataFrame:
+        """
+        Lead times do período por cliente / loja e mês (lead_times.resumir),
+        calculados e memorizados junto com o pipeline: sem consultas extras.
+        """
+        return self._pipeline(inicio, fim)[4]
+
+    def _pipeline(self, inicio: str, fim: str) -> tuple:
+        versao = self.data_version()
+        chave = (inicio, fim, versao)
+        with self._lock:
+            if chave in self._memo:
+                self._memo.move_to_end(chave)
+                logger.info(f"Pipeline em cache para {chave}")
+                registro_io.registrar(registro_io.Consulta(
+                    "select", "tblProducao", registro_io.parametros({"inicio": inicio, "fim": fim}),
+                    len(self._memo[chave][0]), cache="hit",
+                ))
+                return self._memo[chave]
+        # sessões pedindo o mesmo período ao mesmo tempo esperam um único cálculo
+        return singleflight.executar("pipeline", chave, self._calcular_pipeline, inicio, fim, chave)
+
+    def _calcular_pipeline(self, inicio: str, fim: str, chave: tuple) -> tuple:
+        df_raw = self.load_raw_data(inicio, fim)
+        df_raw = self.convert_datetime_columns(df_raw)
+        df_raw = self.duracoes_incrementais(df_raw)
+        df_filtrado = self.filtrar_periodo(df_raw, inicio, fim)
+        df_filtrado = lead_times.calcular_lead_times(df_filtrado)
+        resultado = (df_filtrado, *self.calcular_estatisticas(df_filtrado), lead_times.resumir(df_filtrado))
+
+        with self._lock:
+            self._memo[chave] = resultado
+            while len(self._memo) > MEMO_MAX:
+                self._memo.popitem(last=False)
+        return resultado
+
 
 def main():
     st.title("Dashboard de Produção")
 
     service = ProducaoService()
 
-    # Exemplo usando as datas do módulo dash_projetos
+    # Exemplo usando o período salvo no Settings.json
+    s = Settings()
+    data_inicial, data_final = s.key('data_inicial'), s.key('data_final')
     df, df_medias, medias_dec, medias_hhmm = service.run_pipeline(
         data_inicial, data_final
     )
@@ -0,0 +1,88 @@
+from typing import Dict, Iterable, Optional
+
+import numpy as np
+import pandas as pd
+
+# -------------------------------------------------------------------
+# LOG DE EVENTOS DE ETAPA (WIP)
+# -------------------------------------------------------------------
+# tblProducao guarda início/fim de cada etapa em 14 colunas largas.
+# Aqui elas viram um log (ordem, etapa, tipo, ts) ordenado por ts e,
+# por etapa, um vetor de timestamps com o saldo acumulado
+# (+1 no início, -1 no fim). "Quantas ordens em usinagem no instante T"
+# vira um searchsorted + leitura do acumulado: O(log n) por consulta.
+
+ETAPAS = ["corte", "customizacao", "coladeira", "usinagem", "montagem", "paineis", "embalagem"]
+
+
+class EventLog:
+    def __init__(self, eventos: pd.DataFrame) -> None:
+        self.eventos = eventos
+        self._ts: Dict[str, np.ndarray] = {}
+        self._saldo: Dict[str, np.ndarray] = {}
+        for etapa, grupo in eventos.groupby("etapa", sort=False):
+            self._ts[etapa] = grupo["ts"].to_numpy(dtype="datetime64[ns]")
+            self._saldo[etapa] = np.cumsum(grupo["delta"].to_numpy(dtype="int64"))
+
+    @classmethod
+    def from_wide(cls, df: pd.DataFrame, etapas: Iterable[str] = ETAPAS) -> "EventLog":
+        """
+        Monta o log a partir das colunas {etapa}inicio/{etapa}fim.
+        Etapa sem início (ou com fim antes do início) é ignorada; etapa
+        iniciada e não finalizada fica em WIP até ser finalizada.
+        """
+        partes = []
+        for etapa in etapas:
+            ini = pd.to_datetime(df[f"{etapa}inicio"], errors="coerce")
+            fim = pd.to_datetime(df[f"{etapa}fim"], errors="coerce")
+            valido = ini.notna() & ~(fim < ini)
+            oc = df.loc[valido, "ordemdecompra"].to_numpy()
+            partes.append(pd.DataFrame({
+                "ordemdecompra": oc, "etapa": etapa, "tipo": "inicio",
+                "ts": ini[valido].to_numpy(), "delta": 1,
+            }))
+            fechado = valido & fim.notna()
+            partes.append(pd.DataFrame({
+                "ordemdecompra": df.loc[fechado, "ordemdecompra"].to_numpy(), "etapa": etapa,
+                "tipo": "fim", "ts": fim[fechado].to_numpy(), "delta": -1,
+            }))
+        eventos = pd.concat(partes, ignore_index=True) if partes else pd.DataFrame(
+            columns=["ordemdecompra", "etapa", "tipo", "ts", "delta"]
+        )
+        # no mesmo instante o fim vem antes do início (delta -1 < +1)
+        eventos = eventos.sort_values(["ts", "delta"], kind="stable", ignore_index=True)
+        return cls(eventos)
+
+    @property
+    def etapas(self) -> list:
+        return list(self._ts.keys())
+
+    def wip_at(self, etapa: str, quando) -> int:
+        """Ordens em andamento na etapa no instante `quando`."""
+        ts = self._ts.get(etapa)
+        if ts is None or not len(ts):
+            return 0
+        i = np.searchsorted(ts, np.datetime64(pd.Timestamp(quando), "ns"), side="right")
+        return int(self._saldo[etapa][i - 1]) if i else 0
+
+    def wip_series(self, etapa: str, instantes) -> np.ndarray:
+        """WIP da etapa para vários instantes de uma vez (vetorizado)."""
+        ts = self._ts.get(etapa)
+        pontos = pd.DatetimeIndex(instantes).to_numpy(dtype="datetime64[ns]")
+        if ts is None or not len(ts):
+            return np.zeros(len(pontos), dtype="int64")
+        i = np.searchsorted(ts, pontos, side="right")
+        saldo = np.concatenate([[0], self._saldo[etapa]])
+        return saldo[i]
+
+    def wip_range(self, inicio, fim, freq: str = "D", etapas: Optional[Iterable[str]] = None) -> pd.DataFrame:
+        """
+        WIP por etapa amostrado em [inicio, fim] (frequência `freq`),
+        no formato longo (data, etapa, wip) pronto para o Altair.
+        """
+        instantes = pd.date_range(pd.Timestamp(inicio), pd.Timestamp(fim), freq=freq)
+        linhas = [
+            pd.DataFrame({"data": instantes, "etapa": etapa, "wip": self.wip_series(etapa, instantes)})
+            for etapa in (etapas or ETAPAS)
+        ]
+        return pd.concat(linhas, ignore_index=True)
@@ -0,0 +1,132 @@
+from functools import lru_cache
+from typing import Dict, Tuple
+
+import numpy as np
+import pandas as pd
+from babel import Locale
+from babel.numbers import get_currency_symbol, get_decimal_symbol, get_group_symbol
+
+# -------------------------------------------------------------------
+# FORMATAÇÃO pt_BR VETORIZADA
+# -------------------------------------------------------------------
+# Antes, cada número passava pelo babel (format_currency/format_decimal
+# montam e interpretam o padrão do locale a cada chamada), cada duração
+# por um .apply e as datas eram convertidas em texto na tabela inteira
+# antes de paginar. Aqui:
+#   - o padrão do locale é lido do babel UMA vez (lru_cache) e os
+#     números de um array inteiro são formatados com ele (cada valor
+#     distinto uma vez);
+#   - hh:mm sai de aritmética NumPy sobre o array de horas;
+#   - datas continuam datetime64 até a renderização, e só as linhas
+#     visíveis (página da tabela) viram texto.
+# O arredondamento é o do float (half-even sobre o valor binário); o
+# babel arredonda a representação decimal, então os dois só diferem em
+# empates exatos de meio centavo.
+
+LOCALE = "pt_BR"
+MOEDA = "BRL"
+DATA = "%d/%m/%Y"
+DATA_HORA = "%d/%m/%Y %H:%M"
+DATA_HORA_SEG = "%d/%m/%Y %H:%M:%S"
+
+
+@lru_cache(maxsize=None)
+def _padrao(locale: str, moeda: str | None) -> Tuple[str, str, int, int, Dict[int, str]]:
+    """(prefixo, sufixo, máx. casas, min. casas, tabela de tradução) do padrão do locale."""
+    loc = Locale.parse(locale)
+    if moeda:
+        p = loc.currency_formats["standard"]
+        simbolo = get_currency_symbol(moeda, locale)
+        prefixo, sufixo = (s.replace("¤", simbolo) for s in (p.prefix[0], p.suffix[0]))
+    else:
+        p = loc.decimal_formats[None]
+        prefixo, sufixo = p.prefix[0], p.suffix[0]
+    traducao = str.maketrans({",": get_group_symbol(locale), ".": get_decimal_symbol(locale)})
+    return prefixo, sufixo, p.frac_prec[1], p.frac_prec[0], traducao
+
+
+def _numeros(valores, moeda: str | None, locale: str) -> np.ndarray:
+    prefixo, sufixo, casas, minimo, traducao = _padrao(locale, moeda)
+    x = np.asarray(valores, dtype="float64").ravel()
+    nan = np.isnan(x)
+    arred = np.round(np.where(nan, 0.0, x), casas)
+    negativo = np.signbit(x) & ~nan  # -0.0 sai com sinal, como no babel
+    # só os valores distintos são formatados (tabelas repetem muito valor:
+    # zeros, preços de tabela); o resultado volta por indexação
+    unicos, posicao = np.unique(np.abs(arred), return_inverse=True)
+    fmt = f"{{:,.{casas}f}}".format
+    corpo = [fmt(v) for v in unicos]
+    if minimo < casas:
+        # casas opcionais (padrão #,##0.###): tira zeros e a vírgula sobrando
+        corpo = [c.rstrip("0").rstrip(".") for c in corpo]
+    corpo = [prefixo + c.translate(traducao) + sufixo for c in corpo]
+    positivo = np.array(corpo, dtype=object)
+    negativo_txt = np.array(["-" + c for c in corpo], dtype=object)
+    posicao = posicao.ravel()
+    out = np.where(negativo, negativo_txt[posicao], positivo[posicao])
+    out[nan] = None
+    return out.reshape(np.shape(valores))
+
+
+def moeda(valores, moeda: str = MOEDA, locale: str = LOCALE) -> np.ndarray:
+    """Array de valores -> array de textos no formato de moeda do locale (R$ 1.234,56)."""
+    return _numeros(valores, moeda, locale)
+
+
+def decimal(valores, locale: str = LOCALE) -> np.ndarray:
+    """Array de valores -> textos no formato decimal do locale (1.234,567)."""
+    return _numeros(valores, None, locale)
+
+
+def moeda_valor(valor: float, moeda: str = MOEDA, locale: str = LOCALE) -> str:
+    return _numeros([valor], moeda, locale)[0]
+
+
+def decimal_valor(valor: float, locale: str = LOCALE) -> str:
+    return _numeros([valor], None, locale)[0]
+
+
+def horas_hhmm(valores) -> np.ndarray:
+    """
+    Horas decimais -> 'hh:mm' (minutos truncados, como decimal_to_hours).
+    NaN vira None.
+    """
+    x = np.asarray(valores, dtype="float64")
+    nan = np.isnan(x)
+    x0 = np.where(nan, 0.0, x)
+    h = np.trunc(x0).astype("int64")
+    m = np.trunc((x0 - h) * 60).astype("int64")
+    out = np.char.add(np.char.add(np.char.zfill(h.astype(str), 2), ":"),
+                      np.char.zfill(m.astype(str), 2)).astype(object)
+    out[nan] = None
+    return out
+
+
+def numero_texto(valores) -> pd.Series:
+    """
+    Códigos numéricos (codcc, contrato) como texto sem '.0'. Substitui o
+    astype(str).rstrip('0').rstrip('.'), que também comia zeros de
+    inteiros (100 -> '1').
+    """
+    s = pd.Series(valores)
+    if not pd.api.types.is_numeric_dtype(s):
+        # texto vindo do banco: só o sufixo '.0' sai (zeros à esquerda ficam)
+        return s.astype(str).str.replace(r"\.0+$", "", regex=True)
+    inteiro = (s.notna() & (s % 1 == 0)).to_numpy()
+    out = s.astype(str).to_numpy(dtype=object, copy=True)
+    out[inteiro] = s[inteiro].astype("int64").astype(str).to_numpy(dtype=object)
+    return pd.Series(out, index=s.index)
+
+
+def datas(valores, fmt: str = DATA) -> np.ndarray:
+    """datetime64 -> texto (NaT vira ''). Aplicar só nas linhas que vão para a tela."""
+    s = pd.to_datetime(pd.Series(np.asarray(valores).ravel()), errors="coerce")
+    return s.dt.strftime(fmt).fillna("").to_numpy(dtype=object)
+
+
+def formatar_datas(df: pd.DataFrame, formatos: Dict[str, str]) -> pd.DataFrame:
+    """Cópia de `df` (a página visível) com as colunas de `formatos` em texto."""
+    out = df.copy()
+    for coluna, fmt in formatos.items():
+        out[coluna] = datas(out[coluna], fmt)
+    return out
@@ -0,0 +1,82 @@
+import functools
+import hashlib
+import logging
+from typing import Callable, Dict
+
+import pandas as pd
+import streamlit as st
+
+logger = logging.getLogger(__name__)
+
+# -------------------------------------------------------------------
+# FRAGMENTOS COM DEPENDÊNCIAS EXPLÍCITAS
+# -------------------------------------------------------------------
+# Cada bloco do dashboard (KPIs, grupo de gráficos, aba) vira um
+# st.fragment que recebe SOMENTE as entradas de que depende. Widgets
+# dentro do fragmento disparam rerun só dele; o cálculo pesado fica em
+# funções st.cache_data chaveadas pelas mesmas entradas, então um
+# rerun completo com entradas iguais não recalcula nada.
+#
+# Contagem por fragmento em st.session_state[STATS_KEY]:
+#   runs    -> quantas vezes o corpo executou
+#   changed -> quantas vezes as entradas mudaram em relação ao run anterior
+# A mudança é vista por uma chave barata: repr das entradas escalares
+# (período, versão dos dados) ou, para fragmentos que recebem
+# DataFrames, a `chave=` passada por quem chama (versão + filtros que
+# geraram o frame). Nada de hash do conteúdo a cada run.
+#
+# Só a Produção tem fragmentos: Projetos e Financeiro não têm widgets
+# fora do formulário da sidebar, então todo rerun deles é completo e um
+# fragmento não pouparia nada.
+
+STATS_KEY = "_fragment_stats"
+
+
+def _fingerprint(value) -> str:
+    if isinstance(value, (pd.DataFrame, pd.Series)):
+        # conteúdo não é lido: quem passa frames informa chave=
+        return f"{type(value).__name__}:{value.shape}"
+    return repr(value)
+
+
+def inputs_key(*args, **kwargs) -> str:
+    raw = "|".join(_fingerprint(a) for a in args)
+    raw += "|" + "|".join(f"{k}={_fingerprint(v)}" for k, v in sorted(kwargs.items()))
+    return hashlib.sha1(raw.encode("utf-8")).hexdigest()[:16]
+
+
+def fragment(nome: str) -> Callable:
+    """
+    Decorador: st.fragment + contagem de reruns/mudança de entradas. A
+    função decorada aceita `chave=` (não repassada a ela) identificando
+    as entradas; sem ela, a chave sai das entradas escalares.
+    """
+    def deco(fn: Callable) -> Callable:
+        @functools.wraps(fn)
+        def contado(*args, chave=None, **kwargs):
+            stats: Dict[str, dict] = st.session_state.setdefault(STATS_KEY, {})
+            s = stats.setdefault(nome, {"runs": 0, "changed": 0, "last": None})
+            chave = inputs_key(*args, **kwargs) if chave is None else repr(chave)
+            s["runs"] += 1
+            if chave != s["last"]:
+                s["changed"] += 1
+                s["last"] = chave
+            logger.debug(f"fragmento {nome}: run {s['runs']} (mudou {s['changed']})")
+            return fn(*args, **kwargs)
+        return st.fragment(contado)
+    return deco
+
+
+def fragment_stats() -> pd.DataFrame:
+    stats = st.session_state.get(STATS_KEY, {})
+    return pd.DataFrame(
+        [{"Fragmento": k, "Reruns": v["runs"], "Entradas mudaram": v["changed"]}
+         for k, v in stats.items()],
+        columns=["Fragmento", "Reruns", "Entradas mudaram"],
+    )
+
+
+def show_stats() -> None:
+    """Tabela de diagnóstico (usada no sidebar do novo.py)."""
+    with st.expander("Diagnóstico de reruns"):
+        st.dataframe(fragment_stats(), hide_index=True, use_container_width=True)
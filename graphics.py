@@ -1,7 +1,6 @@
 import altair as alt
 import pandas as pd
 import streamlit as st
-from babel.numbers import format_currency, format_decimal
 
 class Graph:
     def __init__(self, dataframe: pd.DataFrame):
@@ -9,11 +8,6 @@ class Graph:
         self.result = dataframe  # evita attribute error
 
     # ========= Helpers =========
-    def convert_value(self, number: float, *, currency=False):
-        if currency:
-            return format_currency(number, "BRL", locale="pt_BR")
-        return format_decimal(number, locale="pt_BR")
-
     def _label_color(self, label_theme: str | None) -> str:
         """
         Recebe 'dark' | 'light' | None e retorna cor do texto.
@@ -0,0 +1,185 @@
+import logging
+import threading
+from itertools import combinations
+from pathlib import Path
+from typing import Dict, Optional, Tuple
+
+import numpy as np
+import pandas as pd
+
+logger = logging.getLogger(__name__)
+
+# -------------------------------------------------------------------
+# KPIs FINANCEIROS MENSAIS MATERIALIZADOS
+# -------------------------------------------------------------------
+# Cubo mensal por (mes, loja, vendedor, tipoambiente, liberador) com
+# soma de valornegociado, valorbruto, desconto (bruto - negociado) e
+# número de pedidos. A manutenção é incremental por mês: cada mês tem
+# um resumo (soma dos hashes das linhas + contagem) e só os meses cujo
+# resumo mudou são reagregados a partir da base.
+#
+# Para consulta, o cubo vira um rollup com todos os conjuntos de
+# agrupamento ("*" = todos) e somas acumuladas no tempo dentro de cada
+# grupo: o total de um intervalo de meses é acum[fim] - acum[ini - 1],
+# duas buscas em O(log meses), sem varrer linhas.
+
+CACHE_DIR = Path(".cache")
+DIMENSOES = ['loja', 'vendedor', 'tipoambiente', 'liberador']
+MEDIDAS = ['valornegociado', 'valorbruto', 'desconto', 'pedidos']
+TODOS = '*'
+
+_lock = threading.Lock()
+
+
+def _mes_ordinal(datas: pd.Series) -> pd.Series:
+    return (datas.dt.year * 12 + datas.dt.month - 1).astype('Int64')
+
+
+def ordinal_para_mes(ordinal: int) -> str:
+    return f"{ordinal // 12:04d}-{ordinal % 12 + 1:02d}"
+
+
+def mes_para_ordinal(data) -> int:
+    ts = pd.Timestamp(data)
+    return ts.year * 12 + ts.month - 1
+
+
+def _preparar(df: pd.DataFrame) -> pd.DataFrame:
+    """Colunas do cubo, com o mês (ordinal) de 'pronto'; linhas sem 'pronto' ficam fora."""
+    pronto = pd.to_datetime(df['pronto'], errors='coerce')
+    out = pd.DataFrame({'mes': _mes_ordinal(pronto)})
+    for dim in DIMENSOES:
+        out[dim] = df[dim].astype('string').fillna('') if dim in df else ''
+    out['valornegociado'] = pd.to_numeric(df['valornegociado'], errors='coerce').fillna(0.0)
+    out['valorbruto'] = pd.to_numeric(df['valorbruto'], errors='coerce').fillna(0.0)
+    out['desconto'] = out['valorbruto'] - out['valornegociado']
+    out['pedidos'] = 1
+    return out[out['mes'].notna()].astype({'mes': 'int64'})
+
+
+def _resumo_mensal(base: pd.DataFrame) -> pd.DataFrame:
+    """Por mês: soma (mod 2^64) dos hashes das linhas e contagem; muda se qualquer linha mudar."""
+    h = pd.util.hash_pandas_object(base, index=False)
+    return h.groupby(base['mes'].to_numpy()).agg(['sum', 'count']).rename_axis('mes')
+
+
+def _agregar(base: pd.DataFrame) -> pd.DataFrame:
+    return base.groupby(['mes'] + DIMENSOES, as_index=False)[MEDIDAS].sum()
+
+
+class CuboFinanceiro:
+    """Cubo mensal persistido em disco e mantido incrementalmente."""
+
+    def __init__(self, cache_dir: Path | str = CACHE_DIR) -> None:
+        self._cubo_path = Path(cache_dir) / "kpis_financeiros.parquet"
+        self._resumo_path = Path(cache_dir) / "kpis_financeiros_meses.parquet"
+        self.cubo, self.resumo = self._load()
+
+    def _load(self) -> Tuple[pd.DataFrame, pd.DataFrame]:
+        if self._cubo_path.exists() and self._resumo_path.exists():
+            try:
+                return pd.read_parquet(self._cubo_path), pd.read_parquet(self._resumo_path)
+            except Exception as e:
+                logger.warning(f"Falha ao ler cubo financeiro: {e}")
+        vazio = pd.DataFrame({c: pd.Series(dtype='int64' if c in ('mes', 'pedidos') else
+                                           'string' if c in DIMENSOES else 'float64')
+                              for c in ['mes'] + DIMENSOES + MEDIDAS})
+        return vazio, pd.DataFrame({'sum': pd.Series(dtype='uint64'), 'count': pd.Series(dtype='int64')},
+                                   index=pd.Index([], name='mes', dtype='int64'))
+
+    def _save(self) -> None:
+        try:
+            self._cubo_path.parent.mkdir(parents=True, exist_ok=True)
+            for df, path in ((self.cubo, self._cubo_path), (self.resumo, self._resumo_path)):
+                tmp = path.with_suffix(".tmp")
+                df.to_parquet(tmp)
+                tmp.replace(path)
+        except Exception as e:
+            logger.warning(f"Não foi possível persistir o cubo financeiro: {e}")
+
+    def atualizar(self, df: pd.DataFrame) -> int:
+        """
+        Sincroniza o cubo com a base `df` (tblProjetos inteira). Reagrega só
+        os meses novos/alterados e remove os que sumiram. Devolve quantos
+        meses foram recalculados.
+        """
+        base = _preparar(df)
+        resumo = _resumo_mensal(base)
+        with _lock:
+            antigo = self.resumo.reindex(resumo.index)
+            mudou = resumo.index[(antigo['sum'] != resumo['sum']) | (antigo['count'] != resumo['count'])]
+            sumiu = self.resumo.index.difference(resumo.index)
+            if len(mudou) == 0 and len(sumiu) == 0:
+                return 0
+            manter = ~self.cubo['mes'].isin(mudou.union(sumiu))
+            novos = _agregar(base[base['mes'].isin(mudou)])
+            partes = [p for p in (self.cubo[manter], novos) if not p.empty]
+            self.cubo = (pd.concat(partes, ignore_index=True) if partes else novos).sort_values('mes', ignore_index=True)
+            self.resumo = resumo
+            self._save()
+        logger.info(f"Cubo financeiro: {len(mudou)} mês(es) recalculado(s), {len(sumiu)} removido(s)")
+        return len(mudou)
+
+
+class KPIsFinanceiros:
+    """
+    Consultas sobre o cubo. Filtros ausentes (None) valem "todos".
+
+        kpis = KPIsFinanceiros(cubo.cubo)
+        kpis.comparar('2025-01-01', '2025-03-31', loja='CENTRO')
+    """
+
+    def __init__(self, cubo: pd.DataFrame) -> None:
+        partes = []
+        for r in range(len(DIMENSOES) + 1):
+            for grupo in combinations(DIMENSOES, r):
+                agg = cubo.groupby(['mes', *grupo], as_index=False)[MEDIDAS].sum() if grupo else \
+                    cubo.groupby('mes', as_index=False)[MEDIDAS].sum()
+                for dim in DIMENSOES:
+                    if dim not in grupo:
+                        agg[dim] = TODOS
+                partes.append(agg)
+        rollup = pd.concat(partes, ignore_index=True).sort_values(DIMENSOES + ['mes'], ignore_index=True)
+
+        # índice: chave do grupo -> (meses ordenados, somas acumuladas com linha zero na frente)
+        meses = rollup['mes'].to_numpy()
+        valores = rollup[MEDIDAS].to_numpy(dtype='float64')
+        chaves = rollup[DIMENSOES].astype(str).agg('\x1f'.join, axis=1).to_numpy()
+        limites = np.flatnonzero(np.r_[True, chaves[1:] != chaves[:-1], True])
+        self._indice: Dict[str, Tuple[np.ndarray, np.ndarray]] = {}
+        for a, b in zip(limites[:-1], limites[1:]):
+            acum = np.vstack([np.zeros(len(MEDIDAS)), np.cumsum(valores[a:b], axis=0)])
+            self._indice[chaves[a]] = (meses[a:b], acum)
+
+    @staticmethod
+    def _chave(filtros: Dict[str, Optional[str]]) -> str:
+        return '\x1f'.join(TODOS if filtros.get(d) is None else str(filtros[d]) for d in DIMENSOES)
+
+    def totais(self, mes_ini: int, mes_fim: int, **filtros) -> Dict[str, float]:
+        """Somas do intervalo de meses [mes_ini, mes_fim] (ordinais) + ticket médio."""
+        meses, acum = self._indice.get(self._chave(filtros), (np.empty(0, 'int64'), np.zeros((1, len(MEDIDAS)))))
+        i = np.searchsorted(meses, mes_ini, side='left')
+        j = np.searchsorted(meses, mes_fim, side='right')
+        out = dict(zip(MEDIDAS, (acum[j] - acum[i]).tolist()))
+        out['ticket_medio'] = out['valornegociado'] / out['pedidos'] if out['pedidos'] else 0.0
+        return out
+
+    def comparar(self, data_inicio, data_fim, **filtros) -> Dict[str, Dict]:
+        """
+        KPIs dos meses que cobrem [data_inicio, data_fim] contra o mesmo número
+        de meses imediatamente anterior e contra os mesmos meses do ano anterior.
+        """
+        ini, fim = mes_para_ordinal(data_inicio), mes_para_ordinal(data_fim)
+        n = fim - ini + 1
+        janelas = {'atual': (ini, fim), 'anterior': (ini - n, fim - n), 'ano_anterior': (ini - 12, fim - 12)}
+        return {
+            nome: {'meses': (ordinal_para_mes(a), ordinal_para_mes(b)), **self.totais(a, b, **filtros)}
+            for nome, (a, b) in janelas.items()
+        }
+
+
+def variacao(atual: float, anterior: float) -> Optional[float]:
+    """Variação percentual; None quando não há base de comparação."""
+    if not anterior:
+        return None
+    return (atual - anterior) / abs(anterior) * 100
@@ -0,0 +1,103 @@
+from typing import Sequence
+
+import numpy as np
+import pandas as pd
+
+from calendario import DEFAULT_CALENDAR, WorkCalendar
+
+# -------------------------------------------------------------------
+# LEAD TIMES ENTRE OS MARCOS DO PROJETO
+# -------------------------------------------------------------------
+# load_raw_data já traz as datas de tblProjetos; aqui elas viram, por
+# linha, o tempo de cada trecho do fluxo em horas úteis (WorkCalendar,
+# mesmo expediente das durações de etapa) e em dias corridos:
+#   contrato -> assinatura -> chegada na fábrica -> início -> pronto -> entrega
+# Tudo em NumPy sobre as colunas inteiras. Marco ausente ou fora de
+# ordem (fim antes do início) dá NaN, e o trecho fica fora das médias.
+# resumir() quebra por cliente / loja e mês em que o trecho terminou;
+# o ProducaoService guarda o resumo junto com o resto do pipeline.
+
+MARCOS = ["datacontrato", "dataassinatura", "chegoufabrica", "iniciado", "pronto", "entrega"]
+TRECHOS = [
+    ("contrato_assinatura", "datacontrato", "dataassinatura"),
+    ("assinatura_fabrica", "dataassinatura", "chegoufabrica"),
+    ("fabrica_inicio", "chegoufabrica", "iniciado"),
+    ("inicio_pronto", "iniciado", "pronto"),
+    ("pronto_entrega", "pronto", "entrega"),
+]
+LEAD_HORAS = [f"Lead{t}HorasUteis" for t, _, _ in TRECHOS]
+LEAD_DIAS = [f"Lead{t}Dias" for t, _, _ in TRECHOS]
+DIMENSOES = ["cliente", "loja"]
+_FORMATO_PERIODO = {"M": "%Y-%m", "Y": "%Y", "D": "%Y-%m-%d"}
+
+
+def calcular_lead_times(df: pd.DataFrame, calendario: WorkCalendar = DEFAULT_CALENDAR) -> pd.DataFrame:
+    """Anexa a `df` as colunas LEAD_HORAS e LEAD_DIAS (marcos ausentes contam como NaT)."""
+    n = len(df)
+    marcos = {
+        m: (pd.to_datetime(df[m], errors="coerce").to_numpy(dtype="datetime64[ns]")
+            if m in df.columns else np.full(n, np.datetime64("NaT"), dtype="datetime64[ns]"))
+        for m in MARCOS
+    }
+    # cada marco passa pelo calendário uma vez, não uma por trecho
+    uteis = {m: calendario.to_business_seconds(v) for m, v in marcos.items()}
+    novas = {}
+    for (trecho, ini, fim), c_horas, c_dias in zip(TRECHOS, LEAD_HORAS, LEAD_DIAS):
+        dias = (marcos[fim] - marcos[ini]) / np.timedelta64(1, "D")  # NaT -> NaN
+        valido = dias >= 0
+        novas[c_horas] = np.where(valido, (uteis[fim] - uteis[ini]) / 3600, np.nan)
+        novas[c_dias] = np.where(valido, dias, np.nan)
+    return df.assign(**novas)
+
+
+def resumir(df: pd.DataFrame, dimensoes: Sequence[str] = DIMENSOES, freq: str = "M") -> pd.DataFrame:
+    """
+    Formato longo: Dimensao, Grupo, Periodo, Trecho, n e média/mediana
+    (horas úteis e dias). Dimensao 'total' tem Grupo 'Todos'. Cada ordem
+    conta uma vez (os marcos são do projeto, não do ambiente).
+    """
+    colunas = ["Dimensao", "Grupo", "Periodo", "Trecho", "n",
+               "HorasUteisMedia", "HorasUteisP50", "DiasMedia", "DiasP50"]
+    if df.empty or LEAD_HORAS[0] not in df.columns:
+        return pd.DataFrame(columns=colunas)
+    df = df.drop_duplicates("ordemdecompra") if "ordemdecompra" in df.columns else df
+    dims = [d for d in dimensoes if d in df.columns]
+
+    # trechos empilhados (n_ordens x 5 linhas, só os válidos) com chaves
+    # inteiras: mês como datetime64[M], trecho pelo índice, grupos fatorados
+    codigos = {d: pd.factorize(df[d].fillna("SEM " + d.upper()).to_numpy(dtype=object), sort=True) for d in dims}
+    partes = []
+    for k, ((_, _, fim), c_horas, c_dias) in enumerate(zip(TRECHOS, LEAD_HORAS, LEAD_DIAS)):
+        ok = df[c_dias].notna().to_numpy()
+        if not ok.any():
+            continue
+        parte = {
+            "Periodo": df[fim].to_numpy(dtype="datetime64[ns]")[ok].astype(f"datetime64[{freq}]"),
+            "Trecho": np.full(int(ok.sum()), k),
+            "horas": df[c_horas].to_numpy()[ok],
+            "dias": df[c_dias].to_numpy()[ok],
+        }
+        for d in dims:
+            parte[d] = codigos[d][0][ok]
+        partes.append(pd.DataFrame(parte))
+    if not partes:
+        return pd.DataFrame(columns=colunas)
+    longo = pd.concat(partes, ignore_index=True)
+    longo["total"] = 0
+
+    nomes_trecho = np.array([t for t, _, _ in TRECHOS], dtype=object)
+    saida = []
+    for d in ["total", *dims]:
+        r = longo.groupby([d, "Periodo", "Trecho"], sort=True).agg(
+            n=("dias", "size"),
+            HorasUteisMedia=("horas", "mean"), HorasUteisP50=("horas", "median"),
+            DiasMedia=("dias", "mean"), DiasP50=("dias", "median")).reset_index()
+        grupos = np.array(["Todos"], dtype=object) if d == "total" else np.asarray(codigos[d][1], dtype=object)
+        r[d] = grupos[r[d].to_numpy()]
+        saida.append(r.rename(columns={d: "Grupo"}).assign(Dimensao=d))
+    out = pd.concat(saida, ignore_index=True)
+    # texto só no fim: poucos meses distintos, 5 trechos
+    cod, meses = pd.factorize(out["Periodo"].to_numpy())
+    out["Periodo"] = pd.DatetimeIndex(meses).strftime(_FORMATO_PERIODO.get(freq, "%Y-%m-%d")).to_numpy(dtype=object)[cod]
+    out["Trecho"] = nomes_trecho[out["Trecho"].to_numpy()]
+    return out[colunas].sort_values(["Dimensao"], kind="stable").reset_index(drop=True)
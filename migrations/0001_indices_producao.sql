@@ -0,0 +1,34 @@
+-- 0001: índices das consultas de Produção / Projetos / Financeiro
+--
+-- JOIN e EXISTS por ordemdecompra, filtro de período empurrado para o
+-- PostgREST (corteinicio >= :ini, cortefim <= :fim), filtro por
+-- 'pronto' (Projetos/Financeiro) e o status por dataentrega.
+
+CREATE INDEX IF NOT EXISTS "ix_tblProjetos_ordemdecompra"
+  ON "tblProjetos" ("ordemdecompra");
+
+CREATE INDEX IF NOT EXISTS "ix_tblProducao_ordemdecompra"
+  ON "tblProducao" ("ordemdecompra");
+
+CREATE INDEX IF NOT EXISTS "ix_tblAcessorios_ordemdecompra"
+  ON "tblAcessorios" ("ordemdecompra");
+
+CREATE INDEX IF NOT EXISTS "ix_tblProjetos_pronto"
+  ON "tblProjetos" ("pronto");
+
+CREATE INDEX IF NOT EXISTS "ix_tblProjetos_dataentrega"
+  ON "tblProjetos" ("dataentrega");
+
+-- ordens ainda sem pronto/entrega: é o que o painel de status lista
+CREATE INDEX IF NOT EXISTS "ix_tblProjetos_abertas"
+  ON "tblProjetos" ("dataentrega")
+  WHERE "entrega" IS NULL AND "pronto" IS NULL;
+
+CREATE INDEX IF NOT EXISTS "ix_tblProducao_corteinicio"
+  ON "tblProducao" ("corteinicio");
+
+CREATE INDEX IF NOT EXISTS "ix_tblProducao_cortefim"
+  ON "tblProducao" ("cortefim");
+
+CREATE INDEX IF NOT EXISTS "ix_tblProducao_embalagemfim"
+  ON "tblProducao" ("embalagemfim");
@@ -0,0 +1,149 @@
+-- 0002: snapshot materializado da produção
+--
+-- vw_producao é o JOIN tblProjetos x tblProducao com o que não depende
+-- da data de projeção já calculado: flag de acessório ("A") e status
+-- de cada etapa. producao_snapshot guarda o resultado da view e é
+-- mantido por triggers de instrução nas três tabelas base: cada
+-- INSERT/UPDATE/DELETE recalcula só as ordens tocadas
+-- (refresh_producao_snapshot(ids)). rebuild_producao_snapshot()
+-- refaz tudo (carga inicial, ou depois de mudar a view).
+--
+-- O dashboard lê daqui com DASH_PRODUCAO_SNAPSHOT=1 (sql_producao.py).
+
+CREATE OR REPLACE VIEW "vw_producao" AS
+SELECT
+  p."ordemdecompra",
+  p."pedido",
+  p."etapa",
+  p."codcc",
+  p."cliente",
+  p."contrato",
+  p."ambiente",
+  p."dataentrega",
+  p."previsao",
+  p."urgente",
+  p."pendencia",
+  p."iniciado",
+  p."pronto",
+  p."entrega",
+  pr."corteinicio", pr."cortefim",
+  pr."customizacaoinicio", pr."customizacaofim",
+  pr."coladeirainicio", pr."coladeirafim",
+  pr."usinageminicio", pr."usinagemfim",
+  pr."paineisinicio", pr."paineisfim",
+  pr."montageminicio", pr."montagemfim",
+  pr."embalageminicio", pr."embalagemfim",
+  pr."separacao",
+  pr."observacoes",
+  CASE WHEN EXISTS (
+    SELECT 1 FROM "tblAcessorios" a WHERE a."ordemdecompra" = p."ordemdecompra"
+  ) THEN '*' ELSE '' END AS "A",
+  CASE WHEN pr."cortefim" IS NOT NULL THEN 'FINALIZADO'
+       WHEN pr."corteinicio" IS NOT NULL THEN 'INICIADO' ELSE 'AGUARDE' END AS "SCorte",
+  CASE WHEN pr."customizacaofim" IS NOT NULL THEN 'FINALIZADO'
+       WHEN pr."customizacaoinicio" IS NOT NULL THEN 'INICIADO' ELSE 'AGUARDE' END AS "SCustom",
+  CASE WHEN pr."coladeirafim" IS NOT NULL THEN 'FINALIZADO'
+       WHEN pr."coladeirainicio" IS NOT NULL THEN 'INICIADO' ELSE 'AGUARDE' END AS "SColadeira",
+  CASE WHEN pr."usinagemfim" IS NOT NULL THEN 'FINALIZADO'
+       WHEN pr."usinageminicio" IS NOT NULL THEN 'INICIADO' ELSE 'AGUARDE' END AS "SUsinagem",
+  CASE WHEN pr."paineisfim" IS NOT NULL THEN 'FINALIZADO'
+       WHEN pr."paineisinicio" IS NOT NULL THEN 'INICIADO' ELSE 'AGUARDE' END AS "SPaineis",
+  CASE WHEN pr."montagemfim" IS NOT NULL THEN 'FINALIZADO'
+       WHEN pr."montageminicio" IS NOT NULL THEN 'INICIADO' ELSE 'AGUARDE' END AS "SMontagem",
+  CASE WHEN pr."embalagemfim" IS NOT NULL THEN 'FINALIZADO'
+       WHEN pr."embalageminicio" IS NOT NULL THEN 'INICIADO' ELSE 'AGUARDE' END AS "SEmbalagem",
+  CASE WHEN pr."separacao" IS NOT NULL THEN 'FINALIZADO'
+       WHEN pr."embalagemfim" IS NOT NULL THEN 'INICIADO' ELSE 'AGUARDE' END AS "SSeparacao"
+FROM "tblProjetos" p
+INNER JOIN "tblProducao" pr
+  ON p."ordemdecompra" = pr."ordemdecompra";
+
+CREATE TABLE IF NOT EXISTS "producao_snapshot" AS
+  SELECT * FROM "vw_producao" WITH NO DATA;
+
+CREATE UNIQUE INDEX IF NOT EXISTS "ux_producao_snapshot_ordemdecompra"
+  ON "producao_snapshot" ("ordemdecompra");
+
+-- mesmo predicado de sql_producao._aberta (sem a parte da data de projeção)
+CREATE INDEX IF NOT EXISTS "ix_producao_snapshot_abertas"
+  ON "producao_snapshot" ("dataentrega")
+  WHERE "entrega" IS NULL AND "pronto" IS NULL;
+
+CREATE INDEX IF NOT EXISTS "ix_producao_snapshot_pendencia"
+  ON "producao_snapshot" ("ordemdecompra")
+  WHERE "pendencia" = TRUE;
+
+
+-- Recalcula as ordens em `ids` (qualquer array do tipo de ordemdecompra).
+CREATE OR REPLACE FUNCTION "refresh_producao_snapshot"(ids anyarray)
+RETURNS integer
+LANGUAGE plpgsql AS $$
+DECLARE
+  n integer;
+BEGIN
+  IF ids IS NULL OR cardinality(ids) = 0 THEN
+    RETURN 0;
+  END IF;
+  DELETE FROM "producao_snapshot" WHERE "ordemdecompra" = ANY(ids);
+  INSERT INTO "producao_snapshot"
+    SELECT * FROM "vw_producao" WHERE "ordemdecompra" = ANY(ids);
+  GET DIAGNOSTICS n = ROW_COUNT;
+  RETURN n;
+END;
+$$;
+
+-- Recarga completa; leitores continuam vendo o snapshot antigo até o COMMIT.
+CREATE OR REPLACE FUNCTION "rebuild_producao_snapshot"()
+RETURNS integer
+LANGUAGE plpgsql AS $$
+DECLARE
+  n integer;
+BEGIN
+  LOCK TABLE "producao_snapshot" IN EXCLUSIVE MODE;
+  DELETE FROM "producao_snapshot";
+  INSERT INTO "producao_snapshot" SELECT * FROM "vw_producao";
+  GET DIAGNOSTICS n = ROW_COUNT;
+  RETURN n;
+END;
+$$;
+
+-- Trigger de instrução: junta as ordens das tabelas de transição e
+-- recalcula de uma vez (um UPDATE de 10 mil linhas = um refresh).
+CREATE OR REPLACE FUNCTION "_producao_snapshot_trigger"()
+RETURNS trigger
+LANGUAGE plpgsql AS $$
+BEGIN
+  IF TG_OP = 'INSERT' THEN
+    PERFORM "refresh_producao_snapshot"(ARRAY(SELECT DISTINCT "ordemdecompra" FROM novas));
+  ELSIF TG_OP = 'UPDATE' THEN
+    PERFORM "refresh_producao_snapshot"(ARRAY(
+      SELECT "ordemdecompra" FROM novas UNION SELECT "ordemdecompra" FROM antigas));
+  ELSE
+    PERFORM "refresh_producao_snapshot"(ARRAY(SELECT DISTINCT "ordemdecompra" FROM antigas));
+  END IF;
+  RETURN NULL;
+END;
+$$;
+
+DO $$
+DECLARE
+  t text;
+BEGIN
+  FOREACH t IN ARRAY ARRAY['tblProjetos', 'tblProducao', 'tblAcessorios'] LOOP
+    EXECUTE format('DROP TRIGGER IF EXISTS "producao_snapshot_ins" ON %I', t);
+    EXECUTE format('DROP TRIGGER IF EXISTS "producao_snapshot_upd" ON %I', t);
+    EXECUTE format('DROP TRIGGER IF EXISTS "producao_snapshot_del" ON %I', t);
+    EXECUTE format('CREATE TRIGGER "producao_snapshot_ins" AFTER INSERT ON %I '
+                   'REFERENCING NEW TABLE AS novas FOR EACH STATEMENT '
+                   'EXECUTE FUNCTION "_producao_snapshot_trigger"()', t);
+    EXECUTE format('CREATE TRIGGER "producao_snapshot_upd" AFTER UPDATE ON %I '
+                   'REFERENCING NEW TABLE AS novas OLD TABLE AS antigas FOR EACH STATEMENT '
+                   'EXECUTE FUNCTION "_producao_snapshot_trigger"()', t);
+    EXECUTE format('CREATE TRIGGER "producao_snapshot_del" AFTER DELETE ON %I '
+                   'REFERENCING OLD TABLE AS antigas FOR EACH STATEMENT '
+                   'EXECUTE FUNCTION "_producao_snapshot_trigger"()', t);
+  END LOOP;
+END;
+$$;
+
+SELECT "rebuild_producao_snapshot"();
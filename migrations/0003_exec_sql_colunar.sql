@@ -0,0 +1,56 @@
+-- 0003: exec_sql_colunar(q) - mesmo contrato do exec_sql, resultado em colunas
+--
+-- Devolve UM objeto JSON:
+--   {"colunas": ["a", "b"], "dados": [[a1, a2, ...], [b1, b2, ...]], "linhas": n}
+-- em vez de uma linha {"exec_sql": {"a": ..., "b": ...}} por registro, então
+-- o nome de cada coluna trafega uma vez só. A ordem das linhas é a da
+-- consulta (row_number sobre a subconsulta ordenada) e a das colunas é a
+-- do SELECT (row_to_json preserva a ordem). Lido por transporte.py.
+
+CREATE OR REPLACE FUNCTION "exec_sql_colunar"(q text)
+RETURNS json
+LANGUAGE plpgsql
+STABLE AS $$
+DECLARE
+  resultado json;
+BEGIN
+  EXECUTE format($sql$
+    WITH linhas AS (
+      SELECT row_number() OVER () AS n, row_to_json(t) AS j
+      FROM (%s) t
+    ), celulas AS (
+      SELECT l.n, e.key, e.value, e.pos
+      FROM linhas l, json_each(l.j) WITH ORDINALITY AS e(key, value, pos)
+    ), colunas AS (
+      SELECT key, min(pos) AS pos, json_agg(value ORDER BY n) AS valores
+      FROM celulas
+      GROUP BY key
+    )
+    SELECT json_build_object(
+      'colunas', coalesce(json_agg(key ORDER BY pos), '[]'::json),
+      'dados', coalesce(json_agg(valores ORDER BY pos), '[]'::json),
+      'linhas', (SELECT count(*) FROM linhas)
+    )
+    FROM colunas
+  $sql$, q) INTO resultado;
+  RETURN resultado;
+END;
+$$;
+
+-- Permissões: exatamente os papéis que já executam exec_sql(text).
+DO $$
+DECLARE
+  papel text;
+BEGIN
+  IF to_regprocedure('exec_sql(text)') IS NULL THEN
+    RETURN;
+  END IF;
+  REVOKE ALL ON FUNCTION "exec_sql_colunar"(text) FROM PUBLIC;
+  FOR papel IN
+    SELECT rolname FROM pg_roles
+    WHERE has_function_privilege(oid, 'exec_sql(text)', 'EXECUTE')
+  LOOP
+    EXECUTE format('GRANT EXECUTE ON FUNCTION "exec_sql_colunar"(text) TO %I', papel);
+  END LOOP;
+END;
+$$;
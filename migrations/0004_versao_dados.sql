@@ -0,0 +1,41 @@
+-- 0004: contador de versão mantido por trigger
+--
+-- O probe de data_version.py olhava só contagem, max(ordemdecompra) e o
+-- maior timestamp de algumas colunas de data: edições em pendencia,
+-- urgente, observacoes, separacao, cliente... ou uma data movida para
+-- trás não mudavam o token, e os caches seguiam servindo o dado antigo.
+-- Aqui cada INSERT/UPDATE/DELETE (por instrução) nas tabelas lidas pelo
+-- dashboard incrementa "dash_versao".versao da tabela. O probe lê a soma
+-- dos contadores: qualquer escrita muda o token, e ler continua custando
+-- uma linha por tabela.
+
+CREATE TABLE IF NOT EXISTS "dash_versao" (
+  "tabela"     text PRIMARY KEY,
+  "versao"     bigint NOT NULL DEFAULT 0,
+  "alterado_em" timestamptz NOT NULL DEFAULT now()
+);
+
+CREATE OR REPLACE FUNCTION "_dash_versao_trigger"()
+RETURNS trigger
+LANGUAGE plpgsql AS $$
+BEGIN
+  INSERT INTO "dash_versao" ("tabela", "versao", "alterado_em")
+  VALUES (TG_TABLE_NAME, 1, now())
+  ON CONFLICT ("tabela") DO UPDATE
+    SET "versao" = "dash_versao"."versao" + 1, "alterado_em" = now();
+  RETURN NULL;
+END;
+$$;
+
+DO $$
+DECLARE
+  t text;
+BEGIN
+  FOREACH t IN ARRAY ARRAY['tblProjetos', 'tblProducao', 'tblAcessorios'] LOOP
+    EXECUTE format('INSERT INTO "dash_versao" ("tabela") VALUES (%L) ON CONFLICT DO NOTHING', t);
+    EXECUTE format('DROP TRIGGER IF EXISTS "dash_versao" ON %I', t);
+    EXECUTE format('CREATE TRIGGER "dash_versao" AFTER INSERT OR UPDATE OR DELETE OR TRUNCATE ON %I '
+                   'FOR EACH STATEMENT EXECUTE FUNCTION "_dash_versao_trigger"()', t);
+  END LOOP;
+END;
+$$;
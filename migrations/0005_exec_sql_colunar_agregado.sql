@@ -0,0 +1,46 @@
+-- 0005: exec_sql_colunar(q) sem json_each por célula
+--
+-- A 0003 montava row_to_json de cada linha e o desmontava com json_each
+-- (uma linha intermediária por célula) para reagrupar por coluna. Aqui
+-- os nomes das colunas vêm de uma linha vazia da consulta (LIMIT 0: o
+-- plano não roda) e cada coluna vira um json_agg sobre o rowset, numa
+-- passada só. Mesmo contrato e mesmo JSON da 0003 (transporte.py):
+--   {"colunas": ["a", "b"], "dados": [[a1, a2, ...], [b1, b2, ...]], "linhas": n}
+-- Permissões ficam as da 0003 (CREATE OR REPLACE mantém os GRANTs).
+
+CREATE OR REPLACE FUNCTION "exec_sql_colunar"(q text)
+RETURNS json
+LANGUAGE plpgsql
+STABLE AS $$
+DECLARE
+  nomes text[];
+  agregados text;
+  resultado json;
+BEGIN
+  -- linha de NULLs com os nomes da consulta, na ordem do SELECT
+  EXECUTE format($sql$
+    SELECT array_agg(c.key ORDER BY c.pos)
+    FROM (
+      SELECT t.* FROM (SELECT 1) um
+      LEFT JOIN (SELECT * FROM (%s) q0 LIMIT 0) t ON TRUE
+    ) vazia,
+    json_each(row_to_json(vazia)) WITH ORDINALITY AS c(key, value, pos)
+  $sql$, q) INTO nomes;
+
+  SELECT string_agg(format('json_agg(t.%I ORDER BY t."__linha")', nome), ', ' ORDER BY pos)
+  INTO agregados
+  FROM unnest(nomes) WITH ORDINALITY AS c(nome, pos);
+
+  -- ordem das linhas é a da consulta (row_number sobre a subconsulta ordenada)
+  EXECUTE format($sql$
+    SELECT json_build_object(
+      -- sem linhas, '[]' nos dois, como na 0003
+      'colunas', CASE WHEN count(*) = 0 THEN '[]'::json ELSE to_json($1) END,
+      'dados', CASE WHEN count(*) = 0 THEN '[]'::json ELSE array_to_json(ARRAY[%s]) END,
+      'linhas', count(*)
+    )
+    FROM (SELECT row_number() OVER () AS "__linha", q0.* FROM (%s) q0) t
+  $sql$, agregados, q) INTO resultado USING nomes;
+  RETURN resultado;
+END;
+$$;
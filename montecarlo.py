@@ -0,0 +1,90 @@
+from typing import Dict, Mapping, Optional, Sequence
+
+import numpy as np
+import pandas as pd
+
+from calendario import DEFAULT_CALENDAR, WorkCalendar
+from generator import Generator
+
+# -------------------------------------------------------------------
+# PREVISÃO MONTE CARLO DE CONCLUSÃO
+# -------------------------------------------------------------------
+# Em vez de somar a média fixa de cada etapa (Generator), sorteia a
+# duração de cada etapa da distribuição empírica histórica e simula
+# `n_cenarios` caminhos por ordem de uma vez, como matriz
+# (cenários x ordens) em segundos úteis. Os percentis da data de
+# conclusão saem de um np.percentile no eixo dos cenários.
+
+# ordem das etapas na fábrica (mesma ordem da tabela de previsões)
+ETAPAS_FLUXO = ["corte", "customizacao", "coladeira", "usinagem", "montagem", "paineis", "embalagem"]
+
+PERCENTIS = (50, 80, 95)
+
+
+def duracoes_empiricas(
+    df_hist: pd.DataFrame,
+    cal: WorkCalendar = DEFAULT_CALENDAR,
+    etapas: Sequence[str] = ETAPAS_FLUXO,
+) -> Dict[str, np.ndarray]:
+    """Horas trabalhadas (> 0) de cada etapa finalizada no histórico."""
+    out = {}
+    for etapa in etapas:
+        horas = cal.worked_hours(df_hist[f"{etapa}inicio"], df_hist[f"{etapa}fim"])
+        out[etapa] = horas[horas > 0]
+    return out
+
+
+def _fallback_horas(etapa: str) -> np.ndarray:
+    h, m = Generator().list_columns_final[f"{etapa}fim"]
+    return np.array([h + m / 60])
+
+
+def simular_conclusao(
+    df_abertas: pd.DataFrame,
+    empiricas: Mapping[str, np.ndarray],
+    agora: Optional[pd.Timestamp] = None,
+    n_cenarios: int = 2000,
+    seed: Optional[int] = None,
+    cal: WorkCalendar = DEFAULT_CALENDAR,
+    etapas: Sequence[str] = ETAPAS_FLUXO,
+) -> pd.DataFrame:
+    """
+    Para cada ordem em aberto devolve P50/P80/P95 da conclusão da última
+    etapa e a probabilidade de terminar até o fim do dia de `dataentrega`.
+
+    Regras por etapa (vetorizadas para todas as ordens e cenários):
+    - finalizada: usa a data real;
+    - iniciada e não finalizada: início + duração sorteada, nunca antes de agora;
+    - não iniciada: começa quando a anterior termina (ou agora) + duração sorteada.
+    """
+    rng = np.random.default_rng(seed)
+    agora_bs = cal.to_business_seconds([pd.Timestamp(agora or pd.Timestamp.now())])[0]
+    n = len(df_abertas)
+    cursor = np.full((n_cenarios, n), agora_bs)
+
+    for etapa in etapas:
+        amostra = empiricas.get(etapa)
+        if amostra is None or not len(amostra):
+            amostra = _fallback_horas(etapa)
+        dur = rng.choice(amostra, size=(n_cenarios, n)) * 3600
+
+        ini = cal.to_business_seconds(df_abertas[f"{etapa}inicio"])
+        fim = cal.to_business_seconds(df_abertas[f"{etapa}fim"])
+        feito = ~np.isnan(fim)
+        iniciado = ~feito & ~np.isnan(ini)
+
+        fim_iniciado = np.maximum(np.nan_to_num(ini) + dur, agora_bs)
+        fim_novo = cursor + dur
+        etapa_fim = np.where(feito, np.nan_to_num(fim), np.where(iniciado, fim_iniciado, fim_novo))
+        cursor = np.maximum(cursor, etapa_fim)
+
+    pct = np.percentile(cursor, PERCENTIS, axis=0)
+    entrega = pd.to_datetime(df_abertas["dataentrega"], errors="coerce").dt.normalize() + pd.Timedelta(hours=23, minutes=59)
+    entrega_bs = cal.to_business_seconds(entrega)
+    no_prazo = np.where(np.isnan(entrega_bs), np.nan, (cursor <= entrega_bs).mean(axis=0))
+
+    out = pd.DataFrame(index=df_abertas.index)
+    for p, linha in zip(PERCENTIS, pct):
+        out[f"P{p}"] = cal.from_business_seconds(linha)
+    out["NoPrazo"] = no_prazo
+    return out
@@ -1,55 +1,99 @@
+import time
 import streamlit as st
 from streamlit_option_menu import option_menu
 from streamlit_js_eval import streamlit_js_eval
+from fragments import show_stats
+import aquecimento
+import pool
+import registro_io
+import transporte
+import singleflight
+from snapshots import rss_mb
 
-st.set_page_config(layout='wide',
-                   page_title = "Dashboard",
-                   initial_sidebar_state='expanded', 
-                   menu_items={
-                       'Get Help': 'http://meusite.com.br',
-                       'Report a bug': 'http://meuoutrosite.com.br',
-                       'about': 'Esse app foi desenvolvido por Elivelton Gonzaga'
-                   }
-                   )
-
-
-with st.sidebar:
-
-    st.image('GD.png')
-    selected = option_menu(
-        menu_title = "Dashboard",
-        options = ["Projetos", "Produção", "Financeiro"],
-        icons=["house", "bookmark", "currency-dollar"],
-        menu_icon='cast',
-        styles={
-            "icon": {"color": "white"}
-        })
 
-    if selected == "Projetos":
-        import dash_projetos
-        filtros = dash_projetos.loading_json()
-        t = dash_projetos.create_sidebar(*filtros)
+def main() -> None:
+    st.set_page_config(layout='wide',
+                       page_title = "Dashboard",
+                       initial_sidebar_state='expanded', 
+                       menu_items={
+                           'Get Help': 'http://meusite.com.br',
+                           'Report a bug': 'http://meuoutrosite.com.br',
+                           'about': 'Esse app foi desenvolvido por Elivelton Gonzaga'
+                       }
+                       )
 
-    elif selected == "Produção":
-        import dash_producao
-        te = dash_producao.create_sidebar()
-    
-    elif selected == "Financeiro":
-        import dash_financeiro
-        filtros = dash_financeiro.loading_json()
-        t = dash_financeiro.create_sidebar(*filtros)
+    # registro de I/O deste rerun (mostrado no fim, depois dos gráficos,
+    # junto com as métricas internas, só em depuração)
+    depuracao = registro_io.depuracao_da_sessao()
+    registro_io.iniciar(medir_bytes=depuracao)
+    inicio_rerun = time.perf_counter()
+    # nada é buscado no import dos dashboards; com `streamlit run` o
+    # aquecimento começa aqui (com `python servidor.py`, já na subida)
+    aquecimento.iniciar()
+
+    with st.sidebar:
+
+        st.image('GD.png')
+        selected = option_menu(
+            menu_title = "Dashboard",
+            options = ["Projetos", "Produção", "Financeiro"],
+            icons=["house", "bookmark", "currency-dollar"],
+            menu_icon='cast',
+            styles={
+                "icon": {"color": "white"}
+            })
+
+        if selected == "Projetos":
+            dash_projetos = aquecimento.importar("dash_projetos")
+            filtros = dash_projetos.loading_json()
+            t = dash_projetos.create_sidebar(*filtros)
 
+        elif selected == "Produção":
+            dash_producao = aquecimento.importar("dash_producao")
+            te = dash_producao.create_sidebar()
 
-if selected == "Projetos":
-    dash_projetos.create_grafs(*t)
+        elif selected == "Financeiro":
+            dash_financeiro = aquecimento.importar("dash_financeiro")
+            filtros = dash_financeiro.loading_json()
+            t = dash_financeiro.create_sidebar(*filtros)
 
-elif selected == "Produção":
-    dash_producao.create_grafs(*te)
+        if depuracao:
+            show_stats()
+            with st.expander("Pool de processos"):
+                st.json(pool.metricas())
+            with st.expander("Transporte exec_sql"):
+                st.json(transporte.metricas())
+            with st.expander("Single-flight"):
+                st.json(singleflight.metricas())
+            with st.expander("Inicialização"):
+                st.json(aquecimento.metricas())
+            st.caption(f"Memória residente do servidor: {rss_mb():.0f} MB")
 
-elif selected == "Financeiro":
-    dash_financeiro.create_grafs(*t)
-    
 
+    if selected == "Projetos":
+        dash_projetos.create_grafs(*t)
+
+    elif selected == "Produção":
+        dash_producao.create_grafs(*te)
+
+    elif selected == "Financeiro":
+        dash_financeiro.create_grafs(*t)
+
+    if depuracao:
+        with st.sidebar:
+            estouros = registro_io.verificar_orcamento(selected)
+            if estouros:
+                st.warning(f"Orçamento de I/O de {selected} estourado: " + "; ".join(estouros))
+            with st.expander("I/O deste rerun"):
+                st.json(registro_io.resumo())
+                consultas = registro_io.tabela()
+                if not consultas.empty:
+                    st.dataframe(consultas, hide_index=True)
 
+    aquecimento.marcar_render(time.perf_counter() - inicio_rerun)
 
 
+# Streamlit roda este script como __main__; os workers do pool (spawn)
+# o reimportam como __mp_main__ e não devem montar a página
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,163 @@
+import logging
+import multiprocessing
+import os
+import threading
+import time
+from concurrent.futures import Future, ProcessPoolExecutor, TimeoutError as FuturesTimeout
+from typing import Callable, Dict, List, Optional
+
+logger = logging.getLogger(__name__)
+
+# -------------------------------------------------------------------
+# POOL DE PROCESSOS PARA CÁLCULOS PESADOS
+# -------------------------------------------------------------------
+# O Streamlit atende todas as sessões em threads de um único processo;
+# laços em Python puro (durações trabalhadas, preenchimento da
+# previsão) seguram o GIL e atrasam o rerun dos outros usuários. Aqui
+# esses laços rodam num ProcessPoolExecutor limitado:
+#   DASH_POOL_WORKERS  processos (padrão: min(4, CPUs))
+#   DASH_POOL_QUEUE    tarefas admitidas ao mesmo tempo (padrão: 2x workers);
+#                      acima disso quem chega espera na fila
+#   DASH_POOL_TIMEOUT  segundos por tarefa (padrão: 60)
+# Entradas e saídas trafegam como arrays NumPy (pickle protocolo 5,
+# buffers sem cópia extra), nunca como DataFrames com objetos Python.
+#
+# Os workers usam spawn, que reimporta o __main__ de quem os lança
+# como __mp_main__. Todo ponto de entrada tem guarda: servidor.py,
+# batch.py e os benchmarks com `if __name__ == "__main__"`, e novo.py só
+# monta a página nesse caso (o Streamlit roda o script como __main__;
+# no worker ele vira __mp_main__ e para nos imports). Assim o pool sobe
+# sob demanda no primeiro run()/aquecer(), inclusive com
+# `streamlit run novo.py`; servidor.py e batch.py chamam iniciar() já na
+# subida para os workers estarem prontos antes da primeira sessão.
+
+WORKERS = int(os.environ.get("DASH_POOL_WORKERS", min(4, os.cpu_count() or 1)))
+QUEUE = int(os.environ.get("DASH_POOL_QUEUE", 2 * WORKERS))
+TIMEOUT = float(os.environ.get("DASH_POOL_TIMEOUT", 60))
+MIN_ROWS = int(os.environ.get("DASH_POOL_MIN_ROWS", 200))  # abaixo disso roda no próprio processo
+
+
+class PoolTimeout(TimeoutError):
+    pass
+
+
+_lock = threading.Lock()
+_executor: Optional[ProcessPoolExecutor] = None
+_partida: List[Future] = []
+_vagas = threading.BoundedSemaphore(QUEUE)
+_metricas: Dict[str, float] = {
+    "submetidas": 0, "concluidas": 0, "timeouts": 0, "erros": 0, "inline": 0,
+    "na_fila": 0, "em_execucao": 0,
+    "espera_max_s": 0.0, "espera_total_s": 0.0, "execucao_total_s": 0.0,
+}
+
+
+def iniciar(modulos: tuple = ("tarefas", "calendario")) -> None:
+    """
+    Cria o executor e lança os WORKERS processos já importando `modulos`.
+    Idempotente; run() e aquecer() chamam sob demanda. Não espera os
+    imports terminarem (aquecer() espera).
+    """
+    global _executor
+    with _lock:
+        if _executor is not None:
+            return
+        # spawn: fork de um servidor com várias threads não é seguro
+        ctx = multiprocessing.get_context("spawn")
+        _executor = ProcessPoolExecutor(max_workers=WORKERS, mp_context=ctx)
+        # submit() só cria processo enquanto não há worker ocioso: WORKERS
+        # tarefas seguidas, antes de qualquer worker subir, lançam todos
+        _partida.extend(_executor.submit(_importar, modulos) for _ in range(WORKERS))
+        logger.info(f"Pool de processos iniciado: {WORKERS} workers, fila {QUEUE}, timeout {TIMEOUT}s")
+
+
+def _conta(chave: str, valor: float = 1) -> None:
+    with _lock:
+        _metricas[chave] += valor
+
+
+def run(fn: Callable, *args, linhas: Optional[int] = None, timeout: Optional[float] = None):
+    """
+    Executa fn(*args) no pool e devolve o resultado. `fn` precisa ser uma
+    função de módulo (picklável). Com `linhas` abaixo de MIN_ROWS roda
+    direto, sem custo de IPC. O pool é iniciado na primeira chamada que
+    precisar dele. Estourando o timeout levanta PoolTimeout.
+    """
+    if linhas is not None and linhas < MIN_ROWS:
+        _conta("inline")
+        return fn(*args)
+    executor = _executor
+    if executor is None:
+        iniciar()
+        executor = _executor
+
+    chegada = time.perf_counter()
+    _conta("na_fila")
+    _vagas.acquire()
+    espera = time.perf_counter() - chegada
+    with _lock:
+        _metricas["na_fila"] -= 1
+        _metricas["em_execucao"] += 1
+        _metricas["submetidas"] += 1
+        _metricas["espera_total_s"] += espera
+        _metricas["espera_max_s"] = max(_metricas["espera_max_s"], espera)
+    futuro = None
+    try:
+        futuro = executor.submit(fn, *args)
+        inicio = time.perf_counter()
+        try:
+            resultado = futuro.result(timeout=timeout or TIMEOUT)
+        except FuturesTimeout:
+            _conta("timeouts")
+            raise PoolTimeout(f"{getattr(fn, '__name__', fn)} excedeu {timeout or TIMEOUT}s")
+        except Exception:
+            _conta("erros")
+            raise
+        _conta("concluidas")
+        _conta("execucao_total_s", time.perf_counter() - inicio)
+        return resultado
+    finally:
+        if futuro is not None and not futuro.done() and not futuro.cancel():
+            # cancel() não interrompe tarefa já rodando num worker: a vaga
+            # só volta quando ela terminar de fato, senão a fila admitiria
+            # mais trabalho que os WORKERS dão conta
+            futuro.add_done_callback(_libera)
+        else:
+            _libera()
+
+
+def _libera(_futuro: Optional[Future] = None) -> None:
+    _conta("em_execucao", -1)
+    _vagas.release()
+
+
+def _importar(modulos: tuple) -> int:
+    import importlib
+    for nome in modulos:
+        importlib.import_module(nome)
+    return os.getpid()
+
+
+def aquecer() -> int:
+    """Inicia o pool se preciso e espera os workers importarem os módulos; devolve quantos responderam."""
+    iniciar()
+    return len({f.result(timeout=TIMEOUT) for f in list(_partida)})
+
+
+def metricas() -> Dict[str, float]:
+    with _lock:
+        m = dict(_metricas)
+    m["ativo"] = _executor is not None
+    m["workers"] = WORKERS
+    m["fila_max"] = QUEUE
+    m["timeout_s"] = TIMEOUT
+    return m
+
+
+def shutdown() -> None:
+    global _executor
+    with _lock:
+        if _executor is not None:
+            _executor.shutdown(wait=False, cancel_futures=True)
+            _executor = None
+            _partida.clear()
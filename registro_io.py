@@ -0,0 +1,211 @@
+import contextlib
+import hashlib
+import logging
+import os
+import re
+import threading
+import time
+from dataclasses import asdict, dataclass, field
+from logging.handlers import RotatingFileHandler
+from pathlib import Path
+from typing import Dict, Iterator, List, Optional
+
+import orjson
+import pandas as pd
+
+logger = logging.getLogger(__name__)
+
+# -------------------------------------------------------------------
+# REGISTRO DE I/O POR CONSULTA
+# -------------------------------------------------------------------
+# Toda leitura do Supabase (select de tabela e RPC exec_sql) vira uma
+# linha: tipo, identidade da consulta, parâmetros, linhas, bytes do
+# corpo JSON, latência e se veio do cache (hit) ou da rede (miss).
+#
+# - Por rerun: as linhas ficam numa lista da thread do script (o
+#   Streamlit roda cada rerun numa thread própria); novo.py zera no
+#   começo com iniciar() e mostra no fim com linhas()/resumo().
+# - Consultas acima de DASH_SLOW_QUERY_MS (padrão 1000) vão para
+#   logs/consultas_lentas.log (RotatingFileHandler, 5 x 1 MB).
+# - ORCAMENTOS limita requisições de rede e bytes por rerun de cada
+#   dashboard; verificar_orcamento() diz o que estourou.
+# - O painel (registro do rerun, orçamento, métricas internas) só
+#   aparece em depuração: DASH_DEBUG=1 para todas as sessões, ou
+#   ?admin=<DASH_ADMIN_TOKEN> numa sessão. Fora disso select() não mede
+#   bytes: o cliente não expõe o corpo cru e reserializar cada resposta
+#   só para contar custa CPU em todo rerun.
+
+LOG_DIR = Path(os.environ.get("DASH_LOG_DIR", "logs"))
+LENTA_MS = float(os.environ.get("DASH_SLOW_QUERY_MS", 1000))
+DEBUG = os.environ.get("DASH_DEBUG", "0") == "1"
+ADMIN_TOKEN = os.environ.get("DASH_ADMIN_TOKEN", "")
+
+ORCAMENTOS: Dict[str, Dict[str, float]] = {
+    "Projetos": {"requisicoes": 3, "bytes": 30e6},
+    "Produção": {"requisicoes": 12, "bytes": 60e6},
+    "Financeiro": {"requisicoes": 3, "bytes": 30e6},
+}
+
+
+@dataclass
+class Consulta:
+    tipo: str                      # "select" | "exec_sql" | ...
+    identidade: str                # nome da consulta ou hash do SQL
+    parametros: str
+    linhas: int = 0
+    bytes: int = 0
+    latencia_ms: float = 0.0
+    cache: str = "miss"            # "miss" = foi à rede; "hit" = veio do st.cache/memo
+    extra: Dict[str, object] = field(default_factory=dict)
+
+
+_local = threading.local()
+_nomes: Dict[str, str] = {}
+_lock = threading.Lock()
+_totais: Dict[str, Dict[str, float]] = {}
+_lentas: Optional[logging.Logger] = None
+
+
+def _log_lentas() -> logging.Logger:
+    global _lentas
+    with _lock:
+        if _lentas is None:
+            _lentas = logging.getLogger("dash.consultas_lentas")
+            _lentas.propagate = False
+            try:
+                LOG_DIR.mkdir(parents=True, exist_ok=True)
+                handler = RotatingFileHandler(LOG_DIR / "consultas_lentas.log", maxBytes=1_000_000,
+                                              backupCount=5, encoding="utf-8")
+                handler.setFormatter(logging.Formatter("[%(asctime)s] %(message)s"))
+                _lentas.addHandler(handler)
+            except OSError as e:
+                logger.warning(f"Sem log de consultas lentas em {LOG_DIR}: {e}")
+        return _lentas
+
+
+def _normaliza(sql: str) -> str:
+    return re.sub(r"\s+", " ", sql).strip()
+
+
+def nomear(sql: str, nome: str) -> None:
+    """Dá um nome legível a um SQL conhecido (senão a identidade é o hash)."""
+    _nomes[_normaliza(sql)] = nome
+
+
+def identidade(sql: str) -> str:
+    norm = _normaliza(sql)
+    return _nomes.get(norm) or "sql:" + hashlib.sha1(norm.encode("utf-8")).hexdigest()[:10]
+
+
+def parametros(params) -> str:
+    """Parâmetros da consulta como JSON estável (chaves ordenadas)."""
+    if not params:
+        return ""
+    return orjson.dumps(params, default=str, option=orjson.OPT_SORT_KEYS).decode()
+
+
+def depuracao_da_sessao() -> bool:
+    """Painéis de diagnóstico na sessão Streamlit atual (DASH_DEBUG=1 ou ?admin=<DASH_ADMIN_TOKEN>)."""
+    if DEBUG:
+        return True
+    if not ADMIN_TOKEN:
+        return False
+    import streamlit as st
+    return st.query_params.get("admin") == ADMIN_TOKEN
+
+
+def iniciar(medir_bytes: bool = False) -> None:
+    """Zera o registro da thread atual (começo do rerun); `medir_bytes` liga a medição em select()."""
+    _local.consultas = []
+    _local.medir_bytes = medir_bytes
+
+
+def linhas() -> List[Consulta]:
+    return list(getattr(_local, "consultas", []))
+
+
+def registrar(c: Consulta) -> Consulta:
+    if not hasattr(_local, "consultas"):
+        _local.consultas = []
+    _local.consultas.append(c)
+    with _lock:
+        t = _totais.setdefault(c.identidade, {"chamadas": 0, "misses": 0, "bytes": 0, "latencia_ms": 0.0})
+        t["chamadas"] += 1
+        t["misses"] += c.cache == "miss"
+        t["bytes"] += c.bytes
+        t["latencia_ms"] += c.latencia_ms if c.cache == "miss" else 0.0
+    if c.cache == "miss" and c.latencia_ms >= LENTA_MS:
+        _log_lentas().warning(
+            f"{c.latencia_ms:.0f}ms {c.tipo} {c.identidade} linhas={c.linhas} bytes={c.bytes} params={c.parametros}"
+        )
+    return c
+
+
+def select(builder, ident: str, params=None, tipo: str = "select"):
+    """
+    .execute() de um request builder do PostgREST (select ou rpc),
+    registrado. Os bytes são os do JSON dos dados (o cliente não expõe o
+    corpo cru) e só são medidos em depuração; fora dela ficam 0.
+    """
+    t0 = time.perf_counter()
+    res = builder.execute()
+    dt = (time.perf_counter() - t0) * 1000
+    data = res.data or []
+    medir = DEBUG or getattr(_local, "medir_bytes", False)
+    tamanho = len(orjson.dumps(data, default=str)) if medir else 0
+    registrar(Consulta(tipo, ident, parametros(params), len(data), tamanho, dt))
+    return res
+
+
+@contextlib.contextmanager
+def cache(tipo: str, ident: str, params=None) -> Iterator[Dict[str, int]]:
+    """
+    Em volta de uma função cacheada: se nada com a mesma identidade foi
+    registrado dentro do bloco, a resposta veio do cache e entra como hit.
+    Preencha out["linhas"] com o tamanho do resultado.
+    """
+    antes = len(getattr(_local, "consultas", []))
+    out: Dict[str, int] = {"linhas": 0}
+    t0 = time.perf_counter()
+    yield out
+    novas = getattr(_local, "consultas", [])[antes:]
+    if not any(c.identidade == ident for c in novas):
+        registrar(Consulta(tipo, ident, parametros(params), out["linhas"], 0,
+                           (time.perf_counter() - t0) * 1000, cache="hit"))
+
+
+def resumo(consultas: Optional[List[Consulta]] = None) -> Dict[str, float]:
+    consultas = linhas() if consultas is None else consultas
+    rede = [c for c in consultas if c.cache == "miss"]
+    return {
+        "consultas": len(consultas),
+        "requisicoes": len(rede),
+        "hits": len(consultas) - len(rede),
+        "bytes": sum(c.bytes for c in rede),
+        "latencia_ms": sum(c.latencia_ms for c in rede),
+    }
+
+
+def tabela(consultas: Optional[List[Consulta]] = None) -> pd.DataFrame:
+    consultas = linhas() if consultas is None else consultas
+    return pd.DataFrame([{k: v for k, v in asdict(c).items() if k != "extra"} for c in consultas])
+
+
+def verificar_orcamento(dashboard: str, consultas: Optional[List[Consulta]] = None) -> List[str]:
+    """Mensagens para cada limite de ORCAMENTOS[dashboard] estourado neste rerun."""
+    limite = ORCAMENTOS.get(dashboard)
+    if not limite:
+        return []
+    r = resumo(consultas)
+    out = []
+    if r["requisicoes"] > limite["requisicoes"]:
+        out.append(f"{r['requisicoes']} requisições (limite {limite['requisicoes']:.0f})")
+    if r["bytes"] > limite["bytes"]:
+        out.append(f"{r['bytes'] / 1e6:.1f} MB (limite {limite['bytes'] / 1e6:.0f} MB)")
+    return out
+
+
+def totais() -> Dict[str, Dict[str, float]]:
+    """Acumulado do processo por identidade (todas as sessões)."""
+    with _lock:
+        return {k: dict(v) for k, v in _totais.items()}
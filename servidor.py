@@ -0,0 +1,21 @@
+"""
+Sobe o dashboard com o aquecimento (aquecimento.py) rodando desde a
+subida do processo, antes da primeira sessão conectar.
+
+    python servidor.py                       # = streamlit run novo.py
+    python servidor.py --server.port 8502    # demais opções do streamlit run
+"""
+import sys
+
+import aquecimento
+import pool
+
+if __name__ == "__main__":
+    from streamlit.web import cli
+
+    aquecimento.fixar_caminho()
+    # workers lançados aqui, com servidor.py como __main__ (pool.py)
+    pool.iniciar()
+    aquecimento.iniciar()
+    sys.argv = ["streamlit", "run", "novo.py", *sys.argv[1:]]
+    sys.exit(cli.main())
@@ -0,0 +1,92 @@
+import logging
+import threading
+import time
+from typing import Callable, Dict, Hashable, Tuple
+
+logger = logging.getLogger(__name__)
+
+# -------------------------------------------------------------------
+# SINGLE-FLIGHT: CHAMADAS IDÊNTICAS SIMULTÂNEAS VIRAM UMA SÓ
+# -------------------------------------------------------------------
+# Na troca de turno / depois de um deploy várias sessões pedem a mesma
+# coisa ao mesmo tempo. A primeira chamada com uma chave
+# (operacao, parametros..., versao dos dados) executa; as que chegam
+# enquanto ela está em voo esperam e recebem o mesmo resultado (ou a
+# mesma exceção). Nada fica guardado depois que o voo termina: isto
+# não é cache, é só o corte do rebanho. Quem guarda é o st.cache_* / o
+# memo do serviço.
+#
+# Obs.: st.cache_data já serializa misses iguais da MESMA função
+# cacheada; aqui cobrimos o que fica fora dele (pipeline do serviço,
+# chamado por duas funções cacheadas e pelo batch; probe de versão;
+# leitura de tblProjetos por Projetos e Financeiro).
+
+
+class _Voo:
+    __slots__ = ("pronto", "resultado", "erro", "seguidores")
+
+    def __init__(self) -> None:
+        self.pronto = threading.Event()
+        self.resultado = None
+        self.erro: BaseException | None = None
+        self.seguidores = 0
+
+
+_lock = threading.Lock()
+_voos: Dict[Tuple[str, Hashable], _Voo] = {}
+_metricas: Dict[str, Dict[str, float]] = {}
+
+
+def _conta(operacao: str, chave: str, valor: float = 1) -> None:
+    m = _metricas.setdefault(operacao, {"execucoes": 0, "coalescidas": 0, "erros": 0, "espera_total_s": 0.0})
+    m[chave] += valor
+
+
+def executar(operacao: str, chave: Hashable, fn: Callable, *args, **kwargs):
+    """
+    fn(*args, **kwargs) uma única vez por (operacao, chave) em voo; chamadas
+    concorrentes com a mesma chave esperam e recebem o mesmo objeto.
+    """
+    k = (operacao, chave)
+    with _lock:
+        voo = _voos.get(k)
+        lider = voo is None
+        if lider:
+            voo = _voos[k] = _Voo()
+            _conta(operacao, "execucoes")
+        else:
+            voo.seguidores += 1
+            _conta(operacao, "coalescidas")
+
+    if not lider:
+        t0 = time.perf_counter()
+        voo.pronto.wait()
+        with _lock:
+            _conta(operacao, "espera_total_s", time.perf_counter() - t0)
+        if voo.erro is not None:
+            raise voo.erro
+        return voo.resultado
+
+    try:
+        voo.resultado = fn(*args, **kwargs)
+        return voo.resultado
+    except BaseException as e:
+        voo.erro = e
+        with _lock:
+            _conta(operacao, "erros")
+        raise
+    finally:
+        with _lock:
+            _voos.pop(k, None)
+        if voo.seguidores:
+            logger.info(f"{operacao}: {voo.seguidores} chamada(s) aproveitaram o mesmo voo")
+        voo.pronto.set()
+
+
+def metricas() -> Dict[str, Dict[str, float]]:
+    with _lock:
+        out = {op: dict(m) for op, m in _metricas.items()}
+        em_voo = [op for op, _ in _voos]
+    for op, m in out.items():
+        m["em_voo"] = em_voo.count(op)
+    return out
@@ -0,0 +1,113 @@
+import math
+import random
+from typing import Iterable, List, Optional
+
+import numpy as np
+
+# -------------------------------------------------------------------
+# KLL SKETCH (quantis aproximados, mesclável)
+# -------------------------------------------------------------------
+# Mantém O(k) itens independente do volume de dados. Cada nível h é um
+# "compactor": quando enche, ordena, fica com metade dos itens (offset
+# aleatório) e promove essa metade para o nível h+1 com peso 2**h+1.
+# Dois sketches se combinam concatenando nível a nível e compactando,
+# então dá para ter um sketch por (etapa, mês) e juntar os meses de um
+# período sem reler as linhas.
+
+
+class KLLSketch:
+    def __init__(self, k: int = 200, c: float = 2 / 3, seed: Optional[int] = None) -> None:
+        self.k = k
+        self.c = c
+        self.compactors: List[list] = [[]]
+        self.n = 0
+        self.min = math.inf
+        self.max = -math.inf
+        self._rng = random.Random(seed)
+
+    def __len__(self) -> int:
+        return self.n
+
+    # --- capacidade por nível (níveis mais altos guardam mais) ---
+    def _capacity(self, h: int) -> int:
+        depth = len(self.compactors) - h - 1
+        return max(2, int(math.ceil(self.k * self.c ** depth)))
+
+    def _size(self) -> int:
+        return sum(len(c) for c in self.compactors)
+
+    def _max_size(self) -> int:
+        return sum(self._capacity(h) for h in range(len(self.compactors)))
+
+    def _compact_level(self, h: int) -> None:
+        if h + 1 >= len(self.compactors):
+            self.compactors.append([])
+        itens = sorted(self.compactors[h])
+        sobra = [itens.pop()] if len(itens) % 2 else []
+        offset = int(self._rng.random() < 0.5)
+        self.compactors[h + 1].extend(itens[offset::2])
+        self.compactors[h] = sobra
+
+    def _compress(self) -> None:
+        while self._size() >= self._max_size():
+            for h in range(len(self.compactors)):
+                if len(self.compactors[h]) >= self._capacity(h):
+                    self._compact_level(h)
+                    break
+            else:
+                break
+
+    # --- API ---
+    def update(self, x: float) -> None:
+        x = float(x)
+        self.compactors[0].append(x)
+        self.n += 1
+        self.min = min(self.min, x)
+        self.max = max(self.max, x)
+        if len(self.compactors[0]) >= self._capacity(0):
+            self._compress()
+
+    def update_many(self, values: Iterable[float]) -> None:
+        for x in values:
+            self.update(x)
+
+    def merge(self, other: "KLLSketch") -> "KLLSketch":
+        """Incorpora `other` neste sketch (in place) e devolve self."""
+        while len(self.compactors) < len(other.compactors):
+            self.compactors.append([])
+        for h, itens in enumerate(other.compactors):
+            self.compactors[h].extend(itens)
+        self.n += other.n
+        self.min = min(self.min, other.min)
+        self.max = max(self.max, other.max)
+        self._compress()
+        return self
+
+    def quantiles(self, qs: Iterable[float]) -> List[float]:
+        qs = list(qs)
+        if self.n == 0:
+            return [float("nan")] * len(qs)
+        valores = np.concatenate([np.asarray(c, dtype="float64") for c in self.compactors])
+        pesos = np.concatenate([
+            np.full(len(c), 2 ** h, dtype="float64") for h, c in enumerate(self.compactors)
+        ])
+        ordem = np.argsort(valores, kind="stable")
+        valores = valores[ordem]
+        acumulado = np.cumsum(pesos[ordem])
+        alvo = np.asarray(qs, dtype="float64") * acumulado[-1]
+        idx = np.minimum(np.searchsorted(acumulado, alvo, side="left"), len(valores) - 1)
+        out = valores[idx]
+        # extremos exatos
+        out = np.where(np.asarray(qs) <= 0, self.min, out)
+        out = np.where(np.asarray(qs) >= 1, self.max, out)
+        return out.tolist()
+
+    def quantile(self, q: float) -> float:
+        return self.quantiles([q])[0]
+
+
+def merge_all(sketches: Iterable[KLLSketch], k: int = 200) -> KLLSketch:
+    total = KLLSketch(k=k)
+    for s in sketches:
+        total.merge(s)
+    return total
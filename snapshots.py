@@ -0,0 +1,134 @@
+import hashlib
+import logging
+import os
+import threading
+from pathlib import Path
+from typing import Dict, Optional
+
+import pandas as pd
+import pyarrow as pa
+import pyarrow.compute as pc
+
+logger = logging.getLogger(__name__)
+
+# -------------------------------------------------------------------
+# SNAPSHOTS ARROW IPC MAPEADOS EM MEMÓRIA
+# -------------------------------------------------------------------
+# A tabela base é gravada UMA vez como arquivo Arrow IPC e aberta com
+# pa.memory_map (somente leitura): as páginas ficam no page cache do
+# SO e são compartilhadas por todas as sessões (e pelos processos do
+# pool), em vez de cada cópia pandas ocupar memória anônima própria.
+# Os filtros rodam em pyarrow.compute sobre o mapeamento e só a fatia
+# filtrada vira DataFrame: um frame novo a cada chamada, com memória
+# própria, que a sessão pode alterar sem tocar no snapshot nem nas
+# outras sessões (sem depender de opções globais do pandas).
+
+SNAPSHOT_DIR = Path(".cache") / "snapshots"
+
+_lock = threading.Lock()
+_abertos: Dict[str, "Snapshot"] = {}
+
+
+class Snapshot:
+    def __init__(self, nome: str, path: Path) -> None:
+        self.nome = nome
+        self.path = path
+        self._mmap = pa.memory_map(str(path), "r")
+        self.table: pa.Table = pa.ipc.open_file(self._mmap).read_all()
+
+    def __len__(self) -> int:
+        return self.table.num_rows
+
+    def __setitem__(self, coluna, valor) -> None:
+        raise TypeError(
+            f"Snapshot '{self.nome}' é somente leitura; derive colunas em carregar_base() "
+            "ou na fatia devolvida por filtrar()."
+        )
+
+    @property
+    def columns(self) -> list:
+        return self.table.column_names
+
+    def _escalar(self, coluna: str, valor):
+        tipo = self.table.schema.field(coluna).type
+        if pa.types.is_timestamp(tipo) or pa.types.is_date(tipo):
+            valor = pd.Timestamp(valor)
+            if pa.types.is_timestamp(tipo) and tipo.tz is not None and valor.tzinfo is None:
+                valor = valor.tz_localize(tipo.tz)
+        return pa.scalar(valor, type=tipo)
+
+    def filtrar(self, coluna_data: Optional[str] = None, inicio=None, fim=None,
+                colunas: Optional[list] = None, **iguais) -> pd.DataFrame:
+        """
+        Linhas com inicio <= coluna_data <= fim e coluna == valor para cada
+        item de `iguais` (valores None são ignorados). Só a fatia vira pandas,
+        num DataFrame novo e gravável (nunca uma visão do mapeamento).
+        """
+        mascara = None
+
+        def _e(m):
+            return m if mascara is None else pc.and_kleene(mascara, m)
+
+        if coluna_data is not None and inicio is not None:
+            mascara = _e(pc.greater_equal(self.table[coluna_data], self._escalar(coluna_data, inicio)))
+        if coluna_data is not None and fim is not None:
+            mascara = _e(pc.less_equal(self.table[coluna_data], self._escalar(coluna_data, fim)))
+        for coluna, valor in iguais.items():
+            if valor is not None:
+                mascara = _e(pc.equal(self.table[coluna], self._escalar(coluna, valor)))
+
+        tabela = self.table if mascara is None else self.table.filter(mascara, null_selection_behavior="drop")
+        if colunas is not None:
+            tabela = tabela.select(colunas)
+        # split_blocks=False consolida as colunas em blocos novos: cópia
+        # da fatia, não visão somente-leitura dos buffers mapeados
+        return tabela.to_pandas(split_blocks=False, self_destruct=False)
+
+    def unicos(self, coluna: str, df: Optional[pd.DataFrame] = None) -> list:
+        """Valores distintos (sem nulos), ordenados."""
+        if df is not None:
+            return sorted(pd.Series(df[coluna]).dropna().unique())
+        return sorted(v for v in pc.unique(self.table[coluna]).to_pylist() if v is not None)
+
+
+def _digest(df: pd.DataFrame) -> str:
+    h = pd.util.hash_pandas_object(df, index=False).to_numpy()
+    raw = h.tobytes() + "|".join(map(str, df.columns)).encode("utf-8")
+    return hashlib.sha1(raw).hexdigest()[:16]
+
+
+def publicar(nome: str, df: pd.DataFrame, base: Path | str = SNAPSHOT_DIR) -> Snapshot:
+    """
+    Grava (se ainda não existir) e abre mapeado o snapshot de `df`. O nome
+    do arquivo leva o hash do conteúdo: mesmo dado -> mesmo arquivo.
+    """
+    base = Path(base)
+    path = base / f"{nome}-{_digest(df)}.arrow"
+    with _lock:
+        atual = _abertos.get(nome)
+        if atual is not None and atual.path == path:
+            return atual
+        if not path.exists():
+            base.mkdir(parents=True, exist_ok=True)
+            tabela = pa.Table.from_pandas(df, preserve_index=False)
+            tmp = path.with_suffix(f".{os.getpid()}.tmp")
+            with pa.OSFile(str(tmp), "wb") as sink, pa.ipc.new_file(sink, tabela.schema) as writer:
+                writer.write_table(tabela)
+            tmp.replace(path)
+            logger.info(f"Snapshot gravado: {path} ({tabela.num_rows} linhas, {tabela.nbytes / 1e6:.1f} MB)")
+        snap = Snapshot(nome, path)
+        _abertos[nome] = snap
+        return snap
+
+
+def rss_mb() -> float:
+    """Memória residente do processo em MB (Linux: /proc; senão pico via resource)."""
+    try:
+        with open("/proc/self/status") as f:
+            for linha in f:
+                if linha.startswith("VmRSS:"):
+                    return int(linha.split()[1]) / 1024
+    except OSError:
+        pass
+    import resource
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
@@ -0,0 +1,220 @@
+import os
+
+import registro_io
+
+# -------------------------------------------------------------------
+# SQL DA PRODUÇÃO (RPC exec_sql)
+# -------------------------------------------------------------------
+# Consultas do dashboard de Produção, fora do módulo Streamlit para o
+# batch e os benchmarks usarem as mesmas strings. Parâmetros no
+# formato :nome (ver dash_producao._bind_params).
+#
+# Duas fontes:
+#   - tabelas base: JOIN tblProjetos x tblProducao + EXISTS em
+#     tblAcessorios, status de etapa calculados linha a linha;
+#   - producao_snapshot (migrations/0002): o JOIN já materializado,
+#     com acessório e status de etapa prontos e mantido por trigger.
+#     Só o status do projeto (depende da data de projeção) é calculado
+#     na consulta, e só sobre as ordens em aberto (índice parcial).
+# DASH_PRODUCAO_SNAPSHOT=1 liga a segunda fonte depois de aplicar as
+# migrações (python migrar.py).
+#
+# Índices (migrations/0001): as colunas <etapa>inicio/<etapa>fim só são
+# projetadas aqui (SELECT e CASE sobre a linha já lida); nenhum WHERE,
+# JOIN ou ORDER BY as usa, e as consultas leem as ordens pelo JOIN em
+# ordemdecompra, que é indexado. Índice nelas não seria usado por estas
+# consultas e cada gravação de etapa em tblProducao pagaria a
+# manutenção (e perderia o HOT update). corteinicio/cortefim servem ao
+# filtro de período do ProducaoService (database_media.load_raw_data).
+
+USAR_SNAPSHOT = os.environ.get("DASH_PRODUCAO_SNAPSHOT", "0") == "1"
+
+STATUS_ABERTOS = "('INICIADO','ATRASADO','A VENCER','URGENTE','PENDENCIA')"
+
+
+def status_case(alias: str = "p") -> str:
+    return f"""
+CASE
+  WHEN {alias}."pendencia" = TRUE THEN 'PENDENCIA'
+  WHEN {alias}."entrega" IS NOT NULL THEN 'ENTREGUE'
+  WHEN {alias}."iniciado" IS NOT NULL AND {alias}."urgente" = TRUE AND {alias}."pronto" IS NOT NULL THEN 'PRONTO'
+  WHEN {alias}."iniciado" IS NOT NULL AND {alias}."urgente" = TRUE THEN 'URGENTE'
+  WHEN {alias}."dataentrega"::date < :proj::date AND {alias}."pronto" IS NOT NULL THEN 'PRONTO'
+  WHEN {alias}."dataentrega"::date < :proj::date THEN 'ATRASADO'
+  WHEN ({alias}."dataentrega"::date - INTERVAL '9 day') < :proj::date AND {alias}."pronto" IS NOT NULL THEN 'PRONTO'
+  WHEN ({alias}."dataentrega"::date - INTERVAL '9 day') < :proj::date THEN 'A VENCER'
+  WHEN {alias}."pronto" IS NOT NULL THEN 'PRONTO'
+  WHEN {alias}."iniciado" IS NOT NULL THEN 'INICIADO'
+  ELSE 'AGUARDANDO'
+END
+"""
+
+
+STATUS_CASE = status_case("p")
+
+
+def etapa_case(prefixo: str) -> str:
+    return f"""
+    CASE
+      WHEN pr."{prefixo}fim" IS NOT NULL THEN 'FINALIZADO'
+      WHEN pr."{prefixo}inicio" IS NOT NULL THEN 'INICIADO'
+      ELSE 'AGUARDE'
+    END
+    """
+
+
+def _aberta(alias: str) -> str:
+    """
+    Pré-filtro equivalente a Status IN STATUS_ABERTOS: pendência, ou sem
+    entrega e sem pronto e (iniciado ou vencendo em até 9 dias). Casa com
+    o índice parcial de producao_snapshot.
+    """
+    return f"""(
+    {alias}."pendencia" = TRUE
+    OR ({alias}."entrega" IS NULL AND {alias}."pronto" IS NULL
+        AND ({alias}."iniciado" IS NOT NULL OR {alias}."dataentrega"::date < :proj::date + 9))
+  )"""
+
+
+_ETAPAS_COLS = """
+    pr."corteinicio", pr."cortefim",
+    pr."customizacaoinicio", pr."customizacaofim",
+    pr."coladeirainicio", pr."coladeirafim",
+    pr."usinageminicio", pr."usinagemfim",
+    pr."paineisinicio", pr."paineisfim",
+    pr."montageminicio", pr."montagemfim",
+    pr."embalageminicio", pr."embalagemfim",
+"""
+
+_ORDEM = 'ORDER BY "previsao", "urgente", "Prazo", "cliente", "codcc"'
+
+# ---------------- tabelas base ----------------
+
+PAINEL_BASE_SQL = f"""
+WITH dados AS (
+  SELECT
+    CASE WHEN EXISTS (
+      SELECT 1 FROM "tblAcessorios" a
+      WHERE a."ordemdecompra" = p."ordemdecompra"
+    ) THEN '*' ELSE '' END AS "A",
+    p."ordemdecompra",
+    p."pedido",
+    p."etapa",
+    p."codcc",
+    p."cliente",
+    p."contrato",
+    p."ambiente",
+    {STATUS_CASE} AS "Status",
+    (p."dataentrega"::date - :proj::date) AS "Prazo",
+    {etapa_case("corte")}           AS "SCorte",
+    {etapa_case("customizacao")}    AS "SCustom",
+    {etapa_case("coladeira")}       AS "SColadeira",
+    {etapa_case("usinagem")}        AS "SUsinagem",
+    {etapa_case("paineis")}         AS "SPaineis",
+    {etapa_case("montagem")}        AS "SMontagem",
+    {etapa_case("embalagem")}       AS "SEmbalagem",
+    CASE
+      WHEN pr."separacao" IS NOT NULL THEN 'FINALIZADO'
+      WHEN pr."embalagemfim" IS NOT NULL THEN 'INICIADO'
+      ELSE 'AGUARDE'
+    END AS "SSeparacao",
+    p."dataentrega",
+    p."previsao",
+    p."urgente",
+    CASE WHEN p."pronto" IS NOT NULL THEN 'Certo' END AS "Teste",
+    pr."observacoes"
+  FROM "tblProjetos" p
+  INNER JOIN "tblProducao" pr
+    ON p."ordemdecompra" = pr."ordemdecompra"
+  WHERE p."ordemdecompra" > 0
+)
+SELECT * FROM dados
+WHERE "Status" IN {STATUS_ABERTOS}
+{_ORDEM};
+"""
+
+PREVISAO_BASE_SQL = f"""
+WITH dados AS (
+  SELECT
+    p."codcc",
+    p."cliente",
+    p."contrato",
+    p."ambiente",
+    {STATUS_CASE} AS "Status",
+    (p."dataentrega"::date - :proj::date) AS "Prazo",
+{_ETAPAS_COLS}
+    p."dataentrega",
+    p."previsao",
+    p."urgente"
+  FROM "tblProjetos" p
+  INNER JOIN "tblProducao" pr
+    ON p."ordemdecompra" = pr."ordemdecompra"
+  WHERE p."ordemdecompra" > 0
+)
+SELECT * FROM dados
+WHERE "Status" IN {STATUS_ABERTOS}
+{_ORDEM};
+"""
+
+ETAPAS_BASE_SQL = f"""
+SELECT
+  pr."ordemdecompra",
+{_ETAPAS_COLS.rstrip().rstrip(',')}
+FROM "tblProducao" pr
+WHERE pr."ordemdecompra" > 0
+"""
+
+# ---------------- producao_snapshot ----------------
+
+PAINEL_SNAPSHOT_SQL = f"""
+WITH dados AS (
+  SELECT
+    s."A", s."ordemdecompra", s."pedido", s."etapa", s."codcc",
+    s."cliente", s."contrato", s."ambiente",
+    {status_case("s")} AS "Status",
+    (s."dataentrega"::date - :proj::date) AS "Prazo",
+    s."SCorte", s."SCustom", s."SColadeira", s."SUsinagem",
+    s."SPaineis", s."SMontagem", s."SEmbalagem", s."SSeparacao",
+    s."dataentrega", s."previsao", s."urgente",
+    CASE WHEN s."pronto" IS NOT NULL THEN 'Certo' END AS "Teste",
+    s."observacoes"
+  FROM "producao_snapshot" s
+  WHERE s."ordemdecompra" > 0
+    AND {_aberta("s")}
+)
+SELECT * FROM dados
+WHERE "Status" IN {STATUS_ABERTOS}
+{_ORDEM};
+"""
+
+PREVISAO_SNAPSHOT_SQL = f"""
+WITH dados AS (
+  SELECT
+    pr."codcc", pr."cliente", pr."contrato", pr."ambiente",
+    {status_case("pr")} AS "Status",
+    (pr."dataentrega"::date - :proj::date) AS "Prazo",
+{_ETAPAS_COLS}
+    pr."dataentrega", pr."previsao", pr."urgente"
+  FROM "producao_snapshot" pr
+  WHERE pr."ordemdecompra" > 0
+    AND {_aberta("pr")}
+)
+SELECT * FROM dados
+WHERE "Status" IN {STATUS_ABERTOS}
+{_ORDEM};
+"""
+
+# ETAPAS_SQL só lê tblProducao: o snapshot não ajuda
+PAINEL_SQL = PAINEL_SNAPSHOT_SQL if USAR_SNAPSHOT else PAINEL_BASE_SQL
+PREVISAO_SQL = PREVISAO_SNAPSHOT_SQL if USAR_SNAPSHOT else PREVISAO_BASE_SQL
+ETAPAS_SQL = ETAPAS_BASE_SQL
+
+# nomes legíveis no registro de I/O (registro_io) em vez do hash do SQL
+for _sql, _nome in (
+    (PAINEL_BASE_SQL, "painel"),
+    (PAINEL_SNAPSHOT_SQL, "painel (snapshot)"),
+    (PREVISAO_BASE_SQL, "previsao"),
+    (PREVISAO_SNAPSHOT_SQL, "previsao (snapshot)"),
+    (ETAPAS_BASE_SQL, "etapas"),
+):
+    registro_io.nomear(_sql, _nome)
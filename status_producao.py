@@ -0,0 +1,119 @@
+import hashlib
+from dataclasses import dataclass
+
+import numpy as np
+import pandas as pd
+
+# -------------------------------------------------------------------
+# AGREGAÇÃO DE STATUS DA PRODUÇÃO (UMA PASSADA)
+# -------------------------------------------------------------------
+# O painel de Produção contava status derretendo as sete colunas S* num
+# frame 7x maior (melt + value_counts) e depois refazia contagens com
+# apply(value_counts) e groupbys para os KPIs. Aqui cada coluna de texto
+# vira códigos inteiros (pd.factorize) uma vez e todas as contagens
+# saem de np.bincount sobre esses códigos:
+#   etapa x status  -> bincount(etapa * k + codigo) sobre a matriz n x 7
+#   Status          -> bincount(codigo do Status)
+#   cliente         -> bincount(codigo do cliente), com e sem contrato
+# Atrasados e prazo médio são uma comparação e uma média sobre Prazo.
+# Gráficos e st.metric consomem o mesmo ResumoStatus.
+
+STATUS_COLUMNS = ['SCorte', 'SCustom', 'SColadeira', 'SPaineis', 'SUsinagem', 'SMontagem', 'SEmbalagem']
+SEM_CLIENTE = 'SEM CLIENTE'
+
+
+@dataclass(frozen=True)
+class ResumoStatus:
+    etapas: pd.DataFrame        # Etapa, Etapa_Titulo, Etapa_Ordem, Status_Producao, Contagem
+    status: pd.DataFrame        # Status, Contagem, Porcentagem, %   (ordem de value_counts)
+    clientes: pd.DataFrame      # cliente, ambientes, contratos
+    total_ordens: int
+    atrasados: int
+    prazo_medio: float
+    chave: str
+
+    def __repr__(self) -> str:
+        # usado na impressão digital das entradas dos fragmentos
+        return f"ResumoStatus({self.chave})"
+
+    @property
+    def status_por_etapa_total(self) -> pd.Series:
+        """Status de etapa somados nas sete etapas (ordem alfabética)."""
+        return self.etapas.groupby('Status_Producao', sort=True)['Contagem'].sum()
+
+    @property
+    def distribuicao_etapas(self) -> pd.Series:
+        """Percentual de cada status de etapa sobre todas as etapas preenchidas."""
+        tot = self.status_por_etapa_total.sort_values(ascending=False, kind='stable')
+        return (tot / (tot.sum() or 1) * 100).round(2)
+
+    @property
+    def cliente_mais_contratos(self) -> tuple[str, int] | None:
+        c = self.clientes[self.clientes['cliente'] != SEM_CLIENTE]
+        if c.empty:
+            return None
+        top = c.loc[c['contratos'].idxmax()]
+        return top['cliente'], int(top['contratos'])
+
+
+def _contagem(valores: np.ndarray) -> tuple[np.ndarray, np.ndarray]:
+    """(categorias, contagens) de uma coluna, nulos fora."""
+    codigos, categorias = pd.factorize(valores)
+    validos = codigos[codigos >= 0]
+    return np.asarray(categorias), np.bincount(validos, minlength=len(categorias))
+
+
+def agregar_status(df: pd.DataFrame) -> ResumoStatus:
+    n = len(df)
+
+    # etapa x status: matriz n x 7 fatorada de uma vez
+    matriz = df[STATUS_COLUMNS].to_numpy(dtype=object).ravel()
+    codigos, categorias = pd.factorize(matriz)
+    k = len(categorias)
+    etapa = np.tile(np.arange(len(STATUS_COLUMNS)), n)
+    ok = codigos >= 0
+    cruz = np.bincount(etapa[ok] * k + codigos[ok], minlength=len(STATUS_COLUMNS) * k)
+    cruz = cruz.reshape(len(STATUS_COLUMNS), k)
+    ii, jj = np.nonzero(cruz)
+    etapas = pd.DataFrame({
+        'Etapa': np.asarray(STATUS_COLUMNS)[ii],
+        'Etapa_Titulo': [STATUS_COLUMNS[i][1:] for i in ii],
+        'Etapa_Ordem': ii,
+        'Status_Producao': np.asarray(categorias, dtype=object)[jj],
+        'Contagem': cruz[ii, jj],
+    })
+
+    # Status do projeto
+    cats, cont = _contagem(df['Status'].to_numpy(dtype=object))
+    ordem = np.argsort(-cont, kind='stable')
+    status = pd.DataFrame({'Status': cats[ordem], 'Contagem': cont[ordem]})
+    status = status[status['Contagem'] > 0].reset_index(drop=True)
+    status['Porcentagem'] = status['Contagem'] / (status['Contagem'].sum() or 1) * 100
+    status['%'] = [f'{x:.0f}%' for x in status['Porcentagem']]
+
+    # clientes: linhas (ambientes) e contratos preenchidos por cliente
+    cod_cli, cli = pd.factorize(df['cliente'].to_numpy(dtype=object), use_na_sentinel=False)
+    com_contrato = df['contrato'].notna().to_numpy(dtype=np.float64)
+    ambientes = np.bincount(cod_cli, minlength=len(cli))
+    contratos = np.bincount(cod_cli, weights=com_contrato, minlength=len(cli)).astype(int)
+    nomes = pd.Series(cli, dtype=object)
+    clientes = pd.DataFrame({
+        'cliente': nomes.where(nomes.notna(), SEM_CLIENTE).astype(str).to_numpy(),
+        'ambientes': ambientes,
+        'contratos': contratos,
+    })
+
+    prazo = pd.to_numeric(df['Prazo'], errors='coerce').to_numpy(dtype=np.float64)
+    com_prazo = ~np.isnan(prazo)
+    atrasados = int((prazo[com_prazo] < 0).sum())
+    prazo_medio = float(prazo[com_prazo].mean()) if com_prazo.any() else float('nan')
+
+    total_ordens = int(df['ordemdecompra'].nunique())
+    digest = hashlib.sha1(
+        cruz.tobytes() + cont.tobytes() + ambientes.tobytes()
+        + "|".join(map(str, categorias)).encode() + "|".join(map(str, cats)).encode()
+        + "|".join(clientes['cliente']).encode()
+        + f"{n}|{total_ordens}|{atrasados}|{prazo_medio}".encode()
+    ).hexdigest()[:16]
+
+    return ResumoStatus(etapas, status, clientes, total_ordens, atrasados, prazo_medio, digest)
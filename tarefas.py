@@ -0,0 +1,54 @@
+from typing import Dict, List, Tuple
+
+import numpy as np
+import pandas as pd
+
+from generator import Generator, parse_dt
+
+# -------------------------------------------------------------------
+# TAREFAS EXECUTADAS NO POOL DE PROCESSOS
+# -------------------------------------------------------------------
+# Funções de módulo (pickláveis) que recebem e devolvem arrays NumPy.
+# Rodam em processos do pool.py, longe do GIL do servidor Streamlit.
+
+
+def duracoes_trabalhadas(pares: Dict[str, Tuple[np.ndarray, np.ndarray]]) -> Dict[str, np.ndarray]:
+    """
+    {etapa: (inicios, fins)} em datetime64 -> {etapa: horas trabalhadas}.
+    Mesmo laço de ProducaoService.calcular_duracao_trabalhada.
+    """
+    from database_media import ProducaoService  # import no worker, não no servidor
+
+    calc = ProducaoService.calcular_duracao_trabalhada
+    out = {}
+    for etapa, (inicios, fins) in pares.items():
+        ini = pd.DatetimeIndex(inicios)
+        fim = pd.DatetimeIndex(fins)
+        out[etapa] = np.fromiter((calc(a, b) for a, b in zip(ini, fim)), dtype="float64", count=len(ini))
+    return out
+
+
+def preencher_previsao(valores: np.ndarray, colunas: List[str],
+                       agora: pd.Timestamp) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    Laço do create_df_filled: percorre as células de data (linha a linha,
+    coluna a coluna) preenchendo as vazias (NaT) com as médias do Generator,
+    a partir de `agora`. Recebe e devolve datetime64; a máscara marca as
+    células previstas.
+    """
+    previstas = np.isnat(valores)
+    saida = valores.copy()
+    # precisão de segundos, como no texto dd/mm/aaaa HH:MM:SS de antes
+    celulas = valores.astype('datetime64[s]').astype(object)
+    gerador = Generator(['corteinicio', 'customizacaoinicio', 'coladeirainicio', 'usinageminicio',
+                         'paineisinicio', 'montageminicio', 'embalageminicio'],
+                        now=agora.to_pydatetime())
+    for i in range(valores.shape[0]):
+        for j, col in enumerate(colunas):
+            if previstas[i, j]:
+                data_hora = parse_dt(gerador.fill_mean_time(col))
+                saida[i, j] = np.datetime64(data_hora, 'ns')
+                gerador.last_date(data_hora)
+            else:
+                gerador.last_date(celulas[i, j])
+    return saida, previstas
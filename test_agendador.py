@@ -0,0 +1,69 @@
+import numpy as np
+import pandas as pd
+
+from agendador import ETAPAS_FLUXO, agendar, conclusao_por_ordem
+from calendario import DEFAULT_CALENDAR
+
+AGORA = pd.Timestamp("2025-01-06 08:00")  # segunda-feira
+
+
+def _abertas(n: int, **colunas) -> pd.DataFrame:
+    df = pd.DataFrame({
+        "urgente": [False] * n,
+        "previsao": pd.date_range("2025-02-01", periods=n, freq="D"),
+        "Prazo": np.arange(n),
+    })
+    for etapa in ETAPAS_FLUXO:
+        df[f"{etapa}inicio"] = pd.NaT
+        df[f"{etapa}fim"] = pd.NaT
+    for nome, valor in colunas.items():
+        df[nome] = valor
+    return df
+
+
+def _maximo_simultaneo(agenda: pd.DataFrame) -> int:
+    pontos = pd.concat([
+        pd.DataFrame({"t": agenda["inicio"], "d": 1}),
+        pd.DataFrame({"t": agenda["fim"], "d": -1}),
+    ]).sort_values(["t", "d"], kind="stable")
+    return int(pontos["d"].cumsum().max())
+
+
+def test_capacidade_respeitada_por_estacao():
+    df = _abertas(12)
+    capacidade = {"corte": 1, "usinagem": 3}
+    agenda, utilizacao = agendar(df, capacidade, agora=AGORA)
+    assert len(agenda) == 12 * len(ETAPAS_FLUXO)
+    for etapa in ETAPAS_FLUXO:
+        assert _maximo_simultaneo(agenda[agenda["etapa"] == etapa]) <= capacidade.get(etapa, 1)
+    assert ((utilizacao["utilizacao"] > 0) & (utilizacao["utilizacao"] <= 1)).all()
+
+    # cada ordem segue o fluxo em ordem
+    for _, g in agenda.groupby("posicao"):
+        assert list(g.sort_values("inicio")["etapa"]) == ETAPAS_FLUXO
+        assert (g.sort_values("inicio")["inicio"].to_numpy()[1:] >= g.sort_values("inicio")["fim"].to_numpy()[:-1]).all()
+
+
+def test_urgente_passa_na_frente_e_expediente_respeitado():
+    df = _abertas(3, urgente=[False, False, True])
+    agenda, _ = agendar(df, duracoes={e: 2.0 for e in ETAPAS_FLUXO}, agora=AGORA)
+    corte = agenda[agenda["etapa"] == "corte"].sort_values("inicio")
+    assert list(corte["posicao"]) == [2, 0, 1]
+    assert corte["inicio"].iloc[0] == AGORA
+    horas = (DEFAULT_CALENDAR.to_business_seconds(corte["fim"]) - DEFAULT_CALENDAR.to_business_seconds(corte["inicio"])) / 3600
+    np.testing.assert_allclose(horas, 2.0)
+
+
+def test_etapas_finalizadas_puladas_e_conclusao():
+    df = _abertas(2)
+    for etapa in ETAPAS_FLUXO[:-1]:
+        df.loc[0, f"{etapa}inicio"] = pd.Timestamp("2025-01-02 08:00")
+        df.loc[0, f"{etapa}fim"] = pd.Timestamp("2025-01-02 09:00")
+    for etapa in ETAPAS_FLUXO:
+        df.loc[1, f"{etapa}fim"] = pd.Timestamp("2025-01-03 09:00")
+    agenda, _ = agendar(df, agora=AGORA)
+    assert list(agenda.loc[agenda["posicao"] == 0, "etapa"]) == [ETAPAS_FLUXO[-1]]
+    assert (agenda["posicao"] != 1).all()
+    conclusao = conclusao_por_ordem(df, agenda)
+    assert conclusao.iloc[0] == agenda.loc[agenda["posicao"] == 0, "fim"].max()
+    assert pd.isna(conclusao.iloc[1])
@@ -0,0 +1,32 @@
+import json
+from datetime import datetime, timedelta
+
+import pandas as pd
+
+import artefatos
+
+
+def test_mesma_versao(tmp_path):
+    df = pd.DataFrame({"Etapa": ["corte"], "p50": [1.5]})
+    artefatos.salvar(df, "producao_medias", "2025-01-01", "2025-06-30", "v1", tmp_path)
+    pd.testing.assert_frame_equal(artefatos.carregar("producao_medias", "2025-01-01", "2025-06-30", "v1", tmp_path), df)
+    assert artefatos.carregar("producao_medias", "2025-01-01", "2025-12-31", "v1", tmp_path) is None
+
+
+def test_outra_versao_dentro_do_frescor(tmp_path):
+    antigo = pd.DataFrame({"x": [1]})
+    novo = pd.DataFrame({"x": [2]})
+    artefatos.salvar(antigo, "producao_medias", "2025-01-01", "2025-06-30", "v1", tmp_path)
+    artefatos.salvar(novo, "producao_medias", "2025-01-01", "2025-06-30", "v2", tmp_path)
+    # versão atual (v3, escrita depois do cron) sem artefato: usa o mais recente
+    r = artefatos.carregar("producao_medias", "2025-01-01", "2025-06-30", "v3", tmp_path, frescor=600)
+    pd.testing.assert_frame_equal(r, novo)
+
+    # velho demais: calcula no dashboard
+    manifest = json.loads((tmp_path / "manifest.json").read_text())
+    velho = (datetime.now() - timedelta(hours=2)).isoformat(timespec="seconds")
+    for versao in ("v1", "v2"):
+        for item in manifest[versao].values():
+            item["gerado_em"] = velho
+    (tmp_path / "manifest.json").write_text(json.dumps(manifest))
+    assert artefatos.carregar("producao_medias", "2025-01-01", "2025-06-30", "v3", tmp_path, frescor=600) is None
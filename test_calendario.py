@@ -0,0 +1,51 @@
+import numpy as np
+import pandas as pd
+
+from calendario import DEFAULT_CALENDAR
+from database_media import ProducaoService
+
+
+def _instantes(n: int, seed: int) -> pd.DatetimeIndex:
+    rng = np.random.default_rng(seed)
+    base = pd.Timestamp("2025-01-01")
+    minutos = rng.integers(0, 60 * 24 * 60, n)  # ~2 meses, qualquer hora / dia da semana
+    out = base + pd.to_timedelta(minutos, unit="min")
+    out = out.where(rng.random(n) > 0.05)  # alguns NaT
+    return pd.DatetimeIndex(out)
+
+
+def test_worked_hours_igual_ao_laco_original():
+    ini = _instantes(3000, 1)
+    fim = ini + pd.to_timedelta(np.random.default_rng(2).integers(-600, 60 * 24 * 20, len(ini)), unit="min")
+    esperado = np.array([ProducaoService.calcular_duracao_trabalhada(a, b) for a, b in zip(ini, fim)])
+    np.testing.assert_allclose(DEFAULT_CALENDAR.worked_hours(ini, fim), esperado, atol=1e-9)
+
+
+def test_worked_hours_casos_de_borda():
+    casos = [
+        ("2025-01-06 07:00", "2025-01-06 17:00", 9.0),    # antes/depois do expediente colam nos limites
+        ("2025-01-10 15:30", "2025-01-13 08:30", 2.0),    # sexta -> segunda
+        ("2025-01-11 10:00", "2025-01-13 10:00", 0.0),    # início no sábado
+        ("2025-01-08 12:00", "2025-01-07 12:00", 0.0),    # fim antes do início
+        ("2025-01-06 09:00", None, 0.0),
+    ]
+    ini = pd.to_datetime([c[0] for c in casos])
+    fim = pd.to_datetime([c[1] for c in casos])
+    np.testing.assert_allclose(DEFAULT_CALENDAR.worked_hours(ini, fim), [c[2] for c in casos])
+
+
+def test_add_business_hours_e_ida_e_volta():
+    inicio = np.array(["2025-01-06T07:30", "2025-01-10T15:00", "2025-01-11T10:00", "NaT"], dtype="datetime64[ns]")
+    out = DEFAULT_CALENDAR.add_business_hours(inicio, [9.0, 2.0, 1.0, 1.0])
+    assert list(pd.DatetimeIndex(out).strftime("%Y-%m-%d %H:%M").fillna("NaT")) == [
+        "2025-01-06 16:30",  # fim exato do expediente fica no mesmo dia
+        "2025-01-13 08:00",  # 1,5h na sexta + 0,5h na segunda
+        "2025-01-13 08:30",  # sábado cola no fim da sexta
+        "NaT",
+    ]
+    dentro = np.array(["2025-01-06T07:31", "2025-01-07T12:15", "2025-01-10T16:29"], dtype="datetime64[ns]")
+    volta = DEFAULT_CALENDAR.from_business_seconds(DEFAULT_CALENDAR.to_business_seconds(dentro))
+    np.testing.assert_array_equal(volta, dentro)
+    # 07:30 de segunda e 16:30 de sexta são o mesmo instante útil; volta como fim da sexta
+    seg, sex = DEFAULT_CALENDAR.to_business_seconds(["2025-01-06T07:30", "2025-01-03T16:30"])
+    assert seg == sex
@@ -0,0 +1,102 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+import database_media
+from database_media import DURATION_COLUMNS, ETAPAS, ProducaoService
+
+
+def _producao(n: int = 60, seed: int = 9, inicio: str = "2025-01-06") -> pd.DataFrame:
+    rng = np.random.default_rng(seed)
+    df = pd.DataFrame({"ordemdecompra": np.arange(n)})
+    t = pd.Timestamp(inicio) + pd.to_timedelta(rng.integers(0, 60 * 24 * 60, n), unit="min")
+    for etapa in ETAPAS:
+        df[f"{etapa}inicio"] = t
+        t = t + pd.to_timedelta(rng.integers(30, 60 * 24 * 4, n), unit="min")
+        df[f"{etapa}fim"] = t.where(rng.random(n) > 0.1)
+    return df
+
+
+@pytest.fixture
+def servico(tmp_path, monkeypatch):
+    monkeypatch.setattr(ProducaoService, "_create_supabase_client", lambda self: None)
+    return ProducaoService(cache_dir=tmp_path)
+
+
+def test_duracoes_incrementais_so_recalcula_o_que_mudou(servico, monkeypatch):
+    linhas = []
+    original = ProducaoService.calcular_duracoes
+
+    def calcular(self, df):
+        # o cálculo (pool) roda fora do lock do serviço
+        assert not self._lock.locked()
+        linhas.append(len(df))
+        return original(self, df)
+
+    monkeypatch.setattr(ProducaoService, "calcular_duracoes", calcular)
+    df = _producao()
+    out = servico.duracoes_incrementais(df)
+    esperado = [ProducaoService.calcular_duracao_trabalhada(a, b)
+                for a, b in zip(df["corteinicio"], df["cortefim"])]
+    np.testing.assert_allclose(out["DuraçãocorteHoras"], esperado)
+
+    alterado = df.copy()
+    alterado.loc[3, "cortefim"] += pd.Timedelta(hours=2)
+    servico.duracoes_incrementais(alterado)
+    assert linhas == [len(df), 1]
+    # a assinatura antiga da ordem alterada sai do store
+    assert len(servico._duracoes) == len(df)
+    assert list(servico.duracoes_incrementais(alterado)[DURATION_COLUMNS].isna().sum()) == [0] * len(ETAPAS)
+    assert linhas == [len(df), 1]
+
+
+def test_store_persistido_entre_instancias(servico, tmp_path):
+    servico.duracoes_incrementais(_producao())
+    outro = ProducaoService(cache_dir=tmp_path)
+    assert len(outro._duracoes) == len(servico._duracoes)
+    assert database_media.Path(tmp_path / "duracoes.parquet").exists()
+
+
+def _contagem_direta(servico, etapa: str, mes: str) -> int:
+    e = ETAPAS.index(etapa)
+    store = servico._duracoes
+    no_mes = store[database_media.MES_COLUMNS[e]] == np.datetime64(mes, "M").astype("int64")
+    return int((no_mes & (store[DURATION_COLUMNS[e]] > 0)).sum())
+
+
+def test_sketches_alimentados_pelas_linhas_alteradas(servico, monkeypatch):
+    df = _producao(200)
+    servico.duracoes_incrementais(df)
+    chaves = set(servico._sketches)
+    assert chaves and all(servico._sketches[k].n == _contagem_direta(servico, *k) for k in chaves)
+
+    # linha nova: só update, nenhum sketch remontado
+    remontados = []
+    original = ProducaoService._sketches_do_store
+    monkeypatch.setattr(ProducaoService, "_sketches_do_store",
+                        classmethod(lambda cls, store: remontados.append(len(store)) or original.__func__(cls, store)))
+    nova = _producao(1, seed=99).assign(ordemdecompra=10_000)
+    servico.duracoes_incrementais(pd.concat([df, nova], ignore_index=True))
+    assert remontados == []
+
+    # ordem alterada (fim do corte vai para outro mês): só os meses tocados são remontados
+    alterado = df.copy()
+    mes_antigo = str(alterado.loc[5, "cortefim"].to_datetime64().astype("datetime64[M]"))
+    alterado.loc[5, "cortefim"] += pd.Timedelta(days=40)
+    servico.duracoes_incrementais(alterado)
+    assert len(remontados) == 1 and remontados[0] < len(servico._duracoes)
+    for chave in set(servico._sketches) | {("corte", mes_antigo)}:
+        n = servico._sketches[chave].n if chave in servico._sketches else 0
+        assert n == _contagem_direta(servico, *chave)
+
+
+def test_sketches_persistidos_e_sem_leitura_do_banco(servico, tmp_path):
+    servico.duracoes_incrementais(_producao(100))
+    outro = ProducaoService(cache_dir=tmp_path)
+    assert {k: s.n for k, s in outro._sketches.items()} == {k: s.n for k, s in servico._sketches.items()}
+    # distribuicao_etapas só mescla sketches (o pipeline memorizado é a única leitura)
+    servico._pipeline = lambda inicio, fim: None
+    dist = servico.distribuicao_etapas("2025-01-01", "2025-12-31")
+    assert list(dist["Etapa"]) == ETAPAS
+    assert (dist["p50"] <= dist["p90"]).all()
+    assert dist["n"].sum() == sum(s.n for s in servico._sketches.values())
@@ -0,0 +1,51 @@
+import numpy as np
+import pandas as pd
+
+from eventos import ETAPAS, EventLog
+
+
+def _producao(n: int = 300, seed: int = 11) -> pd.DataFrame:
+    rng = np.random.default_rng(seed)
+    df = pd.DataFrame({"ordemdecompra": np.arange(n)})
+    for etapa in ETAPAS:
+        ini = pd.Timestamp("2025-01-01") + pd.to_timedelta(rng.integers(0, 60 * 24 * 30, n), unit="min")
+        fim = ini + pd.to_timedelta(rng.integers(-120, 60 * 24 * 5, n), unit="min")
+        df[f"{etapa}inicio"] = ini.where(rng.random(n) > 0.1)
+        df[f"{etapa}fim"] = fim.where(rng.random(n) > 0.2)
+    return df
+
+
+def _wip_ingenuo(df: pd.DataFrame, etapa: str, quando: pd.Timestamp) -> int:
+    ini, fim = df[f"{etapa}inicio"], df[f"{etapa}fim"]
+    valido = ini.notna() & ~(fim < ini)
+    return int((valido & (ini <= quando) & (fim.isna() | (fim > quando))).sum())
+
+
+def test_wip_igual_a_contagem_direta():
+    df = _producao()
+    log = EventLog.from_wide(df)
+    instantes = pd.date_range("2024-12-31", "2025-02-10", freq="7h")
+    for etapa in ETAPAS:
+        esperado = [_wip_ingenuo(df, etapa, t) for t in instantes]
+        assert list(log.wip_series(etapa, instantes)) == esperado
+        assert [log.wip_at(etapa, t) for t in instantes[::10]] == esperado[::10]
+
+
+def test_fim_no_mesmo_instante_do_inicio_seguinte():
+    t = pd.Timestamp("2025-03-03 10:00")
+    df = pd.DataFrame({
+        "ordemdecompra": [1, 2],
+        "corteinicio": [t - pd.Timedelta(hours=1), t],
+        "cortefim": [t, pd.NaT],
+    })
+    log = EventLog.from_wide(df, etapas=["corte"])
+    assert log.wip_at("corte", t) == 1
+    assert log.wip_at("corte", t - pd.Timedelta(hours=2)) == 0
+
+
+def test_wip_range_formato_longo():
+    log = EventLog.from_wide(_producao(50))
+    r = log.wip_range("2025-01-01", "2025-01-10", etapas=["corte", "usinagem"])
+    assert list(r.columns) == ["data", "etapa", "wip"]
+    assert len(r) == 2 * 10
+    assert log.wip_at("inexistente", "2025-01-05") == 0
@@ -0,0 +1,72 @@
+import numpy as np
+import pandas as pd
+from babel.numbers import format_currency, format_decimal
+
+import formatacao
+
+
+def _amostra(n: int = 2000, seed: int = 7) -> np.ndarray:
+    rng = np.random.default_rng(seed)
+    valores = np.concatenate([
+        rng.normal(0, 1e6, n),
+        rng.uniform(-10, 10, n),
+        [0.0, -0.0, 1.0, 999.999, 1000.0, 1234567.891, -0.4, 0.1 + 0.2],
+    ])
+    # empates exatos de meio centavo arredondam diferente (ver formatacao.py)
+    centavos = valores * 100
+    return valores[np.abs(centavos - np.trunc(centavos)) != 0.5]
+
+
+def test_moeda_igual_ao_babel():
+    valores = _amostra()
+    esperado = [format_currency(v, "BRL", locale="pt_BR") for v in valores]
+    assert list(formatacao.moeda(valores)) == esperado
+
+
+def test_decimal_igual_ao_babel():
+    valores = _amostra()
+    esperado = [format_decimal(v, locale="pt_BR") for v in valores]
+    assert list(formatacao.decimal(valores)) == esperado
+
+
+def test_valores_repetidos_e_sinal():
+    # cada valor distinto é formatado uma vez; 5 e -5 dividem o mesmo texto
+    valores = np.array([[5.0, -5.0, 5.0], [np.nan, 1234.5, -0.0]])
+    out = formatacao.moeda(valores)
+    assert out.shape == valores.shape
+    esperado = [format_currency(v, "BRL", locale="pt_BR") if not np.isnan(v) else None for v in valores.ravel()]
+    assert list(out.ravel()) == esperado
+
+
+def test_valor_unico_e_nan():
+    assert formatacao.moeda_valor(1234.5) == format_currency(1234.5, "BRL", locale="pt_BR")
+    assert formatacao.decimal_valor(0.125) == format_decimal(0.125, locale="pt_BR")
+    assert formatacao.moeda([np.nan, 1.0])[0] is None
+
+
+def test_horas_hhmm_igual_ao_decimal_to_hours_antigo():
+    def antigo(x):
+        if pd.isna(x):
+            return None
+        h = int(x)
+        return f"{h:02d}:{int((x - h) * 60):02d}"
+
+    valores = np.concatenate([np.random.default_rng(1).uniform(0, 300, 1000), [0.0, 1.5, 8.999, np.nan]])
+    assert list(formatacao.horas_hhmm(valores)) == [antigo(v) for v in valores]
+
+
+def test_numero_texto():
+    assert list(formatacao.numero_texto(pd.Series([100.0, 12.0, 3.5, np.nan]))) == ["100", "12", "3.5", "nan"]
+    assert list(formatacao.numero_texto(pd.Series(["0100.0", "12", "7.00"]))) == ["0100", "12", "7"]
+
+
+def test_datas_nat_vira_vazio():
+    valores = np.array(["2025-03-04T08:05:09", "NaT"], dtype="datetime64[ns]")
+    assert list(formatacao.datas(valores, formatacao.DATA_HORA_SEG)) == ["04/03/2025 08:05:09", ""]
+
+
+def test_formatar_datas_nao_altera_original():
+    df = pd.DataFrame({"d": pd.to_datetime(["2025-01-02", None]), "x": [1, 2]})
+    out = formatacao.formatar_datas(df, {"d": formatacao.DATA})
+    assert list(out["d"]) == ["02/01/2025", ""]
+    assert pd.api.types.is_datetime64_any_dtype(df["d"])
@@ -0,0 +1,66 @@
+import json
+import os
+
+import pytest
+
+import Json
+from Json import Settings
+
+
+@pytest.fixture
+def arquivo(tmp_path):
+    path = tmp_path / "Settings.json"
+    path.write_text(json.dumps({"data_inicial": "2025-01-01", "data_final": "2025-06-30", "cor": "#fff"}))
+    return str(path)
+
+
+def test_update_grava_todas_as_chaves_de_uma_vez(arquivo, monkeypatch):
+    gravacoes = []
+    original = Json._gravar
+    monkeypatch.setattr(Json, "_gravar", lambda p, d: (gravacoes.append(dict(d)), original(p, d)))
+
+    s = Settings(arquivo)
+    s.update({"data_inicial": "2025-02-01", "data_final": "2025-07-31", "cor": "#fff"})
+    assert len(gravacoes) == 1
+    assert json.loads(open(arquivo).read()) == {"data_inicial": "2025-02-01", "data_final": "2025-07-31", "cor": "#fff"}
+
+    s.update({"cor": "#fff"})  # nada mudou: não grava
+    assert len(gravacoes) == 1
+
+
+def test_update_mescla_com_o_que_outra_sessao_gravou(arquivo):
+    a = Settings(arquivo)
+    b = Settings(arquivo)
+    b.update({"cor": "#000"})
+    a.update({"data_final": "2025-12-31"})
+    assert json.loads(open(arquivo).read()) == {"data_inicial": "2025-01-01", "data_final": "2025-12-31", "cor": "#000"}
+    assert Settings(arquivo).key("cor") == "#000"
+
+
+def test_update_atomico_em_falha(arquivo, monkeypatch):
+    antes = open(arquivo).read()
+
+    def quebra(*args, **kwargs):
+        raise OSError("disco cheio")
+
+    monkeypatch.setattr(Json.os, "replace", quebra)
+    with pytest.raises(OSError):
+        Settings(arquivo).update({"cor": "#123"})
+    assert open(arquivo).read() == antes
+    assert os.listdir(os.path.dirname(arquivo)) == ["Settings.json"]  # temporário removido
+
+
+def test_leitura_relida_quando_arquivo_muda(arquivo):
+    assert Settings(arquivo).key("cor") == "#fff"
+    with open(arquivo, "w") as f:
+        json.dump({"cor": "#abcdef"}, f)
+    assert Settings(arquivo).key("cor") == "#abcdef"
+
+
+def test_perfil_sobrepoe_sem_tocar_no_arquivo(arquivo, tmp_path, monkeypatch):
+    monkeypatch.setattr(Json, "PERFIS_DB", tmp_path / "perfis.sqlite")
+    antes = open(arquivo).read()
+    Settings(arquivo, perfil="ana").update({"cor": "#111"})
+    assert open(arquivo).read() == antes
+    assert Settings(arquivo, perfil="ana").key("cor") == "#111"
+    assert Settings(arquivo, perfil="bia").key("cor") == "#fff"
@@ -0,0 +1,56 @@
+import numpy as np
+import pandas as pd
+
+import lead_times
+from calendario import DEFAULT_CALENDAR
+
+
+def _projetos(n: int = 400, seed: int = 5) -> pd.DataFrame:
+    rng = np.random.default_rng(seed)
+    base = pd.Timestamp("2024-01-01") + pd.to_timedelta(rng.integers(0, 365 * 24, n), unit="h")
+    df = pd.DataFrame({"ordemdecompra": np.arange(n)})
+    t = base
+    for marco in lead_times.MARCOS:
+        df[marco] = t.where(rng.random(n) > 0.1)  # alguns marcos ausentes
+        t = t + pd.to_timedelta(rng.integers(-24, 24 * 30, n), unit="h")  # às vezes fora de ordem
+    df["cliente"] = rng.choice(np.array(["ANA", "BRUNO", None], dtype=object), n)
+    df["loja"] = rng.choice(np.array(["Centro", "Norte"], dtype=object), n)
+    return df
+
+
+def test_calcular_lead_times_por_linha():
+    df = _projetos()
+    out = lead_times.calcular_lead_times(df)
+    for (trecho, ini, fim), c_horas, c_dias in zip(lead_times.TRECHOS, lead_times.LEAD_HORAS, lead_times.LEAD_DIAS):
+        dias = (df[fim] - df[ini]).dt.total_seconds() / 86400
+        esperado_dias = dias.where(dias >= 0)
+        np.testing.assert_allclose(out[c_dias], esperado_dias)
+        uteis = (DEFAULT_CALENDAR.to_business_seconds(df[fim]) - DEFAULT_CALENDAR.to_business_seconds(df[ini])) / 3600
+        np.testing.assert_allclose(out[c_horas], np.where(dias >= 0, uteis, np.nan))
+
+
+def test_resumir_igual_ao_groupby():
+    df = lead_times.calcular_lead_times(_projetos())
+    r = lead_times.resumir(df)
+    assert list(r.columns) == ["Dimensao", "Grupo", "Periodo", "Trecho", "n",
+                               "HorasUteisMedia", "HorasUteisP50", "DiasMedia", "DiasP50"]
+
+    for (trecho, _, fim), c_horas, c_dias in zip(lead_times.TRECHOS, lead_times.LEAD_HORAS, lead_times.LEAD_DIAS):
+        ok = df[df[c_dias].notna()]
+        g = ok.groupby([ok["loja"], ok[fim].dt.strftime("%Y-%m")])
+        esperado = pd.DataFrame({"n": g.size(), "HorasUteisMedia": g[c_horas].mean(), "DiasP50": g[c_dias].median()})
+        obtido = (r[(r["Dimensao"] == "loja") & (r["Trecho"] == trecho)]
+                  .set_index(["Grupo", "Periodo"])[["n", "HorasUteisMedia", "DiasP50"]])
+        obtido.index.names = esperado.index.names
+        pd.testing.assert_frame_equal(obtido.sort_index(), esperado.sort_index(), check_dtype=False)
+
+        total = r[(r["Dimensao"] == "total") & (r["Trecho"] == trecho)]
+        assert set(total["Grupo"]) == {"Todos"}
+        assert total["n"].sum() == len(ok)
+
+    assert "SEM CLIENTE" in set(r.loc[r["Dimensao"] == "cliente", "Grupo"])
+
+
+def test_resumir_vazio():
+    r = lead_times.resumir(pd.DataFrame())
+    assert r.empty and "Trecho" in r.columns
@@ -0,0 +1,72 @@
+import time
+
+import numpy as np
+import pandas as pd
+
+from calendario import DEFAULT_CALENDAR
+from montecarlo import ETAPAS_FLUXO, PERCENTIS, simular_conclusao
+
+AGORA = pd.Timestamp("2025-01-06 08:00")  # segunda-feira
+# orçamento interativo: a simulação entra no rerun da página de Produção
+# (p95 de 5s no loadtest), então 1000 ordens abertas cabem com folga
+ORCAMENTO_S = 2.0
+
+
+def _abertas(n: int, seed: int = 3) -> pd.DataFrame:
+    rng = np.random.default_rng(seed)
+    df = pd.DataFrame({"dataentrega": AGORA.normalize() + pd.to_timedelta(rng.integers(1, 40, n), unit="D")})
+    for etapa in ETAPAS_FLUXO:
+        df[f"{etapa}inicio"] = pd.NaT
+        df[f"{etapa}fim"] = pd.NaT
+    return df
+
+
+def _empiricas(seed: int = 5) -> dict:
+    rng = np.random.default_rng(seed)
+    return {etapa: rng.gamma(2.0, 3.0, 300) for etapa in ETAPAS_FLUXO}
+
+
+def test_percentis_ordenados_e_probabilidade():
+    out = simular_conclusao(_abertas(50), _empiricas(), agora=AGORA, n_cenarios=500, seed=1)
+    assert list(out.columns) == [f"P{p}" for p in PERCENTIS] + ["NoPrazo"]
+    assert (out["P50"] <= out["P80"]).all() and (out["P80"] <= out["P95"]).all()
+    assert (out["P50"] > AGORA).all()
+    assert out["NoPrazo"].between(0, 1).all()
+
+
+def test_etapas_finalizadas_nao_somam_tempo():
+    df = _abertas(2)
+    fim = pd.Timestamp("2025-01-03 10:00")
+    for etapa in ETAPAS_FLUXO:
+        df[f"{etapa}inicio"] = fim - pd.Timedelta(hours=1)
+        df[f"{etapa}fim"] = fim
+    # ordem 1: só a última etapa em aberto, com duração fixa de 2h
+    df.loc[1, f"{ETAPAS_FLUXO[-1]}inicio"] = pd.NaT
+    df.loc[1, f"{ETAPAS_FLUXO[-1]}fim"] = pd.NaT
+    empiricas = {etapa: np.array([2.0]) for etapa in ETAPAS_FLUXO}
+    out = simular_conclusao(df, empiricas, agora=AGORA, n_cenarios=200, seed=1)
+
+    # tudo finalizado: a conclusão é o instante "agora" (nada a somar)
+    assert (out.loc[0, [f"P{p}" for p in PERCENTIS]] == AGORA).all()
+    horas = (DEFAULT_CALENDAR.to_business_seconds(out.loc[[1], "P95"])
+             - DEFAULT_CALENDAR.to_business_seconds([AGORA])) / 3600
+    np.testing.assert_allclose(horas, 2.0)
+
+
+def test_semente_fixa_e_deterministica():
+    df, empiricas = _abertas(30), _empiricas()
+    a = simular_conclusao(df, empiricas, agora=AGORA, n_cenarios=300, seed=42)
+    b = simular_conclusao(df, empiricas, agora=AGORA, n_cenarios=300, seed=42)
+    c = simular_conclusao(df, empiricas, agora=AGORA, n_cenarios=300, seed=43)
+    pd.testing.assert_frame_equal(a, b)
+    assert not a.equals(c)
+
+
+def test_dentro_do_orcamento_interativo():
+    df, empiricas = _abertas(1000), _empiricas()
+    tempos = []
+    for _ in range(2):
+        t0 = time.perf_counter()
+        simular_conclusao(df, empiricas, agora=AGORA, n_cenarios=2000, seed=1)
+        tempos.append(time.perf_counter() - t0)
+    assert min(tempos) < ORCAMENTO_S, f"{min(tempos):.2f}s para 1000 ordens x 2000 cenários"
@@ -0,0 +1,27 @@
+from types import SimpleNamespace
+
+import registro_io
+
+
+class _Builder:
+    def execute(self):
+        return SimpleNamespace(data=[{"id": 1, "nome": "a"}, {"id": 2, "nome": "b"}])
+
+
+def test_select_so_mede_bytes_em_depuracao(monkeypatch):
+    monkeypatch.setattr(registro_io, "DEBUG", False)
+    registro_io.iniciar()
+    registro_io.select(_Builder(), "teste_bytes")
+    registro_io.iniciar(medir_bytes=True)
+    registro_io.select(_Builder(), "teste_bytes")
+    c = registro_io.linhas()[0]
+    assert (c.linhas, c.bytes) == (2, len(b'[{"id":1,"nome":"a"},{"id":2,"nome":"b"}]'))
+    assert registro_io.totais()["teste_bytes"]["bytes"] == c.bytes
+
+
+def test_depuracao_da_sessao_por_env(monkeypatch):
+    monkeypatch.setattr(registro_io, "DEBUG", True)
+    assert registro_io.depuracao_da_sessao()
+    monkeypatch.setattr(registro_io, "DEBUG", False)
+    monkeypatch.setattr(registro_io, "ADMIN_TOKEN", "")
+    assert not registro_io.depuracao_da_sessao()
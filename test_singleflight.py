@@ -0,0 +1,62 @@
+import threading
+import time
+
+import pytest
+
+import singleflight
+
+
+def _em_paralelo(n: int, fn):
+    resultados, erros = [None] * n, [None] * n
+    barreira = threading.Barrier(n)
+
+    def rodar(i):
+        barreira.wait()
+        try:
+            resultados[i] = fn()
+        except Exception as e:
+            erros[i] = e
+
+    threads = [threading.Thread(target=rodar, args=(i,)) for i in range(n)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join(10)
+    return resultados, erros
+
+
+def test_chamadas_iguais_executam_uma_vez():
+    chamadas = []
+
+    def carga():
+        chamadas.append(1)
+        time.sleep(0.2)
+        return object()
+
+    resultados, erros = _em_paralelo(8, lambda: singleflight.executar("teste_igual", "k", carga))
+    assert erros == [None] * 8
+    assert len(chamadas) == 1
+    assert all(r is resultados[0] for r in resultados)
+    m = singleflight.metricas()["teste_igual"]
+    assert (m["execucoes"], m["coalescidas"], m["em_voo"]) == (1, 7, 0)
+
+
+def test_chaves_diferentes_nao_coalescem():
+    contador = iter(range(100))
+    a = singleflight.executar("teste_chaves", 1, lambda: next(contador))
+    b = singleflight.executar("teste_chaves", 2, lambda: next(contador))
+    c = singleflight.executar("teste_chaves", 1, lambda: next(contador))  # voo anterior já terminou
+    assert (a, b, c) == (0, 1, 2)
+
+
+def test_erro_chega_a_todos_e_nao_fica_guardado():
+    def falha():
+        time.sleep(0.2)
+        raise ValueError("banco fora")
+
+    _, erros = _em_paralelo(4, lambda: singleflight.executar("teste_erro", "k", falha))
+    assert all(isinstance(e, ValueError) for e in erros)
+    assert singleflight.metricas()["teste_erro"]["erros"] == 1
+    assert singleflight.executar("teste_erro", "k", lambda: "ok") == "ok"
+    with pytest.raises(KeyError):
+        singleflight.executar("teste_erro", "k", lambda: {}["x"])
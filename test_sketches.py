@@ -0,0 +1,44 @@
+import numpy as np
+
+from sketches import KLLSketch, merge_all
+
+QS = [0.0, 0.1, 0.25, 0.5, 0.75, 0.9, 1.0]
+
+
+def _erro_de_posto(valores: np.ndarray, estimados, qs) -> float:
+    """Maior distância, em quantil, entre o valor estimado e o quantil pedido."""
+    ordenados = np.sort(valores)
+    postos = np.searchsorted(ordenados, estimados, side="right") / len(ordenados)
+    return float(np.max(np.abs(postos - np.asarray(qs))))
+
+
+def test_quantis_dentro_do_erro():
+    valores = np.random.default_rng(0).lognormal(2, 0.8, 50_000)
+    sk = KLLSketch(seed=1)
+    sk.update_many(valores)
+    assert sk.n == len(valores)
+    assert sk.quantile(0.0) == valores.min() and sk.quantile(1.0) == valores.max()
+    assert _erro_de_posto(valores, sk.quantiles(QS), QS) < 0.02
+    # memória limitada, independente do volume
+    assert sum(len(c) for c in sk.compactors) < 3 * sk.k
+
+
+def test_merge_equivale_a_um_sketch_so():
+    rng = np.random.default_rng(3)
+    meses = [rng.gamma(2.0, 5.0 + i, 5_000) for i in range(6)]
+    sketches = []
+    for i, v in enumerate(meses):
+        sk = KLLSketch(seed=i)
+        sk.update_many(v)
+        sketches.append(sk)
+    total = merge_all(sketches)
+    tudo = np.concatenate(meses)
+    assert total.n == len(tudo)
+    assert total.min == tudo.min() and total.max == tudo.max()
+    assert _erro_de_posto(tudo, total.quantiles(QS), QS) < 0.03
+    # merge_all não altera os sketches de origem
+    assert [s.n for s in sketches] == [len(v) for v in meses]
+
+
+def test_vazio_da_nan():
+    assert all(np.isnan(KLLSketch().quantiles([0.5, 0.9])))
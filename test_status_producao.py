@@ -0,0 +1,60 @@
+import numpy as np
+import pandas as pd
+
+from status_producao import SEM_CLIENTE, STATUS_COLUMNS, agregar_status
+
+
+def _painel(n: int = 500, seed: int = 3) -> pd.DataFrame:
+    rng = np.random.default_rng(seed)
+    estados = np.array(["Finalizado", "Em andamento", "Não iniciado", None], dtype=object)
+    df = pd.DataFrame({c: rng.choice(estados, n) for c in STATUS_COLUMNS})
+    df["ordemdecompra"] = rng.integers(1, n // 2, n)
+    df["Status"] = rng.choice(np.array(["Produção", "Expedição", "Pronto"], dtype=object), n)
+    df["cliente"] = rng.choice(np.array(["ANA", "BRUNO", "CARLA", None], dtype=object), n)
+    df["contrato"] = np.where(rng.random(n) > 0.3, rng.integers(1000, 9999, n).astype(float), np.nan)
+    df["Prazo"] = rng.integers(-20, 40, n)
+    return df
+
+
+def test_etapas_igual_ao_melt():
+    df = _painel()
+    melt = df.melt(id_vars=["ordemdecompra"], value_vars=STATUS_COLUMNS,
+                   var_name="Etapa", value_name="Status_Producao")
+    esperado = melt.groupby(["Etapa", "Status_Producao"]).size()
+    r = agregar_status(df)
+    obtido = r.etapas.set_index(["Etapa", "Status_Producao"])["Contagem"]
+    pd.testing.assert_series_equal(obtido.sort_index(), esperado.sort_index(), check_names=False, check_dtype=False)
+    assert (r.etapas["Etapa_Titulo"] == r.etapas["Etapa"].str[1:]).all()
+    assert (r.etapas["Etapa_Ordem"] == r.etapas["Etapa"].map(STATUS_COLUMNS.index)).all()
+
+    dist = (melt["Status_Producao"].value_counts(normalize=True) * 100).round(2)
+    pd.testing.assert_series_equal(r.distribuicao_etapas.sort_index(), dist.sort_index(),
+                                   check_names=False, check_index_type=False)
+
+
+def test_status_clientes_e_kpis_iguais_ao_pandas():
+    df = _painel()
+    r = agregar_status(df)
+
+    vc = df["Status"].value_counts()
+    assert list(r.status["Status"]) == list(vc.index)
+    assert list(r.status["Contagem"]) == list(vc.to_numpy())
+
+    ambientes = df.groupby("cliente", dropna=False)["contrato"].size()
+    ambientes.index = ambientes.index.fillna(SEM_CLIENTE)
+    assert r.clientes.set_index("cliente")["ambientes"].sort_index().to_dict() == ambientes.sort_index().to_dict()
+
+    contratos = df.groupby("cliente")["contrato"].count()
+    assert r.cliente_mais_contratos == (contratos.idxmax(), int(contratos.max()))
+
+    assert r.total_ordens == df["ordemdecompra"].nunique()
+    assert r.atrasados == int((df["Prazo"] < 0).sum())
+    assert np.isclose(r.prazo_medio, df["Prazo"].mean())
+
+
+def test_chave_muda_com_os_dados():
+    df = _painel()
+    a = agregar_status(df).chave
+    assert agregar_status(df.copy()).chave == a
+    df.loc[0, "SCorte"] = "Finalizado" if df.loc[0, "SCorte"] != "Finalizado" else "Em andamento"
+    assert agregar_status(df).chave != a
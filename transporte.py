@@ -0,0 +1,139 @@
+import logging
+import os
+import threading
+import time
+from typing import Dict
+
+import orjson
+import pandas as pd
+
+import registro_io
+
+logger = logging.getLogger(__name__)
+
+# -------------------------------------------------------------------
+# TRANSPORTE DO RPC exec_sql (LINHAS x COLUNAS)
+# -------------------------------------------------------------------
+# exec_sql devolve uma lista de objetos por linha, às vezes embrulhados
+# em {"exec_sql": {...}}: o nome de cada coluna se repete em toda linha
+# e o DataFrame nasce de uma lista de dicts. exec_sql_colunar
+# (migrations/0003) devolve um único objeto
+#   {"colunas": [...], "dados": [[valores da col 1], [col 2], ...], "linhas": n}
+# e o DataFrame é montado direto das listas de cada coluna.
+#
+# O corpo da resposta é lido cru (bytes) da sessão httpx do PostgREST e
+# decodificado com orjson. Se exec_sql_colunar não existir no banco
+# (404 / PGRST202), cai para exec_sql e não tenta mais; qualquer outro
+# erro (timeout, 5xx, SQL inválido) sobe para quem chamou, sem mudar o
+# caminho das próximas chamadas. DASH_EXEC_SQL_COLUNAR=0 força o
+# caminho por linhas. Bytes e tempo de decodificação ficam em metricas();
+# cada chamada também entra no registro do rerun (registro_io).
+
+FUNCAO_LINHAS = "exec_sql"
+FUNCAO_COLUNAR = "exec_sql_colunar"
+
+_lock = threading.Lock()
+_colunar = os.environ.get("DASH_EXEC_SQL_COLUNAR", "1") != "0"
+_metricas: Dict[str, Dict[str, float]] = {
+    caminho: {"chamadas": 0, "bytes": 0, "linhas": 0, "rede_s": 0.0, "decode_s": 0.0}
+    for caminho in ("linhas", "colunar")
+}
+
+
+def rpc_bytes(cli, funcao: str, params: dict) -> bytes:
+    """Corpo cru da chamada RPC; clientes sem sessão httpx (stand-in local) são serializados aqui."""
+    sessao = getattr(getattr(cli, "postgrest", None), "session", None)
+    if sessao is None:
+        return orjson.dumps(cli.rpc(funcao, params).execute().data)
+    resp = sessao.post(f"rpc/{funcao}", json=params)
+    resp.raise_for_status()
+    return resp.content
+
+
+def funcao_ausente(e: Exception) -> bool:
+    """True se o erro é 'função RPC inexistente' (PGRST202 / HTTP 404)."""
+    if getattr(e, "code", None) == "PGRST202":  # postgrest.APIError
+        return True
+    resp = getattr(e, "response", None)  # httpx.HTTPStatusError
+    if resp is None:
+        return False
+    if getattr(resp, "status_code", None) == 404:
+        return True
+    try:
+        return (orjson.loads(resp.content) or {}).get("code") == "PGRST202"
+    except Exception:
+        return False
+
+
+def decodificar_linhas(payload: bytes) -> pd.DataFrame:
+    rows = orjson.loads(payload) or []
+    return pd.DataFrame([r.get(FUNCAO_LINHAS, r) for r in rows])
+
+
+def decodificar_colunar(payload: bytes) -> pd.DataFrame:
+    obj = orjson.loads(payload) or {}
+    if FUNCAO_COLUNAR in obj:
+        obj = obj[FUNCAO_COLUNAR]
+    colunas = obj.get("colunas") or []
+    return pd.DataFrame(dict(zip(colunas, obj.get("dados") or [])), columns=colunas)
+
+
+def _registra(caminho: str, payload: bytes, df: pd.DataFrame, rede: float, decode: float) -> None:
+    with _lock:
+        m = _metricas[caminho]
+        m["chamadas"] += 1
+        m["bytes"] += len(payload)
+        m["linhas"] += len(df)
+        m["rede_s"] += rede
+        m["decode_s"] += decode
+
+
+def executar(cli, sql: str, identidade: str | None = None, params: dict | None = None) -> pd.DataFrame:
+    """
+    Roda `sql` via RPC no formato colunar quando disponível, senão por linhas.
+    `identidade`/`params` identificam a consulta no registro de I/O (por
+    padrão o hash do SQL já com os parâmetros aplicados).
+    """
+    global _colunar
+    identidade = identidade or registro_io.identidade(sql)
+    if _colunar:
+        t0 = time.perf_counter()
+        try:
+            payload = rpc_bytes(cli, FUNCAO_COLUNAR, {"q": sql})
+        except Exception as e:
+            if not funcao_ausente(e):
+                raise
+            # migração 0003 não aplicada neste banco: exec_sql daqui em diante
+            logger.warning(f"{FUNCAO_COLUNAR} indisponível ({e}); usando {FUNCAO_LINHAS}.")
+            _colunar = False
+        else:
+            t1 = time.perf_counter()
+            df = decodificar_colunar(payload)
+            _registra("colunar", payload, df, t1 - t0, time.perf_counter() - t1)
+            registro_io.registrar(registro_io.Consulta(
+                FUNCAO_COLUNAR, identidade, registro_io.parametros(params), len(df), len(payload),
+                (time.perf_counter() - t0) * 1000,
+            ))
+            return df
+
+    t0 = time.perf_counter()
+    payload = rpc_bytes(cli, FUNCAO_LINHAS, {"q": sql})
+    t1 = time.perf_counter()
+    df = decodificar_linhas(payload)
+    _registra("linhas", payload, df, t1 - t0, time.perf_counter() - t1)
+    registro_io.registrar(registro_io.Consulta(
+        FUNCAO_LINHAS, identidade, registro_io.parametros(params), len(df), len(payload),
+        (time.perf_counter() - t0) * 1000,
+    ))
+    return df
+
+
+def metricas() -> Dict[str, Dict[str, float]]:
+    with _lock:
+        out = {caminho: dict(m) for caminho, m in _metricas.items()}
+    for m in out.values():
+        n = m["chamadas"] or 1
+        m["kb_por_chamada"] = m["bytes"] / 1024 / n
+        m["decode_ms_por_chamada"] = m["decode_s"] * 1000 / n
+    out["colunar_ativo"] = _colunar
+    return out